@@ -4,9 +4,10 @@ Gestiona la creación de descripciones HTML usando Google Gemini
 """
 
 import json
-from typing import Dict, Optional
+from typing import Callable, Dict, List, Optional
 import google.generativeai as genai
 from pathlib import Path
+import time
 import traceback
 
 # Importar el registro de plantillas y funciones necesarias
@@ -22,16 +23,47 @@ from .compatibility_fixes import (
     safe_contenido_pdf_access,
     safe_json_parse
 )
+from .response_cache import ResponseCache
+from .batch_engine import RateLimiter
+from .prompt_registry import PromptRegistry
 
 class AIHandler:
     """Maneja la generación de descripciones con IA"""
     
-    def __init__(self, api_key: Optional[str] = None):
+    MODEL_NAME = 'gemini-1.5-flash'
+    GENERATION_PARAMS = {'temperature': 0.7, 'max_output_tokens': 8192}
+    # Etapas de generate_description: nombre -> (método, datos que requiere, dato que produce).
+    # Solo se ejecutan las que producen algo que la plantilla consume (RENDER_INPUTS).
+    STAGES = {
+        'pdf': ('_stage_pdf', ('base',), 'pdf'),
+        'extraccion': ('_stage_extract', ('base', 'pdf'), 'info'),
+        'categoria': ('_stage_category', ('info',), 'categoria'),
+        'marketing_generico': ('_stage_marketing_generic', ('info', 'categoria'), 'marketing'),
+        'marketing_categoria': ('_stage_marketing_category', ('info', 'categoria'), 'marketing'),
+        'caracteristicas': ('_stage_features', ('info', 'pdf'), 'caracteristicas'),
+    }
+    RENDER_INPUTS = ('info', 'marketing', 'caracteristicas')
+    # Etapa elegida para cada dato con más de un productor (se redefine por categoría en pipeline_config.json)
+    DEFAULT_PIPELINE = {'marketing': 'marketing_categoria'}
+    
+    def __init__(self, api_key: Optional[str] = None, response_cache: Optional[ResponseCache] = None,
+                 use_cache: bool = True, rate_limiter: Optional[RateLimiter] = None):
         self.api_key = api_key
         self.model = None
         self.current_prompt_version = "base"
         self.module_path = Path(__file__).parent
         self.product_types = self._load_product_types()
+        # Prompts de templates/ en memoria (se recargan si cambia el archivo)
+        self.prompts = PromptRegistry.shared(self.module_path / "templates")
+        # Respuestas del modelo cacheadas en disco: repetir un producto no vuelve a llamar a la API
+        self.response_cache = response_cache
+        if self.response_cache is None and use_cache:
+            try:
+                self.response_cache = ResponseCache()
+            except Exception as e:
+                print(f"[WARNING] Caché de respuestas no disponible: {e}")
+        # Cuota de la API compartida por todos los hilos que generan con este handler
+        self.rate_limiter = rate_limiter
         
         if api_key is not None:
             self.initialize_model(api_key)
@@ -43,10 +75,7 @@ class AIHandler:
             genai.configure(api_key=api_key)
             
             # Configuración para el modelo, incluyendo un timeout más largo
-            generation_config = genai.types.GenerationConfig(
-                temperature=0.7,
-                max_output_tokens=8192,
-            )
+            generation_config = genai.types.GenerationConfig(**self.GENERATION_PARAMS)
             safety_settings = [
                 {"category": "HARM_CATEGORY_HARASSMENT", "threshold": "BLOCK_NONE"},
                 {"category": "HARM_CATEGORY_HATE_SPEECH", "threshold": "BLOCK_NONE"},
@@ -56,14 +85,14 @@ class AIHandler:
             
             # Priorizar el modelo más nuevo y rápido
             self.model = genai.GenerativeModel(
-                model_name='gemini-1.5-flash',
+                model_name=self.MODEL_NAME,
                 generation_config=generation_config,
                 safety_settings=safety_settings
             )
 
             # Prueba rápida para asegurar que el modelo está listo
             self.model.generate_content("Test")
-            print(f"[SUCCESS] Modelo de IA inicializado correctamente: gemini-1.5-flash")
+            print(f"[SUCCESS] Modelo de IA inicializado correctamente: {self.MODEL_NAME}")
             return True
                     
         except Exception as e:
@@ -73,6 +102,29 @@ class AIHandler:
             self.model = None
             return False
     
+    def _generate(self, prompt: str, validate: Optional[Callable[[str], bool]] = None) -> str:
+        """
+        Texto de generate_content para el prompt, desde la caché si ya se pidió antes.
+        Con validate, solo se guardan las respuestas que lo cumplen (un JSON roto no queda cacheado).
+        """
+        key = None
+        if self.response_cache is not None:
+            key = ResponseCache.make_key(self.MODEL_NAME, prompt, self.GENERATION_PARAMS)
+            cached = self.response_cache.get(key)
+            if cached is not None:
+                return cached
+        reserved = 0
+        if self.rate_limiter is not None:
+            reserved = self.rate_limiter.acquire(RateLimiter.estimate_tokens(prompt))
+        response = self.model.generate_content(prompt)
+        if self.rate_limiter is not None:
+            usage = getattr(response, 'usage_metadata', None)
+            self.rate_limiter.record_usage(reserved, getattr(usage, 'total_token_count', None))
+        text = response.text
+        if key is not None and text and (validate is None or validate(text)):
+            self.response_cache.put(key, text)
+        return text
+    
     def _load_product_types(self) -> Dict:
         """Carga la configuración de tipos de productos."""
         template_path = self.module_path / "templates" / "product_templates.json"
@@ -101,124 +153,33 @@ class AIHandler:
         </body></html>
         """
 
-    def generate_description(self, product_info: Optional[Dict], config: Optional[Dict] = None, prompt_template: Optional[str] = None) -> str:
+    def generate_description(self, product_info: Optional[Dict], config: Optional[Dict] = None, prompt_template: Optional[str] = None,
+                             raise_errors: bool = False, prefetched: Optional[Dict] = None,
+                             timings: Optional[Dict[str, float]] = None) -> str:
         """
         Genera la descripción HTML del producto de forma dinámica basada en la categoría.
+        Las etapas se resuelven a partir de lo que consume la plantilla (ver STAGES).
+        Con raise_errors, los errores se propagan en lugar de devolver la página de error (para reintentar).
+        prefetched trae datos ya resueltos ('pdf', 'info' de extract_batch) cuyas etapas no se vuelven a ejecutar.
+        timings, si se pasa, recibe los segundos de cada etapa ejecutada (el handler lo comparten varios hilos).
         """
         if not self.model:
+            if raise_errors:
+                raise RuntimeError("El modelo de IA no está configurado.")
             return self._generate_fallback_description(product_info, "El modelo de IA no está configurado.")
 
         if not product_info:
+            if raise_errors:
+                raise ValueError("No se proporcionó información del producto.")
             return self._generate_fallback_description(None, "No se proporcionó información del producto.")
 
+        timings = {} if timings is None else timings
         try:
-            # 1. Extraer datos base y del PDF
-            info = extraer_info_tecnica(product_info)
-            pdf_url = info.get('pdf_url', '')
-            contenido_pdf = None
-            if pdf_url and str(pdf_url).lower() not in ['nan', 'none', '']:
-                if not pdf_url.startswith('http'):
-                    pdf_url = f"https://storage.googleapis.com/fichas_tecnicas/{pdf_url}"
-                contenido_pdf = extraer_contenido_pdf(pdf_url, print_callback=print)
-
-            # 2. Usar IA para extraer datos estructurados y categoría
-            prompt_path = self.module_path / "templates" / "detailed_product_prompt.json"
-            with open(prompt_path, 'r', encoding='utf-8') as f:
-                prompts = json.load(f)
-            
-            # Manejar contenido_pdf de forma segura
-            pdf_text = ""
-            pdf_tables = ""
-            if contenido_pdf:
-                if isinstance(contenido_pdf, dict):
-                    pdf_text = contenido_pdf.get('text', '')[:4000]
-                    pdf_tables = contenido_pdf.get('tables_markdown', '')
-                elif isinstance(contenido_pdf, str):
-                    pdf_text = contenido_pdf[:4000]
-            
-            prompt_extract = prompts['prompt_extract'].format(
-                pdf_text=pdf_text,
-                pdf_tables_as_markdown=pdf_tables,
-                nombre=info.get('nombre'),
-                familia=info.get('familia'),
-                modelo=info.get('modelo'),
-                marca=info.get('marca')
-            )
-            response_extract = self.model.generate_content(prompt_extract)
-            json_text = response_extract.text
-            try:
-                # Búsqueda robusta de JSON en la respuesta
-                start_index = json_text.find('{')
-                end_index = json_text.rfind('}') + 1
-                if start_index != -1 and end_index != -1:
-                    json_str = json_text[start_index:end_index]
-                    extracted_data = json.loads(json_str)
-                    info.update(extracted_data)
-                else:
-                    raise ValueError("No se encontró un objeto JSON válido en la respuesta de extracción.")
-            except json.JSONDecodeError as json_err:
-                print(f"Error de decodificación JSON. Respuesta de la IA: >>>{json_text}<<<")
-                raise ValueError(f"Respuesta de IA no es un JSON válido: {json_err}") from json_err
-
-            # Normalizar valores de consumo según tipo de combustible
-            if info.get('combustible', '').lower() in ['gas', 'gnc', 'glp']:
-                # Para gas, asegurar que el consumo esté en m³
-                consumo = info.get('consumo', info.get('consumo_75_carga', ''))
-                if consumo and 'L/h' not in consumo:
-                    info['consumo'] = consumo
-            else:
-                # Para diesel/nafta, normalizar a L/h
-                consumo = info.get('consumo', info.get('consumo_75_carga', ''))
-                if consumo:
-                    info['consumo'] = consumo.replace('Lts/h', 'L/h').replace('litros/hora', 'L/h')
-            
-            categoria = info.get('categoria_producto', 'default')
-
-            # Detección manual de tipos de producto para anular la IA si es necesario
-            nombre_lower = info.get('nombre', '').lower()
-            modelo_lower = info.get('modelo', '').lower()
-
-            # Detectar generadores Cummins específicamente
-            if 'cummins' in nombre_lower or 'yns' in modelo_lower or 'cs' in modelo_lower:
-                categoria = 'generador_cummins'
-            
-            print(f"[INFO] Categoría de producto identificada: {categoria}")
-
-            # 3. Usar IA para generar contenido de marketing
-            prompt_generate = prompts['prompt_generate'].format(
-                categoria_producto=categoria,
-                product_data_json=json.dumps(info, indent=2)
-            )
-            response_generate = self.model.generate_content(prompt_generate)
-            json_text_marketing = response_generate.text
-            # Parse seguro del JSON de marketing
-            marketing_content = safe_json_parse(json_text_marketing)
-            if not marketing_content:
-                raise ValueError("No se encontró un objeto JSON válido en la respuesta de marketing.")
-            
-            # 4. Seleccionar y renderizar la plantilla HTML correcta
-            # Asegurar que contenido_pdf sea manejado correctamente
-            texto_pdf = safe_contenido_pdf_access(contenido_pdf)
-            caracteristicas = validar_caracteristicas_producto(info, texto_pdf)
-            # Asegurar que caracteristicas sea un diccionario
-            caracteristicas = ensure_caracteristicas_dict(caracteristicas)
-            
-            # Cargar el prompt de generación específico para la categoría
-            prompt_generate_path = self.module_path / "templates" / f"{categoria}_prompt.json"
-            if not prompt_generate_path.exists():
-                prompt_generate_path = self.module_path / "templates" / "default_prompt.json"
-
-            with open(prompt_generate_path, 'r', encoding='utf-8') as f:
-                specific_prompts = json.load(f)
-            
-            prompt_generate = specific_prompts['prompt_generate'].format(product_data_json=json.dumps(info, indent=2))
-            response_generate = self.model.generate_content(prompt_generate)
-            json_text_marketing = response_generate.text
-            # Parse seguro del segundo JSON de marketing
-            marketing_content = safe_json_parse(json_text_marketing)
-            if not marketing_content:
-                raise ValueError("No se encontró un objeto JSON válido en la respuesta de marketing específica.")
-
+            context = {'base': extraer_info_tecnica(product_info), **(prefetched or {})}
+            info, marketing_content, caracteristicas = [
+                self._resolve_stage_output(output, context, timings) for output in self.RENDER_INPUTS
+            ]
+            categoria = context['categoria']
             template_function = TEMPLATE_REGISTRY.get(categoria, TEMPLATE_REGISTRY['default'])
             
             print(f"[INFO] Usando plantilla y prompt para '{categoria}'.")
@@ -226,8 +187,256 @@ class AIHandler:
 
         except Exception as e:
             print(f"[ERROR] Error crítico durante la generación: {e}")
+            if raise_errors:
+                raise
             traceback.print_exc()
             return self._generate_fallback_description(product_info, str(e))
+        finally:
+            resumen = ', '.join(f"{stage} {seconds:.2f}s" for stage, seconds in timings.items())
+            print(f"[INFO] Etapas de generación de {self.product_key(product_info)}: {resumen or 'ninguna'}")
+
+    def _resolve_stage_output(self, output: str, context: Dict, timings: Dict[str, float]):
+        """Ejecuta (una sola vez) la etapa que produce output, resolviendo antes sus entradas"""
+        if output in context:
+            return context[output]
+        stage = self._stage_for(output, context, timings)
+        method, requires, _ = self.STAGES[stage]
+        for name in requires:
+            self._resolve_stage_output(name, context, timings)
+        start = time.perf_counter()
+        context[output] = getattr(self, method)(context)
+        timings[stage] = time.perf_counter() - start
+        return context[output]
+
+    def _stage_for(self, output: str, context: Dict, timings: Dict[str, float]) -> str:
+        """Etapa que produce output; si hay varias, la elige la configuración de la categoría"""
+        candidates = [name for name, (_, _, provides) in self.STAGES.items() if provides == output]
+        if len(candidates) == 1:
+            return candidates[0]
+        categoria = self._resolve_stage_output('categoria', context, timings)
+        stage = self._category_pipeline(categoria).get(output)
+        if stage not in candidates:
+            raise ValueError(f"Etapa '{stage}' no válida para '{output}' (categoría {categoria})")
+        return stage
+
+    def _category_pipeline(self, categoria: str) -> Dict:
+        """Configuración de etapas de la categoría (templates/pipeline_config.json) sobre la de default"""
+        pipeline = self.prompts.get("pipeline_config.json") or {}
+        return {**self.DEFAULT_PIPELINE, **pipeline.get('default', {}), **pipeline.get(categoria, {})}
+
+    def _stage_pdf(self, context: Dict):
+        """Contenido de la ficha técnica en PDF (None si el producto no tiene)"""
+        pdf_url = context['base'].get('pdf_url', '')
+        if pdf_url and str(pdf_url).lower() not in ['nan', 'none', '']:
+            if not pdf_url.startswith('http'):
+                pdf_url = f"https://storage.googleapis.com/fichas_tecnicas/{pdf_url}"
+            return extraer_contenido_pdf(pdf_url, print_callback=print)
+        return None
+
+    def _stage_extract(self, context: Dict) -> Dict:
+        """IA: datos técnicos estructurados y categoría a partir del PDF"""
+        info = dict(context['base'])
+        pdf_text, pdf_tables = self._pdf_sections(context['pdf'])
+        
+        prompt_extract = self.prompts.render(
+            "detailed_product_prompt.json", 'prompt_extract',
+            pdf_text=pdf_text,
+            pdf_tables_as_markdown=pdf_tables,
+            nombre=info.get('nombre'),
+            familia=info.get('familia'),
+            modelo=info.get('modelo'),
+            marca=info.get('marca')
+        )
+        json_text = self._generate(prompt_extract, validate=lambda text: bool(safe_json_parse(text)))
+        try:
+            # Búsqueda robusta de JSON en la respuesta
+            start_index = json_text.find('{')
+            end_index = json_text.rfind('}') + 1
+            if start_index != -1 and end_index != -1:
+                json_str = json_text[start_index:end_index]
+                extracted_data = json.loads(json_str)
+                info.update(extracted_data)
+            else:
+                raise ValueError("No se encontró un objeto JSON válido en la respuesta de extracción.")
+        except json.JSONDecodeError as json_err:
+            print(f"Error de decodificación JSON. Respuesta de la IA: >>>{json_text}<<<")
+            raise ValueError(f"Respuesta de IA no es un JSON válido: {json_err}") from json_err
+        return self._normalize_extracted(info)
+
+    @staticmethod
+    def _pdf_sections(contenido_pdf) -> tuple:
+        """(texto recortado a 4000 caracteres, tablas en markdown) del contenido del PDF"""
+        # Manejar contenido_pdf de forma segura
+        pdf_text = ""
+        pdf_tables = ""
+        if contenido_pdf:
+            if isinstance(contenido_pdf, dict):
+                pdf_text = contenido_pdf.get('text', '')[:4000]
+                pdf_tables = contenido_pdf.get('tables_markdown', '')
+            elif isinstance(contenido_pdf, str):
+                pdf_text = contenido_pdf[:4000]
+        return pdf_text, pdf_tables
+
+    @staticmethod
+    def _normalize_extracted(info: Dict) -> Dict:
+        """Normaliza los valores de consumo según el tipo de combustible"""
+        if info.get('combustible', '').lower() in ['gas', 'gnc', 'glp']:
+            # Para gas, asegurar que el consumo esté en m³
+            consumo = info.get('consumo', info.get('consumo_75_carga', ''))
+            if consumo and 'L/h' not in consumo:
+                info['consumo'] = consumo
+        else:
+            # Para diesel/nafta, normalizar a L/h
+            consumo = info.get('consumo', info.get('consumo_75_carga', ''))
+            if consumo:
+                info['consumo'] = consumo.replace('Lts/h', 'L/h').replace('litros/hora', 'L/h')
+        return info
+
+    @staticmethod
+    def product_key(product_info: Dict) -> str:
+        """Clave del producto en los lotes (SKU; el nombre si no tiene)"""
+        return str(product_info.get('SKU') or product_info.get('sku') or product_info.get('Descripción', ''))
+
+    def extract_batch(self, products: List[Dict]) -> Dict[str, Dict]:
+        """
+        Extracción de varios productos en un solo prompt (prompt_extract_batch): cada PDF distinto se
+        incluye una vez y la respuesta es un array JSON con un objeto por SKU. Si la respuesta no es
+        válida o le faltan SKUs, esos productos se reintentan partiendo el lote en dos; un producto
+        que falla solo queda fuera del resultado y generate_description lo extrae por su cuenta.
+        Retorna {SKU: {'pdf': contenido, 'info': datos}} para usar como prefetched.
+        """
+        if not self.model:
+            return {}
+        entries = {}
+        pdfs = {}
+        for product_info in products:
+            base = extraer_info_tecnica(product_info)
+            pdf_url = str(base.get('pdf_url') or '')
+            if pdf_url not in pdfs:
+                pdfs[pdf_url] = self._stage_pdf({'base': base})
+            entries[self.product_key(product_info)] = {'base': base, 'pdf_url': pdf_url}
+
+        results = {}
+        self._extract_chunk(list(entries), entries, pdfs, results)
+        print(f"[INFO] Extracción por lotes: {len(results)}/{len(entries)} productos, {len(pdfs)} PDFs distintos")
+        return results
+
+    def _extract_chunk(self, skus: List[str], entries: Dict, pdfs: Dict, results: Dict):
+        if len(skus) == 1:
+            # Un producto solo usa el prompt individual de generate_description
+            return
+        try:
+            extracted = self._request_batch(skus, entries, pdfs)
+        except Exception as e:
+            print(f"[WARNING] Extracción de {len(skus)} productos fallida: {e}")
+            extracted = {}
+        for sku, data in extracted.items():
+            info = self._normalize_extracted({**entries[sku]['base'], **data})
+            results[sku] = {'pdf': pdfs[entries[sku]['pdf_url']], 'info': info}
+        missing = [sku for sku in skus if sku not in extracted]
+        if missing:
+            if len(missing) < len(skus):
+                print(f"[WARNING] Faltan {len(missing)} productos en la respuesta; se reintentan")
+            half = (len(missing) + 1) // 2 if len(missing) == len(skus) else len(missing)
+            self._extract_chunk(missing[:half], entries, pdfs, results)
+            if missing[half:]:
+                self._extract_chunk(missing[half:], entries, pdfs, results)
+
+    def _request_batch(self, skus: List[str], entries: Dict, pdfs: Dict) -> Dict[str, Dict]:
+        """Una llamada con los productos de skus; retorna {SKU: datos} de los objetos válidos"""
+        documents = {}
+        products_data = []
+        for sku in skus:
+            pdf_url = entries[sku]['pdf_url']
+            document_id = None
+            if pdfs.get(pdf_url):
+                document_id = documents.setdefault(pdf_url, f"D{len(documents) + 1}")
+            base = entries[sku]['base']
+            products_data.append({'sku': sku, 'documento': document_id,
+                                  **{k: base.get(k) for k in ('nombre', 'familia', 'modelo', 'marca')}})
+        pdf_documents = []
+        for pdf_url, document_id in documents.items():
+            pdf_text, pdf_tables = self._pdf_sections(pdfs[pdf_url])
+            pdf_documents.append(f"### Documento {document_id}\n**Texto General:**\n{pdf_text}\n\n"
+                                 f"**Tablas (PRIORIDAD MÁXIMA):**\n{pdf_tables}")
+
+        prompt = self.prompts.render(
+            "detailed_product_prompt.json", 'prompt_extract_batch',
+            pdf_documents='\n\n'.join(pdf_documents) or '(sin documentos)',
+            products_json=json.dumps(products_data, indent=2, ensure_ascii=False)
+        )
+        text = self._generate(prompt, validate=lambda text: set(self._parse_batch(text)) >= set(skus))
+        return {sku: data for sku, data in self._parse_batch(text).items() if sku in skus}
+
+    @staticmethod
+    def _parse_batch(text: str) -> Dict[str, Dict]:
+        """Objetos del array JSON de la respuesta, por SKU ({} si no es un array válido)"""
+        start_index = text.find('[')
+        end_index = text.rfind(']') + 1
+        if start_index == -1 or end_index <= start_index:
+            return {}
+        try:
+            items = json.loads(text[start_index:end_index])
+        except json.JSONDecodeError:
+            return {}
+        if not isinstance(items, list):
+            return {}
+        return {str(item.pop('sku')): item for item in items if isinstance(item, dict) and item.get('sku')}
+
+    def _stage_category(self, context: Dict) -> str:
+        """Categoría detectada por la IA, corregida por reglas manuales"""
+        info = context['info']
+        categoria = info.get('categoria_producto', 'default')
+
+        # Detección manual de tipos de producto para anular la IA si es necesario
+        nombre_lower = info.get('nombre', '').lower()
+        modelo_lower = info.get('modelo', '').lower()
+
+        # Detectar generadores Cummins específicamente
+        if 'cummins' in nombre_lower or 'yns' in modelo_lower or 'cs' in modelo_lower:
+            categoria = 'generador_cummins'
+        
+        print(f"[INFO] Categoría de producto identificada: {categoria}")
+        return categoria
+
+    def _stage_marketing_generic(self, context: Dict) -> Dict:
+        """IA: marketing con el prompt general de detailed_product_prompt.json"""
+        prompt_generate = self.prompts.render(
+            "detailed_product_prompt.json", 'prompt_generate',
+            categoria_producto=context['categoria'],
+            product_data_json=json.dumps(context['info'], indent=2)
+        )
+        json_text_marketing = self._generate(prompt_generate, validate=lambda text: bool(safe_json_parse(text)))
+        # Parse seguro del JSON de marketing
+        marketing_content = safe_json_parse(json_text_marketing)
+        if not marketing_content:
+            raise ValueError("No se encontró un objeto JSON válido en la respuesta de marketing.")
+        return marketing_content
+
+    def _stage_marketing_category(self, context: Dict) -> Dict:
+        """IA: marketing con el prompt específico de la categoría (o default_prompt.json)"""
+        categoria = context['categoria']
+        # Cargar el prompt de generación específico para la categoría
+        prompt_file = self._category_pipeline(categoria).get('prompt_file') or f"{categoria}_prompt.json"
+        if not self.prompts.exists(prompt_file):
+            prompt_file = "default_prompt.json"
+        
+        prompt_generate = self.prompts.render(prompt_file, 'prompt_generate',
+                                              product_data_json=json.dumps(context['info'], indent=2))
+        json_text_marketing = self._generate(prompt_generate, validate=lambda text: bool(safe_json_parse(text)))
+        # Parse seguro del JSON de marketing específico
+        marketing_content = safe_json_parse(json_text_marketing)
+        if not marketing_content:
+            raise ValueError("No se encontró un objeto JSON válido en la respuesta de marketing específica.")
+        return marketing_content
+
+    def _stage_features(self, context: Dict) -> Dict:
+        """Características del producto validadas contra el texto del PDF"""
+        # Asegurar que contenido_pdf sea manejado correctamente
+        texto_pdf = safe_contenido_pdf_access(context['pdf'])
+        caracteristicas = validar_caracteristicas_producto(context['info'], texto_pdf)
+        # Asegurar que caracteristicas sea un diccionario
+        return ensure_caracteristicas_dict(caracteristicas)
 
     def _generate_html_with_custom_prompt(self, product_info: Optional[Dict], config: Optional[Dict], prompt_template: str) -> str:
         """Genera descripción con un prompt personalizado."""
@@ -251,8 +460,7 @@ class AIHandler:
         """
         
         assert self.model is not None
-        response = self.model.generate_content(system_message)
-        html_content = response.text.strip()
+        html_content = self._generate(system_message).strip()
 
         # Limpieza básica de la respuesta
         if "```html" in html_content:
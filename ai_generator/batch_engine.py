@@ -0,0 +1,221 @@
+"""
+Motor de Procesamiento por Lotes
+Genera descripciones en paralelo con un pool acotado de hilos, límite de cuota (pedidos y tokens por minuto)
+y reintentos con espera exponencial aleatoria; los resultados se entregan en el orden de entrada
+"""
+
+import json
+import random
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional
+
+
+class TokenBucket:
+    """Balde de fichas: se recarga a rate_per_minute y admite ráfagas de hasta capacity"""
+
+    def __init__(self, rate_per_minute: float, capacity: Optional[float] = None):
+        self.rate = rate_per_minute / 60.0
+        self.capacity = capacity if capacity is not None else rate_per_minute
+        self.tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def acquire(self, amount: float = 1.0):
+        """Espera hasta poder consumir amount fichas (un pedido mayor que capacity se limita a capacity)"""
+        amount = min(amount, self.capacity)
+        while True:
+            with self._lock:
+                self._refill()
+                if self.tokens >= amount:
+                    self.tokens -= amount
+                    return
+                wait = (amount - self.tokens) / self.rate
+            time.sleep(min(wait, 1.0))
+
+    def adjust(self, amount: float):
+        """Corrige el consumo después del hecho (positivo consume, negativo devuelve)"""
+        with self._lock:
+            self._refill()
+            self.tokens = min(self.capacity, self.tokens - amount)
+
+
+class RateLimiter:
+    """Cuota del modelo: pedidos por minuto y tokens por minuto"""
+
+    # Tokens reservados por la respuesta hasta conocer el consumo real
+    OUTPUT_TOKENS_ESTIMATE = 1500
+
+    def __init__(self, requests_per_minute: float = 15, tokens_per_minute: float = 1_000_000):
+        self.requests = TokenBucket(requests_per_minute)
+        self.tokens = TokenBucket(tokens_per_minute)
+
+    @staticmethod
+    def estimate_tokens(prompt: str) -> int:
+        """Estimación gruesa: ~4 caracteres por token más la respuesta esperada"""
+        return len(prompt) // 4 + RateLimiter.OUTPUT_TOKENS_ESTIMATE
+
+    def acquire(self, estimated_tokens: int) -> int:
+        """Espera turno para un pedido; retorna los tokens reservados"""
+        self.requests.acquire()
+        self.tokens.acquire(estimated_tokens)
+        return estimated_tokens
+
+    def record_usage(self, reserved: int, actual: Optional[int]):
+        """Ajusta el balde de tokens con el consumo informado por la API"""
+        if actual is not None:
+            self.tokens.adjust(actual - reserved)
+
+
+@dataclass
+class BatchResult:
+    """Resultado de un elemento del lote"""
+    index: int
+    item: Any
+    value: Any = None
+    error: Optional[str] = None
+    attempts: int = 0
+    elapsed: float = 0.0
+
+    @property
+    def success(self) -> bool:
+        return self.error is None
+
+
+class BatchPrefetcher:
+    """
+    Agrupa los elementos en bloques de size (en el orden del lote) y resuelve cada bloque una sola vez
+    con fetch(bloque) -> {clave: valor}, la primera vez que un hilo pide uno de sus elementos.
+    Así los hilos del BatchEngine comparten una llamada por bloque (p. ej. AIHandler.extract_batch).
+    """
+
+    def __init__(self, items: List[Any], fetch: Callable[[List[Any]], Dict[str, Any]],
+                 key: Callable[[Any], str], size: int = 5):
+        self.fetch = fetch
+        self.key = key
+        size = max(1, size)
+        self._chunks = [list(items[i:i + size]) for i in range(0, len(items), size)]
+        self._chunk_of = {key(item): n for n, chunk in enumerate(self._chunks) for item in chunk}
+        self._locks = [threading.Lock() for _ in self._chunks]
+        self._results: Dict[str, Any] = {}
+        self._done = set()
+
+    def get(self, item: Any) -> Optional[Any]:
+        """Valor del elemento (None si su bloque no lo resolvió); los reintentos reciben el mismo valor"""
+        key = self.key(item)
+        n = self._chunk_of.get(key)
+        if n is None:
+            return None
+        with self._locks[n]:
+            if n not in self._done:
+                try:
+                    self._results.update(self.fetch(self._chunks[n]))
+                except Exception as e:
+                    print(f"[WARNING] Bloque {n + 1} no resuelto: {e}")
+                self._done.add(n)
+                self._chunks[n] = []
+            return self._results.get(key)
+
+
+class BatchEngine:
+    """
+    Ejecuta worker(item) sobre un lote con max_workers hilos. Cada elemento se reintenta hasta
+    max_retries veces con espera exponencial aleatoria (full jitter). imap() entrega los resultados
+    en el orden de entrada con una ventana de elementos en curso, para que el consumidor (p. ej. el
+    navegador, que es secuencial) avance mientras los siguientes se generan.
+    """
+
+    CONFIG_FILE = Path("config/ai_config.json")
+
+    def __init__(self, max_workers: int = 4, max_retries: int = 3, backoff_base: float = 2.0,
+                 backoff_max: float = 60.0, window: Optional[int] = None):
+        self.max_workers = max(1, max_workers)
+        self.max_retries = max(0, max_retries)
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.window = window or self.max_workers * 2
+
+    @staticmethod
+    def load_config(path: Optional[Path] = None) -> Dict[str, Any]:
+        """Configuración de lotes y cuota (config/ai_config.json); vacía si no existe"""
+        path = Path(path or BatchEngine.CONFIG_FILE)
+        if path.exists():
+            try:
+                with open(path, 'r', encoding='utf-8') as f:
+                    return json.load(f)
+            except Exception as e:
+                print(f"[WARNING] Error cargando {path}: {e}")
+        return {}
+
+    @classmethod
+    def from_config(cls, config: Dict[str, Any]) -> 'BatchEngine':
+        return cls(max_workers=config.get('batch_workers', 4),
+                   max_retries=config.get('max_retries', 3),
+                   backoff_base=config.get('backoff_base', 2.0),
+                   backoff_max=config.get('backoff_max', 60.0))
+
+    def _backoff(self, attempt: int) -> float:
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** attempt))
+
+    def _call(self, index: int, item: Any, worker: Callable[[Any], Any],
+              should_stop: Optional[Callable[[], bool]]) -> BatchResult:
+        result = BatchResult(index=index, item=item)
+        start = time.perf_counter()
+        for attempt in range(self.max_retries + 1):
+            if should_stop is not None and should_stop():
+                result.error = result.error or 'Proceso detenido'
+                break
+            result.attempts = attempt + 1
+            try:
+                result.value = worker(item)
+                result.error = None
+                break
+            except Exception as e:
+                result.error = str(e)
+                if attempt < self.max_retries:
+                    delay = self._backoff(attempt)
+                    print(f"[WARNING] Intento {attempt + 1} fallido ({e}); reintento en {delay:.1f}s")
+                    time.sleep(delay)
+        result.elapsed = time.perf_counter() - start
+        return result
+
+    def imap(self, items: Iterable[Any], worker: Callable[[Any], Any],
+             should_stop: Optional[Callable[[], bool]] = None) -> Iterator[BatchResult]:
+        """Resultados en el orden de entrada; como máximo window elementos en curso"""
+        pending = deque()
+        source = iter(enumerate(items))
+        with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='batch') as executor:
+            try:
+                for index, item in source:
+                    pending.append(executor.submit(self._call, index, item, worker, should_stop))
+                    if len(pending) >= self.window:
+                        break
+                while pending:
+                    result = pending.popleft().result()
+                    for index, item in source:
+                        pending.append(executor.submit(self._call, index, item, worker, should_stop))
+                        break
+                    yield result
+            finally:
+                # Si el consumidor se detiene, no se inician los elementos que quedaban en cola
+                for future in pending:
+                    future.cancel()
+
+    def run(self, items: Iterable[Any], worker: Callable[[Any], Any],
+            should_stop: Optional[Callable[[], bool]] = None) -> List[BatchResult]:
+        """Procesa todo el lote y retorna los resultados en el orden de entrada"""
+        start = time.perf_counter()
+        results = list(self.imap(items, worker, should_stop))
+        ok = sum(1 for r in results if r.success)
+        print(f"[INFO] Lote finalizado: {ok}/{len(results)} correctos en {time.perf_counter() - start:.1f}s "
+              f"({self.max_workers} hilos)")
+        return results
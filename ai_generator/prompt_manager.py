@@ -9,6 +9,8 @@ from datetime import datetime
 from typing import Dict, List, Optional
 from pathlib import Path
 
+from .prompt_registry import PromptRegistry
+
 class PromptManager:
     """Gestiona prompts y su versionado"""
     
@@ -112,11 +114,16 @@ class PromptManager:
             
             with open(self.base_prompt_file, 'w', encoding='utf-8') as f:
                 json.dump(base_prompt, f, indent=2, ensure_ascii=False)
+            self._notify_template_change(self.base_prompt_file)
             
             # Agregar al historial
             self.history.insert(0, base_prompt)
             self._save_history()
     
+    def _notify_template_change(self, path: Path):
+        """Recarga el archivo en el registro de prompts compartido con AIHandler"""
+        PromptRegistry.shared(path.parent).reload(path.name)
+    
     def _get_default_base_prompt(self) -> str:
         """Retorna el prompt base por defecto para generar HTML completo."""
         return """Eres un experto en marketing y desarrollo frontend. Tu tarea es generar un código HTML completo y profesional para la descripción de un producto, basándote en los datos proporcionados.
@@ -219,6 +226,7 @@ Genera el código HTML final. No incluyas explicaciones, solo el código."""
         
         with open(self.base_prompt_file, 'w', encoding='utf-8') as f:
             json.dump(updated_base, f, indent=2, ensure_ascii=False)
+        self._notify_template_change(self.base_prompt_file)
         
         # Actualizar en historial
         for i, version in enumerate(self.history):
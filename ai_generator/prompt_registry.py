@@ -0,0 +1,123 @@
+"""
+Registro de Prompts
+Mantiene en memoria los JSON de ai_generator/templates y los recarga cuando cambia su fecha de modificación
+"""
+
+import json
+import string
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, Optional, Tuple, Union
+
+
+class PromptRegistry:
+    """
+    Carga una vez todos los .json de la carpeta y responde desde memoria. Cada check_interval segundos
+    (como máximo) revisa el mtime de los archivos y recarga los que cambiaron, se agregaron o se
+    borraron; reload() fuerza la recarga (la usa PromptManager al guardar). Los campos de formato
+    ({nombre}, {pdf_text}, ...) de cada texto quedan precalculados para validar render().
+    """
+
+    _shared: Dict[Path, 'PromptRegistry'] = {}
+    _shared_lock = threading.Lock()
+
+    def __init__(self, directory: Union[str, Path], check_interval: float = 2.0):
+        self.directory = Path(directory)
+        self.check_interval = check_interval
+        self._entries: Dict[str, Tuple[float, Dict[str, Any], Dict[str, frozenset]]] = {}
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+        self.reload()
+
+    @classmethod
+    def shared(cls, directory: Union[str, Path]) -> 'PromptRegistry':
+        """Instancia única por carpeta, compartida por AIHandler y PromptManager"""
+        directory = Path(directory).resolve()
+        with cls._shared_lock:
+            if directory not in cls._shared:
+                cls._shared[directory] = cls(directory)
+            return cls._shared[directory]
+
+    def reload(self, filename: Optional[str] = None):
+        """Relee un archivo (o revisa toda la carpeta si no se indica)"""
+        with self._lock:
+            if filename is None:
+                self._scan()
+            else:
+                self._load(self.directory / filename)
+
+    def get(self, filename: str) -> Optional[Dict[str, Any]]:
+        """Contenido del JSON (None si no existe); no modificar el dict retornado"""
+        self._check()
+        entry = self._entries.get(filename)
+        return entry[1] if entry else None
+
+    def exists(self, filename: str) -> bool:
+        self._check()
+        return filename in self._entries
+
+    def fields(self, filename: str, key: str) -> frozenset:
+        """Campos de formato que usa el texto key del archivo"""
+        self._check()
+        entry = self._entries.get(filename)
+        return entry[2].get(key, frozenset()) if entry else frozenset()
+
+    def render(self, filename: str, key: str, **values) -> str:
+        """Texto key del archivo con los campos reemplazados; falla si falta alguno"""
+        data = self.get(filename)
+        if data is None:
+            raise FileNotFoundError(f"Plantilla no encontrada: {filename}")
+        missing = self.fields(filename, key) - values.keys()
+        if missing:
+            raise KeyError(f"Faltan campos para {filename}:{key}: {', '.join(sorted(missing))}")
+        return data[key].format(**values)
+
+    def _check(self):
+        if time.monotonic() - self._checked_at < self.check_interval:
+            return
+        with self._lock:
+            if time.monotonic() - self._checked_at >= self.check_interval:
+                self._scan()
+
+    def _scan(self):
+        """Recarga los archivos con mtime distinto y olvida los borrados"""
+        present = set()
+        for path in self.directory.glob("*.json"):
+            present.add(path.name)
+            entry = self._entries.get(path.name)
+            try:
+                mtime = path.stat().st_mtime
+            except OSError:
+                continue
+            if entry is None or entry[0] != mtime:
+                self._load(path)
+        for name in set(self._entries) - present:
+            del self._entries[name]
+        self._checked_at = time.monotonic()
+
+    def _load(self, path: Path):
+        try:
+            mtime = path.stat().st_mtime
+            with open(path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            self._entries.pop(path.name, None)
+            return
+        except Exception as e:
+            # Un JSON a medio guardar no reemplaza la versión anterior
+            print(f"[WARNING] No se pudo cargar la plantilla {path.name}: {e}")
+            return
+        fields = {}
+        if isinstance(data, dict):
+            fields = {key: self._format_fields(value) for key, value in data.items() if isinstance(value, str)}
+        self._entries[path.name] = (mtime, data, fields)
+
+    @staticmethod
+    def _format_fields(text: str) -> frozenset:
+        try:
+            return frozenset(name.split('.')[0].split('[')[0]
+                             for _, name, _, _ in string.Formatter().parse(text) if name)
+        except ValueError:
+            # No es una plantilla de formato (p. ej. llaves sueltas en un texto libre)
+            return frozenset()
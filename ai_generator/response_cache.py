@@ -0,0 +1,110 @@
+"""
+Caché de Respuestas del Modelo
+Guarda en SQLite las respuestas de generate_content por hash de modelo + prompt + parámetros
+"""
+
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+
+class ResponseCache:
+    """
+    Caché persistente direccionada por contenido: la clave es el SHA-256 del nombre del modelo,
+    el prompt ya renderizado y los parámetros de generación. Las entradas vencen a los ttl segundos
+    y, si el total supera max_bytes, se descartan las menos usadas recientemente.
+    """
+
+    def __init__(self, path: str = "cache/llm_responses.sqlite", ttl: float = 30 * 24 * 3600,
+                 max_bytes: int = 100 * 1024 * 1024):
+        self.path = Path(path)
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS responses (
+                key TEXT PRIMARY KEY,
+                response TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                created_at REAL NOT NULL,
+                accessed_at REAL NOT NULL
+            )
+        """)
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_responses_accessed ON responses (accessed_at)")
+        self._conn.commit()
+
+    @staticmethod
+    def make_key(model_name: str, prompt: str, params: Optional[Dict[str, Any]] = None) -> str:
+        """Hash del modelo, el prompt completo y los parámetros de generación"""
+        payload = json.dumps({'model': model_name, 'prompt': prompt, 'params': params or {}},
+                             sort_keys=True, ensure_ascii=False, default=str)
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    def get(self, key: str) -> Optional[str]:
+        """Respuesta cacheada (None si no existe o venció)"""
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute("SELECT response, created_at FROM responses WHERE key = ?", (key,)).fetchone()
+            if row is None or now - row[1] > self.ttl:
+                if row is not None:
+                    self._conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+                    self._conn.commit()
+                self.misses += 1
+                return None
+            self._conn.execute("UPDATE responses SET accessed_at = ? WHERE key = ?", (now, key))
+            self._conn.commit()
+            self.hits += 1
+            return row[0]
+
+    def put(self, key: str, response: str):
+        """Guarda una respuesta y aplica el límite de tamaño"""
+        now = time.time()
+        size = len(response.encode('utf-8'))
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses (key, response, size, created_at, accessed_at) VALUES (?, ?, ?, ?, ?)",
+                (key, response, size, now, now)
+            )
+            self._evict(now)
+            self._conn.commit()
+
+    def _evict(self, now: float):
+        """Borra las vencidas y, si se supera max_bytes, las de acceso más antiguo"""
+        self._conn.execute("DELETE FROM responses WHERE created_at < ?", (now - self.ttl,))
+        total = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        excess = total - self.max_bytes
+        removed = 0
+        stale = []
+        for key, size in self._conn.execute("SELECT key, size FROM responses ORDER BY accessed_at"):
+            stale.append((key,))
+            removed += size
+            if removed >= excess:
+                break
+        self._conn.executemany("DELETE FROM responses WHERE key = ?", stale)
+
+    def clear(self):
+        """Vacía la caché"""
+        with self._lock:
+            self._conn.execute("DELETE FROM responses")
+            self._conn.commit()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Entradas, bytes y aciertos desde el inicio"""
+        with self._lock:
+            entries, size = self._conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses").fetchone()
+        return {'entries': entries, 'bytes': size, 'hits': self.hits, 'misses': self.misses}
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,88 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Benchmark de búsqueda de productos: máscaras str.contains vs índice de trigramas
+Uso: python benchmark_search.py [cantidad_de_skus]
+"""
+import random
+import sys
+import time
+from pathlib import Path
+sys.path.append(str(Path(__file__).parent))
+
+import pandas as pd
+
+from products.search_index import SearchIndex
+
+MARCAS = ['Gamma', 'Toyama', 'Cummins', 'Honda', 'Lüsqtoff', 'Niwa', 'Kushiro', 'Pramac']
+TIPOS = ['Generador', 'Motobomba', 'Hidrolavadora', 'Compresor', 'Motosierra', 'Soldadora']
+DETALLES = ['diésel', 'nafta', 'inverter', 'trifásico', 'monofásico', 'insonorizado', 'con TTA', 'a batería']
+CONSULTAS = ['gen', 'generador diesel', 'toyama', 'GD-12', 'inverter', 'trifasico', 'hidro', 'sku0499', 'zzz']
+
+
+def crear_catalogo(n: int) -> pd.DataFrame:
+    random.seed(7)
+    filas = []
+    for i in range(n):
+        marca = random.choice(MARCAS)
+        tipo = random.choice(TIPOS)
+        filas.append({
+            'SKU': f'SKU{i:06d}',
+            'Descripción': f'{tipo} {marca} {random.randint(1, 300)} kVA {random.choice(DETALLES)} {random.choice(DETALLES)}',
+            'Modelo': f'{tipo[:2].upper()}-{random.randint(100, 99999)}',
+            'Marca': marca,
+        })
+    return pd.DataFrame(filas)
+
+
+def busqueda_con_mascaras(df: pd.DataFrame, query: str) -> pd.DataFrame:
+    """Implementación anterior de ProductManager.search_products"""
+    query_lower = query.lower()
+    mask = (
+        df['SKU'].str.lower().str.contains(query_lower, na=False) |
+        df['Descripción'].str.lower().str.contains(query_lower, na=False) |
+        df['Modelo'].str.lower().str.contains(query_lower, na=False)
+    )
+    return df[mask]
+
+
+def medir(funcion, repeticiones: int = 20) -> float:
+    """Mediana en milisegundos"""
+    tiempos = []
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        funcion()
+        tiempos.append((time.perf_counter() - inicio) * 1000)
+    tiempos.sort()
+    return tiempos[len(tiempos) // 2]
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 50000
+    df = crear_catalogo(n)
+    print(f"Catálogo sintético: {n} SKUs")
+
+    indice = SearchIndex()
+    inicio = time.perf_counter()
+    indice.update(df)
+    print(f"Construcción del índice: {(time.perf_counter() - inicio) * 1000:.0f} ms")
+
+    modificado = df.copy()
+    cambios = modificado.sample(frac=0.01, random_state=1).index
+    modificado.loc[cambios, 'Descripción'] = modificado.loc[cambios, 'Descripción'] + ' renovado'
+    inicio = time.perf_counter()
+    resultado = indice.update(modificado)
+    print(f"Actualización incremental ({resultado['updated']} SKUs): {(time.perf_counter() - inicio) * 1000:.0f} ms")
+
+    print()
+    print(f"{'consulta':<20}{'filas':>8}{'máscaras ms':>14}{'índice ms':>12}{'índice top 20 ms':>19}{'speedup':>10}")
+    for consulta in CONSULTAS:
+        filas = len(indice.search(consulta))
+        t_mascaras = medir(lambda: busqueda_con_mascaras(modificado, consulta), repeticiones=5)
+        t_indice = medir(lambda: modificado.iloc[indice.search(consulta)])
+        t_top = medir(lambda: modificado.iloc[indice.search(consulta, limit=20)])
+        print(f"{consulta:<20}{filas:>8}{t_mascaras:>14.2f}{t_indice:>12.3f}{t_top:>19.3f}{t_mascaras / t_indice:>9.0f}x")
+
+
+if __name__ == '__main__':
+    main()
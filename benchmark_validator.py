@@ -0,0 +1,87 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Benchmark de DataValidator.validate_dataframe sobre un catálogo sintético
+Uso: python benchmark_validator.py [cantidad_de_filas]
+"""
+import logging
+import sys
+import tempfile
+import time
+from pathlib import Path
+sys.path.append(str(Path(__file__).parent))
+
+import numpy as np
+import pandas as pd
+
+from products.data_validator import DataValidator
+
+MARCAS = ['Gamma', 'Toyama', 'Cummins', 'Honda', 'Lüsqtoff', 'Niwa', 'Kushiro', 'Pramac']
+FAMILIAS = ['Generadores', 'Motobombas', 'Hidrolavadoras', 'Compresores']
+
+
+def crear_catalogo(n: int) -> pd.DataFrame:
+    """Catálogo con encabezados repetidos, SKUs duplicados, campos vacíos y números inválidos"""
+    rng = np.random.default_rng(7)
+    df = pd.DataFrame({
+        'SKU': [f'SKU{i:06d}' for i in rng.integers(0, int(n * 0.95), n)],
+        'Descripción': [f'Generador {i} kVA diésel' for i in rng.integers(1, 300, n)],
+        'Marca': rng.choice(MARCAS, n),
+        'Familia': rng.choice(FAMILIAS, n),
+        'Precio_USD_con_IVA': rng.uniform(100, 50000, n).round(2).astype(object),
+        'Stock': rng.choice(['Disponible', 'Consultar', '0', '5', '12'], n),
+        'Potencia_Numerica': rng.uniform(1, 300, n).round(1),
+    })
+    encabezados = rng.choice(n, max(n // 1000, 1), replace=False)
+    df.loc[encabezados, ['SKU', 'Descripción', 'Marca', 'Familia']] = ['SKU', 'Descripción', 'Marca', 'Familia']
+    df.loc[rng.choice(n, n // 200, replace=False), 'Descripción'] = None
+    df.loc[rng.choice(n, n // 200, replace=False), 'Precio_USD_con_IVA'] = 'consultar'
+    return df
+
+
+def medir(funcion, repeticiones: int = 5) -> float:
+    """Mediana en segundos"""
+    tiempos = []
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        funcion()
+        tiempos.append(time.perf_counter() - inicio)
+    tiempos.sort()
+    return tiempos[len(tiempos) // 2]
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    logging.disable(logging.CRITICAL)
+    df = crear_catalogo(n)
+    validator = DataValidator()
+    print(f"Catálogo sintético: {n} filas")
+
+    df_clean, report = validator.validate_dataframe(df)
+    print(f"Filas válidas: {report['stats']['final_rows']} ({report['stats']['removed_rows']} removidas)")
+    for issue in report['issues']:
+        print(f"  {issue['type']:<28}{issue.get('field', ''):<20}{issue['count']:>8}")
+
+    mediana = medir(lambda: validator.validate_dataframe(df))
+    print(f"Sin caché: {mediana * 1000:.0f} ms ({n / mediana:,.0f} filas/s)")
+
+    # Caché por huella de fila: refresco con el 1% de las filas modificadas
+    with tempfile.TemporaryDirectory() as carpeta:
+        cache_path = f"{carpeta}/validation_cache.arrow"
+        DataValidator(cache_path).validate_dataframe(df)
+        modificado = df.copy()
+        cambios = modificado.sample(frac=0.01, random_state=1).index
+        modificado.loc[cambios, 'Descripción'] = modificado.loc[cambios, 'Descripción'] + ' renovado'
+
+        inicio = time.perf_counter()
+        _, report = DataValidator(cache_path).validate_dataframe(modificado)
+        reinicio = time.perf_counter() - inicio
+        print(f"Con caché tras reiniciar ({report['stats']['validated_rows']} filas validadas): "
+              f"{reinicio * 1000:.0f} ms")
+
+        cached = DataValidator(cache_path)
+        mediana = medir(lambda: cached.validate_dataframe(modificado))
+        print(f"Con caché en memoria: {mediana * 1000:.0f} ms ({n / mediana:,.0f} filas/s)")
+
+if __name__ == '__main__':
+    main()
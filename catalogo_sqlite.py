@@ -0,0 +1,161 @@
+# -*- coding: utf-8 -*-
+"""
+Base SQLite en memoria para los tests de products (emula el DictCursor de pymysql, sin necesidad de MySQL)
+"""
+import hashlib
+import re
+import sqlite3
+import sys
+from pathlib import Path
+sys.path.append(str(Path(__file__).parent))
+
+from products.database_handler import DatabaseHandler
+from products import product_manager as modulo_manager
+
+TABLA = 'productos'
+
+
+COLUMNAS = ['SKU', 'Descripción', 'Marca', 'Modelo', 'Familia', 'Precio_USD_con_IVA',
+            'Stock', 'URL_PDF', 'Potencia', 'Combustible', 'Cabina', 'TTA_Incluido', 'Especificaciones']
+
+
+class CursorSQLite:
+    """Cursor que acepta el paramstyle %s de pymysql y devuelve filas como dict"""
+
+    def __init__(self, conexion):
+        self._cursor = conexion.cursor()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    @property
+    def description(self):
+        return self._cursor.description
+
+    @property
+    def rowcount(self):
+        return self._cursor.rowcount
+
+    def execute(self, query, params=None):
+        self._cursor.execute(query.replace('%s', '?'), tuple(params or ()))
+
+    def executemany(self, query, seq_params):
+        self._cursor.executemany(query.replace('%s', '?'), [tuple(p) for p in seq_params])
+
+    def _as_dict(self, row):
+        return {d[0]: v for d, v in zip(self._cursor.description, row)}
+
+    def fetchone(self):
+        row = self._cursor.fetchone()
+        return self._as_dict(row) if row is not None else None
+
+    def fetchall(self):
+        return [self._as_dict(r) for r in self._cursor.fetchall()]
+
+    def close(self):
+        self._cursor.close()
+
+
+class ConexionSQLite:
+    def __init__(self, conexion):
+        self._conexion = conexion
+
+    def cursor(self):
+        return CursorSQLite(self._conexion)
+
+    def commit(self):
+        self._conexion.commit()
+
+    def rollback(self):
+        self._conexion.rollback()
+
+    def ping(self, reconnect=False):
+        pass
+
+    def close(self):
+        pass
+
+
+def _regexp_replace(texto, patron, reemplazo):
+    if texto is None:
+        return None
+    return re.sub(patron, reemplazo, str(texto))
+
+
+def _regexp_substr(texto, patron):
+    if texto is None:
+        return None
+    coincidencia = re.search(patron, str(texto))
+    return coincidencia.group(0) if coincidencia else None
+
+
+def _md5(texto):
+    return hashlib.md5(str(texto).encode('utf-8')).hexdigest()
+
+
+def _concat_ws(separador, *valores):
+    return separador.join(str(v) for v in valores if v is not None)
+
+
+def crear_handler(filas, **config):
+    base = sqlite3.connect(':memory:', check_same_thread=False)
+    base.create_function('REGEXP_REPLACE', 3, _regexp_replace)
+    base.create_function('REGEXP_SUBSTR', 2, _regexp_substr)
+    base.create_function('MD5', 1, _md5)
+    base.create_function('CONCAT_WS', -1, _concat_ws)
+    columnas_sql = ', '.join(f'"{c}"' for c in COLUMNAS)
+    base.execute(f'CREATE TABLE {TABLA} ({columnas_sql})')
+    base.executemany(
+        f'INSERT INTO {TABLA} VALUES ({", ".join("?" * len(COLUMNAS))})',
+        [tuple(f.get(c) for c in COLUMNAS) for f in filas]
+    )
+    base.commit()
+
+    handler = DatabaseHandler({'host': 'sqlite', 'port': 0, 'user': 'test', 'database': 'test',
+                               'table': TABLA, **config})
+    handler.get_connection = lambda: ConexionSQLite(base)
+    handler.pool.factory = handler.get_connection
+    handler.sqlite = base
+    return handler
+
+
+def crear_manager(handler):
+    """ProductManager que usa el handler de prueba en lugar de conectarse a MySQL"""
+    original = modulo_manager.DatabaseHandler
+    modulo_manager.DatabaseHandler = lambda: handler
+    try:
+        return modulo_manager.ProductManager()
+    finally:
+        modulo_manager.DatabaseHandler = original
+
+
+def catalogo(n=25):
+    filas = []
+    for i in range(n):
+        filas.append({
+            'SKU': f'SKU{i:04d}',
+            'Descripción': f'Generador diesel modelo {i}',
+            'Marca': ['Gamma', 'Toyama', 'Cummins'][i % 3],
+            'Modelo': f'GD{i}',
+            'Familia': ['Generadores', 'Motobombas'][i % 2],
+            'Precio_USD_con_IVA': 1000 + i * 100,
+            'Stock': [0, 5, 'Disponible', 'Consultar', 12][i % 5],
+            'URL_PDF': f'ficha_{i}.pdf' if i % 4 else '',
+            'Potencia': f'{i + 1}.5 KVA',
+            'Combustible': ['Diesel', 'Nafta'][i % 2],
+            'Cabina': ['Sin Cabina', 'Insonorizada', None][i % 3],
+            'TTA_Incluido': ['Si', 'No', None][i % 3],
+            'Especificaciones': f'Ficha técnica extensa del modelo {i} ' * 20,
+        })
+    return filas
+
+
+FILAS_BORDE = [
+    {'SKU': 'ZZ001', 'Descripción': 'Motobomba', 'Marca': 'Gamma', 'Familia': 'Motobombas',
+     'Stock': '3 unidades', 'Potencia': '7,5 / 9 kVA', 'Precio_USD_con_IVA': None, 'Combustible': 'Diesel'},
+    {'SKU': 'ZZ002', 'Descripción': 'Generador inverter', 'Marca': 'Toyama', 'Familia': 'Generadores',
+     'Stock': None, 'Potencia': None, 'Precio_USD_con_IVA': '950', 'TTA_Incluido': 'Sí'},
+]
@@ -19,7 +19,7 @@ sys.stderr = io.TextIOWrapper(sys.stderr.buffer, encoding='utf-8')
 # Agregar módulos al path
 sys.path.append(str(Path(__file__).parent))
 
-from flask import Flask, render_template, jsonify, request, send_file
+from flask import Flask, render_template, jsonify, request, send_file, Response, stream_with_context
 from flask_cors import CORS
 import logging
 import pandas as pd
@@ -30,8 +30,10 @@ from tkinter import filedialog
 from products.product_manager import ProductManager
 from products.database_handler import DatabaseHandler
 from products.product_filters import FilterCriteria
+from products import streaming
 from navigation.selenium_handler import SeleniumHandler
 from ai_generator.ai_handler import AIHandler
+from ai_generator.batch_engine import BatchEngine, BatchPrefetcher, RateLimiter
 from ai_generator.prompt_manager import PromptManager
 from ai_generator.editor_interface import EditorInterface
 from ai_generator.prompt_assistant import PromptAssistant
@@ -70,7 +72,13 @@ CORS(app)
 # Instancias globales de los módulos
 product_manager = ProductManager()
 selenium_handler = SeleniumHandler()
-ai_handler = AIHandler()
+# Cuota de Gemini y motor de lotes (config/ai_config.json)
+ai_config = BatchEngine.load_config()
+ai_handler = AIHandler(rate_limiter=RateLimiter(
+    requests_per_minute=ai_config.get('requests_per_minute', 15),
+    tokens_per_minute=ai_config.get('tokens_per_minute', 1_000_000)
+))
+batch_engine = BatchEngine.from_config(ai_config)
 prompt_manager = PromptManager()
 editor_interface = EditorInterface(prompt_manager, ai_handler)
 
@@ -100,7 +108,8 @@ def health():
             'products': app_state['db_connected'],
             'navigation': app_state['browser_running'],
             'ai_generator': app_state['ai_configured']
-        }
+        },
+        'db_pool': product_manager.db_handler.get_pool_stats()
     })
 
 # ============================================================================
@@ -200,24 +209,45 @@ def get_products():
 
         data = request.get_json() or {}
         filters = data.get('filters', {})
-        logger.info(f"API /products: Filtros recibidos del frontend: {filters}")
+        # Paginación por cursor: sin page_size se devuelve el listado completo
+        cursor = data.get('cursor') or None
+        page_size = data.get('page_size')
+        page_size = int(page_size) if page_size else None
+        logger.info(f"API /products: Filtros recibidos del frontend: {filters} (cursor={cursor!r}, page_size={page_size})")
 
         clean_filters = {k: v for k, v in filters.items() if v is not None and v != ''}
         
         criteria = FilterCriteria(**clean_filters)
         logger.info(f"API /products: FilterCriteria creado: {criteria.__dict__}")
-        df = product_manager.apply_filter(criteria)
+        df = product_manager.apply_filter(criteria, cursor=cursor, page_size=page_size)
         
         logger.info(f"API /products: Productos devueltos después de filtro/refresh: {len(df)} registros")
         
-        products = df.to_dict('records')
-        
-        return jsonify({
+        # Proyección de columnas: la tabla solo recibe lo que muestra
+        df = streaming.project_columns(df, data.get('columns'))
+        next_cursor = product_manager.next_cursor
+        header = {
             'success': True,
-            'products': products,
-            'total_count': len(products),
+            'total_count': len(df),
+            'next_cursor': next_cursor,
+            'has_more': next_cursor is not None,
             'filters_applied': clean_filters
-        })
+        }
+        
+        # Respuesta generada por lotes: JSON (mismo formato de siempre) o NDJSON
+        ndjson = data.get('format') == 'ndjson' or 'application/x-ndjson' in request.headers.get('Accept', '')
+        if ndjson:
+            chunks = streaming.iter_ndjson(df, header)
+            mimetype = 'application/x-ndjson'
+        else:
+            chunks = streaming.iter_json(df, header)
+            mimetype = 'application/json'
+        encoding = streaming.negotiate_encoding(request.accept_encodings)
+        response = Response(stream_with_context(streaming.encode_stream(chunks, encoding)), mimetype=mimetype)
+        response.headers['Vary'] = 'Accept-Encoding'
+        if encoding:
+            response.headers['Content-Encoding'] = encoding
+        return response
         
     except Exception as e:
         logger.error(f"Error obteniendo productos: {e}")
@@ -239,52 +269,84 @@ def get_filter_options():
             'preset_filters': []
         })
 
+@app.route('/api/products/facets', methods=['POST'])
+def get_product_facets():
+    """Conteos por faceta para el sidebar de filtros"""
+    try:
+        data = request.get_json() or {}
+        filters = data.get('filters', {})
+        clean_filters = {k: v for k, v in filters.items() if v is not None and v != ''}
+        facets = product_manager.get_facets(FilterCriteria(**clean_filters))
+        return jsonify({'success': True, 'facets': facets})
+    except Exception as e:
+        logger.error(f"Error obteniendo facetas: {e}")
+        return jsonify({'success': False, 'error': str(e)})
+
 @app.route('/api/products/search', methods=['POST'])
 def search_products():
     """Búsqueda rápida de productos"""
     try:
         data = request.get_json() or {}
         query = data.get('query', '')
-        df = product_manager.search_products(query)
+        limit = data.get('limit')
+        df = product_manager.search_products(query, limit=int(limit) if limit else None)
         
         return jsonify({
             'success': True,
-            'products': df.to_dict('records')
+            'products': streaming.to_records(df)
         })
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)})
 
+@app.route('/api/products/product/<sku>')
+def get_product_details(sku):
+    """Detalle de un producto (búsqueda por índice de SKU; la fila completa se lee de la BD)"""
+    try:
+        product = product_manager.get_product_details(sku)
+        if product is None:
+            return jsonify({'success': False, 'error': f'Producto {sku} no encontrado'}), 404
+        return jsonify(product)
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)})
+
 @app.route('/api/products/statistics')
 def get_statistics():
     """Obtener estadísticas"""
     try:
-        stats = product_manager.get_statistics()
+        # ?refresh=1 ignora la caché de estadísticas de la BD
+        force_refresh = request.args.get('refresh', '').lower() in ('1', 'true')
+        # ?memory=1 agrega el uso de memoria de la caché (se calcula solo cuando se pide)
+        include_memory = request.args.get('memory', '').lower() in ('1', 'true')
+        stats = product_manager.get_statistics(force_refresh=force_refresh, include_memory=include_memory)
         return jsonify(stats)
     except Exception as e:
         return jsonify({})
 
 @app.route('/api/products/export-selection', methods=['POST'])
 def export_selection():
-    """Exportar productos seleccionados"""
+    """Encola la exportación de los productos seleccionados (se consulta con /export-status/<job_id>)"""
     try:
         data = request.get_json() or {}
         format_type = data.get('format', 'excel')
-        filepath = product_manager.export_selected_products(format_type)
+        # La selección vive en el frontend: se aplica antes de exportar
+        if data.get('products'):
+            product_manager.set_selection(data['products'])
+        job = product_manager.start_export(format_type)
         
-        if filepath:
-            filename = os.path.basename(filepath)
-            return jsonify({
-                'success': True,
-                'filename': filename
-            })
-        else:
-            return jsonify({
-                'success': False,
-                'error': 'No se pudo exportar'
-            })
+        if job['status'] == 'error':
+            return jsonify({'success': False, 'error': job.get('error') or 'No se pudo exportar'})
+        return jsonify({'success': True, **job})
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)})
 
+@app.route('/api/products/export-status/<job_id>')
+def export_status(job_id):
+    """Avance de una exportación en segundo plano"""
+    job = product_manager.get_export_job(job_id)
+    if job is None:
+        return jsonify({'success': False, 'error': 'Exportación no encontrada'}), 404
+    return jsonify({'success': job['status'] != 'error', **job})
+
 @app.route('/api/products/download-export/<filename>')
 def download_export(filename):
     """Descargar archivo exportado"""
@@ -294,6 +356,24 @@ def download_export(filename):
     else:
         return "Archivo no encontrado", 404
 
+@app.route('/api/products/sync-catalog', methods=['POST'])
+def sync_catalog():
+    """Sincroniza la réplica local del catálogo con MySQL (solo filas modificadas)"""
+    try:
+        result = product_manager.sync_catalog()
+        return jsonify({'success': result.get('status') in ('ok', 'disabled'), 'result': result})
+    except Exception as e:
+        logger.error(f"Error sincronizando réplica local: {e}")
+        return jsonify({'success': False, 'error': str(e)})
+
+@app.route('/api/products/pool-stats')
+def get_pool_stats():
+    """Métricas del pool de conexiones compartido por las rutas de productos"""
+    try:
+        return jsonify(product_manager.db_handler.get_pool_stats())
+    except Exception as e:
+        return jsonify({'error': str(e)})
+
 @app.route('/api/debug/filter-test', methods=['POST'])
 def debug_filter():
     """Debug de filtros"""
@@ -354,12 +434,19 @@ def process_products():
         
         if not products:
             return jsonify({'success': False, 'error': 'No hay productos para procesar.'})
+        products = load_generation_products(products)
+        if not products:
+            return jsonify({'success': False, 'error': 'No se encontraron los productos en la base de datos.'})
         
+        extraction = build_extraction_prefetcher(products)
+
         def generate_descriptions_for_upload(product):
             product_info = product.get('row_data', {})
             descripcion_detallada = ai_handler.generate_description(
                 product_info=product_info,
-                config=get_contact_config()
+                config=get_contact_config(),
+                raise_errors=True,
+                prefetched=extraction.get(product_info) if extraction else None
             )
             descripcion_corta = generate_short_description(product_info)
             return {
@@ -369,7 +456,7 @@ def process_products():
                 'seo_descripcion': descripcion_corta[:160]
             }
 
-        selenium_handler.process_products(products, generate_descriptions_for_upload)
+        selenium_handler.process_products(products, generate_descriptions_for_upload, batch_engine=batch_engine)
         app_state['processing'] = True
         return jsonify({'success': True})
         
@@ -701,21 +788,34 @@ def process_batch_locally():
             return jsonify({'success': False, 'error': 'No hay productos para procesar.'})
         if not save_path:
             return jsonify({'success': False, 'error': 'No se proporcionó una ruta de guardado.'})
+        products = load_generation_products(products)
+        if not products:
+            return jsonify({'success': False, 'error': 'No se encontraron los productos en la base de datos.'})
+
+        extraction = build_extraction_prefetcher(products)
+
+        def generate_and_save(product):
+            product_info = product.get('row_data', {})
+            html_content = ai_handler.generate_description(
+                product_info=product_info,
+                config=get_contact_config(),
+                raise_errors=True,
+                prefetched=extraction.get(product_info) if extraction else None
+            )
+            if html_content:
+                save_html_locally(html_content, product_info, save_path)
+                return True
+            return False
 
         def processing_thread():
             count = 0
-            for product in products:
-                try:
-                    product_info = product.get('row_data', {})
-                    html_content = ai_handler.generate_description(
-                        product_info=product_info,
-                        config=get_contact_config()
-                    )
-                    if html_content:
-                        save_html_locally(html_content, product_info, save_path)
-                        count += 1
-                except Exception as e:
-                    logger.error(f"Error generando/guardando para {product.get('nombre')}: {e}")
+            # Generación en paralelo con la cuota de Gemini y reintentos por producto
+            for result in batch_engine.run(products, generate_and_save):
+                if result.success:
+                    count += int(bool(result.value))
+                else:
+                    logger.error(f"Error generando/guardando para {result.item.get('nombre')} "
+                                 f"({result.attempts} intentos): {result.error}")
             logger.info(f"Proceso de guardado local finalizado. Se guardaron {count} archivos.")
 
         threading.Thread(target=processing_thread, daemon=True).start()
@@ -755,6 +855,22 @@ def handle_navigation_error(error_data):
     """Callback para errores de navegación"""
     logger.error(f"Error en navegación: {error_data}")
 
+def load_generation_products(products):
+    """
+    Relee por SKU las filas con el perfil 'generation' (Tensión, Motor, Peso, ...): el row_data que envía
+    el frontend trae solo las columnas del listado y no se usa para generar.
+    """
+    skus = [product.get('sku') or (product.get('row_data') or {}).get('SKU') for product in products]
+    return product_manager.prepare_skus_for_processing([sku for sku in skus if sku])
+
+def build_extraction_prefetcher(products):
+    """Extracción por lotes de extract_batch_size productos por llamada, compartida por los hilos del lote"""
+    size = ai_config.get('extract_batch_size', 5)
+    if size <= 1:
+        return None
+    return BatchPrefetcher([product.get('row_data', {}) for product in products], ai_handler.extract_batch,
+                           key=AIHandler.product_key, size=size)
+
 def save_html_locally(html_content, product_info, base_path):
     """Guarda el contenido HTML en una carpeta local basada en la familia del producto."""
     try:
@@ -895,6 +1011,7 @@ def create_directories():
         'selections',
         'config',
         'browser_profiles',
+        'cache',
         'modules/ai_generator/versions',
         'modules/ai_generator/templates'
     ]
@@ -0,0 +1,43 @@
+# -*- coding: utf-8 -*-
+"""
+Modelo falso y producto de ejemplo para los tests de AIHandler (sin llamar a la API de Gemini)
+"""
+import json
+import sys
+from pathlib import Path
+sys.path.append(str(Path(__file__).parent))
+
+from ai_generator.ai_handler import AIHandler
+from ai_generator.response_cache import ResponseCache
+
+PRODUCTO = {
+    'Descripción': 'GENERADOR GAMMA 3300W',
+    'Marca': 'Gamma',
+    'Modelo': 'GE-3300',
+    'Familia': 'Generadores',
+    'Potencia': '3.3 KVA',
+}
+
+
+class Respuesta:
+    def __init__(self, text):
+        self.text = text
+
+
+class ModeloFalso:
+    """Cuenta las llamadas y responde JSON según la etapa del prompt"""
+
+    def __init__(self):
+        self.llamadas = []
+
+    def generate_content(self, prompt):
+        self.llamadas.append(prompt)
+        if len(self.llamadas) % 2 == 1:
+            return Respuesta(json.dumps({'categoria_producto': 'default', 'potencia_kva': '3.3'}))
+        return Respuesta(json.dumps({'titulo': 'Generador Gamma', 'descripcion': 'Energía confiable'}))
+
+
+def crear_handler(carpeta):
+    handler = AIHandler(response_cache=ResponseCache(str(carpeta / 'respuestas.sqlite')))
+    handler.model = ModeloFalso()
+    return handler
@@ -77,9 +77,23 @@ class SeleniumHandler:
         return result
     
     def process_products(self, products: List[Dict[str, Any]], 
-                        generation_callback: Callable) -> None:
-        """Procesa una lista de productos"""
+                        generation_callback: Callable, batch_engine=None) -> None:
+        """
+        Procesa una lista de productos. Con batch_engine (ai_generator.batch_engine.BatchEngine),
+        las descripciones se generan en paralelo por adelantado y la carga en Stel sigue siendo
+        secuencial y en el orden de la lista.
+        """
         
+        def _generated():
+            """(producto, descripciones o excepción) en el orden de la lista"""
+            if batch_engine is None:
+                for product in products:
+                    yield product, None
+                return
+            for result in batch_engine.imap(products, generation_callback,
+                                            should_stop=lambda: not self.is_processing):
+                yield result.item, result
+
         def _process():
             self.is_processing = True
             self.stats["start_time"] = time.time()
@@ -88,7 +102,7 @@ class SeleniumHandler:
             
             self._log(f"Iniciando procesamiento de {len(products)} productos")
             
-            for i, product in enumerate(products):
+            for i, (product, generated) in enumerate(_generated()):
                 # Verificar pausa
                 while self.is_paused and self.is_processing:
                     time.sleep(0.5)
@@ -101,8 +115,13 @@ class SeleniumHandler:
                 
                 try:
                     # Generar descripciones usando el callback
-                    self._log(f"Generando descripciones para {product['sku']}")
-                    descriptions = generation_callback(product)
+                    if generated is None:
+                        self._log(f"Generando descripciones para {product['sku']}")
+                        descriptions = generation_callback(product)
+                    elif generated.success:
+                        descriptions = generated.value
+                    else:
+                        raise RuntimeError(f"Generación fallida tras {generated.attempts} intentos: {generated.error}")
                     
                     # Preparar campos para actualizar
                     fields = {
@@ -0,0 +1,116 @@
+"""
+Etapa de Ingesta del Catálogo
+Convierte una sola vez Potencia, Stock y Precio a columnas tipadas (vectorizado con str.extract)
+"""
+
+import re
+
+import numpy as np
+import pandas as pd
+
+# Estados de stock: los textos de la BD y los derivados de un stock numérico
+STOCK_DISPONIBLE = 'Disponible'
+STOCK_CONSULTAR = 'Consultar'
+STOCK_CON_STOCK = 'Con stock'
+STOCK_SIN_STOCK = 'Sin stock'
+STOCK_STATES = [STOCK_DISPONIBLE, STOCK_CONSULTAR, STOCK_CON_STOCK, STOCK_SIN_STOCK]
+
+POWER_UNITS = {'kva': 'kVA', 'kw': 'kW', 'hp': 'HP', 'cv': 'HP'}
+
+PARSED_COLUMNS = ['Potencia_Numerica', 'Potencia_Unidad', 'Stock_Numerico', 'Stock_Estado', 'Precio_Numerico']
+
+# Primer número de la potencia y su unidad (si viene pegada: "5,5 KVA", "20kW")
+_POWER_PATTERN = r'(?P<valor>\d+(?:[.,]\d+)?)\s*(?P<unidad>kva|kw|hp|cv)?'
+_UNIT_PATTERN = r'(kva|kw|hp|cv)'
+# Prefijos numéricos con la semántica de CAST(... AS SIGNED) / CAST(... AS DECIMAL) de MySQL
+_SIGNED_PATTERN = r'^\s*([+-]?\d+)'
+_DECIMAL_PATTERN = r'^\s*([+-]?(?:\d+\.?\d*|\.\d+))'
+
+
+def parse_catalog_columns(df: pd.DataFrame) -> pd.DataFrame:
+    """Retorna las columnas parseadas (PARSED_COLUMNS) alineadas con el índice de df"""
+    parsed = pd.DataFrame(index=df.index)
+    empty_text = pd.Series(None, index=df.index, dtype=object)
+
+    potencia = df['Potencia'] if 'Potencia' in df.columns else empty_text
+    parsed['Potencia_Numerica'], parsed['Potencia_Unidad'] = parse_power(potencia)
+
+    stock = df['Stock'] if 'Stock' in df.columns else empty_text
+    parsed['Stock_Numerico'], parsed['Stock_Estado'] = parse_stock(stock)
+
+    precio = df['Precio_USD_con_IVA'] if 'Precio_USD_con_IVA' in df.columns else empty_text
+    parsed['Precio_Numerico'] = sql_decimal(precio)
+    return parsed
+
+
+def add_parsed_columns(df: pd.DataFrame) -> pd.DataFrame:
+    """Agrega (o reemplaza) las columnas parseadas en df"""
+    if df.empty:
+        return df
+    parsed = parse_catalog_columns(df)
+    for col in PARSED_COLUMNS:
+        df[col] = parsed[col]
+    return df
+
+
+def parse_power(series: pd.Series):
+    """Potencia -> (valor del primer número, unidad kVA/kW/HP)"""
+    text = _as_text(series)
+    extracted = text.str.extract(_POWER_PATTERN, flags=re.IGNORECASE)
+    value = pd.to_numeric(extracted['valor'].str.replace(',', '.', regex=False), errors='coerce')
+
+    unit = extracted['unidad']
+    # La unidad puede no estar pegada al primer número ("5.5 / 6 KVA")
+    missing_unit = unit.isna() & text.notna()
+    if missing_unit.any():
+        unit = unit.where(~missing_unit, text[missing_unit].str.extract(_UNIT_PATTERN, flags=re.IGNORECASE, expand=False))
+    unit = unit.str.lower().map(POWER_UNITS)
+    return value.astype(float), pd.Categorical(unit, categories=sorted(set(POWER_UNITS.values())))
+
+
+def parse_stock(series: pd.Series):
+    """Stock -> (CAST(Stock AS SIGNED), estado Disponible/Consultar/Con stock/Sin stock)"""
+    numeric = sql_signed(series)
+    text = _as_text(series).str.strip().str.casefold()
+
+    state = pd.Series(None, index=series.index, dtype=object)
+    state[numeric > 0] = STOCK_CON_STOCK
+    state[numeric <= 0] = STOCK_SIN_STOCK
+    state[(text == STOCK_DISPONIBLE.casefold()).to_numpy(dtype=bool)] = STOCK_DISPONIBLE
+    state[(text == STOCK_CONSULTAR.casefold()).to_numpy(dtype=bool)] = STOCK_CONSULTAR
+    return numeric, pd.Categorical(state, categories=STOCK_STATES)
+
+
+def sql_signed(series: pd.Series) -> np.ndarray:
+    """Equivalente a CAST(x AS SIGNED): entero inicial del texto, 0 si no hay, NaN para NULL"""
+    # '2.5' -> 2: la parte decimal se descarta como en MySQL
+    return np.trunc(_sql_numeric(series, _SIGNED_PATTERN))
+
+
+def sql_decimal(series: pd.Series) -> np.ndarray:
+    """Equivalente a CAST(x AS DECIMAL): número inicial del texto, 0 si no hay, NaN para NULL"""
+    return _sql_numeric(series, _DECIMAL_PATTERN)
+
+
+def _sql_numeric(series: pd.Series, pattern: str) -> np.ndarray:
+    if pd.api.types.is_numeric_dtype(series.dtype) and not pd.api.types.is_bool_dtype(series.dtype):
+        return np.array(series.to_numpy(dtype=float, na_value=np.nan))
+    values = series.astype(object)
+    is_null = values.isna().to_numpy()
+    result = np.array(pd.to_numeric(values, errors='coerce').to_numpy(dtype=float, na_value=np.nan))
+    # Los textos no numéricos se convierten por prefijo, como hace MySQL
+    pending = np.isnan(result) & ~is_null
+    if pending.any():
+        prefix = values[pending].astype(str).str.extract(pattern, expand=False)
+        result[pending] = pd.to_numeric(prefix, errors='coerce').fillna(0).to_numpy(dtype=float)
+    result[is_null] = np.nan
+    return result
+
+
+def _as_text(series: pd.Series) -> pd.Series:
+    """Texto de cada valor (NULL se mantiene); los números no llevan '.0' si son enteros"""
+    def _to_text(value):
+        if isinstance(value, float) and value.is_integer():
+            return str(int(value))
+        return str(value)
+    return series.astype(object).map(_to_text, na_action='ignore').astype(object)
@@ -0,0 +1,210 @@
+"""
+Réplica Local del Catálogo
+Copia columnar (Arrow IPC) de la tabla de productos con sincronización incremental.
+Guarda los valores crudos de MySQL más las columnas parseadas en la ingesta;
+la validación se aplica al construir el catálogo.
+"""
+
+import json
+import logging
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.ipc as ipc
+
+from .catalog_ingest import add_parsed_columns
+
+
+class CatalogMirror:
+    """Réplica en disco del catálogo, sincronizada por checksum de fila"""
+
+    SCHEMA_VERSION = 3
+    HASH_COLUMN = '_row_hash'
+
+    def __init__(self, base_path: str = "cache", table_name: str = "", profile: Optional[str] = 'list'):
+        """profile: perfil de columnas de DatabaseHandler que se replica (None = todas)"""
+        self.base_path = Path(base_path)
+        self.meta_file = self.base_path / "catalog_mirror.json"
+        self.table_name = table_name
+        self.profile = profile
+        self.frame = pd.DataFrame()
+        self.meta: Dict[str, Any] = {}
+        # Incrementa cada vez que cambia el contenido de la réplica
+        self.version = 0
+        self._source = None
+        self.logger = logging.getLogger(__name__)
+
+    def load(self) -> bool:
+        """Carga la réplica desde disco con memory-map (sin consultar MySQL)"""
+        if not self.meta_file.exists():
+            return False
+        try:
+            with open(self.meta_file, 'r', encoding='utf-8') as f:
+                meta = json.load(f)
+            if meta.get('schema_version') != self.SCHEMA_VERSION or meta.get('table') != self.table_name:
+                self.logger.info("CatalogMirror: réplica de otra versión o tabla, se descarta")
+                return False
+
+            data_file = self.base_path / meta['data_file']
+            source = pa.memory_map(str(data_file), 'r')
+            table = ipc.open_file(source).read_all()
+            self.frame = table.to_pandas()
+            # El memory-map queda abierto mientras el frame pueda referenciar sus buffers
+            self._source = source
+            self.meta = meta
+            self.version += 1
+            self.logger.info(f"CatalogMirror: {len(self.frame)} filas cargadas desde {data_file.name}")
+            return True
+        except Exception as e:
+            self.logger.error(f"CatalogMirror: Error cargando réplica local: {e}")
+            return False
+
+    def needs_sync(self, interval: float) -> bool:
+        """Indica si pasó el intervalo mínimo desde la última sincronización"""
+        last_sync = self.meta.get('last_sync_ts', 0)
+        return self.frame.empty or time.time() - last_sync >= interval
+
+    def sync(self, db_handler) -> Dict[str, Any]:
+        """
+        Sincroniza la réplica con MySQL trayendo solo las filas nuevas o modificadas.
+        Si la BD no responde se conserva la réplica existente.
+        """
+        result = {'status': 'ok', 'changed': 0, 'deleted': 0, 'total': len(self.frame)}
+        start = time.monotonic()
+
+        remote = db_handler.get_row_checksums(self.profile)
+        if remote is None:
+            result['status'] = 'offline'
+            self.logger.warning("CatalogMirror: BD no disponible, se usa la réplica local existente")
+            return result
+
+        # Si cambió el perfil de columnas, la réplica se vuelve a leer completa
+        columns = db_handler.get_profile_columns(self.profile)
+        if not self.frame.empty and self.meta.get('columns') != columns:
+            self.logger.info("CatalogMirror: cambiaron las columnas replicadas, se hace una lectura completa")
+            self.frame = pd.DataFrame()
+        self.meta['columns'] = columns
+
+        remote = remote.drop_duplicates(subset=['SKU'], keep='first')
+        remote_hash = pd.Series(remote['row_hash'].astype(str).values, index=remote['SKU'].astype(str).values)
+
+        if self.frame.empty:
+            # Primera sincronización: lectura completa paginada
+            fetched = db_handler.get_all_products(validate=False, profile=self.profile)
+            if not fetched.empty:
+                fetched = fetched.drop_duplicates(subset=['SKU'], keep='first')
+            replaced = set(remote_hash.index)
+            deleted = set()
+        else:
+            local_hash = pd.Series(self.frame[self.HASH_COLUMN].values, index=self.frame['SKU'].astype(str).values)
+            aligned = local_hash.reindex(remote_hash.index)
+            changed = remote_hash.index[aligned.isna().values | (aligned.values != remote_hash.values)]
+            deleted = set(local_hash.index.difference(remote_hash.index))
+
+            fetched = pd.DataFrame()
+            replaced = set()
+            if len(changed):
+                fetched = db_handler.get_products_by_ids(list(changed), profile=self.profile, use_cache=False)
+                if not fetched.empty:
+                    # Solo se reemplazan los SKUs efectivamente leídos; el resto se reintenta luego
+                    fetched = fetched.drop_duplicates(subset=['SKU'], keep='first')
+                    replaced = set(fetched['SKU'].astype(str))
+
+        if self.frame.empty and fetched.empty:
+            result['status'] = 'empty'
+            return result
+
+        if not replaced and not deleted:
+            self._write_meta(remote_hash)
+            result['elapsed_ms'] = round((time.monotonic() - start) * 1000, 1)
+            return result
+
+        if not fetched.empty:
+            # Ingesta: Potencia, Stock y Precio se parsean una sola vez por fila modificada
+            fetched = add_parsed_columns(fetched.copy())
+            fetched[self.HASH_COLUMN] = fetched['SKU'].astype(str).map(remote_hash)
+
+        keep = self.frame
+        if not keep.empty:
+            keep = keep[~keep['SKU'].astype(str).isin(replaced | deleted)]
+        frames = [f for f in (keep, fetched) if not f.empty]
+        new_frame = pd.concat(frames, ignore_index=True) if frames else pd.DataFrame()
+        if not new_frame.empty:
+            new_frame = new_frame.sort_values('SKU', kind='stable').reset_index(drop=True)
+
+        self._write(new_frame, remote_hash)
+        self.frame = new_frame
+        self.version += 1
+
+        result.update({
+            'changed': len(replaced),
+            'deleted': len(deleted),
+            'total': len(new_frame),
+            'elapsed_ms': round((time.monotonic() - start) * 1000, 1)
+        })
+        self.logger.info(f"CatalogMirror: sincronización completada {result}")
+        return result
+
+    def _write(self, df: pd.DataFrame, remote_hash: pd.Series):
+        """Escribe una nueva versión del archivo Arrow y luego actualiza el índice"""
+        self.base_path.mkdir(parents=True, exist_ok=True)
+        data_name = f"catalog_mirror_{datetime.now().strftime('%Y%m%d_%H%M%S_%f')}.arrow"
+        table = self._to_arrow_table(df)
+        with pa.OSFile(str(self.base_path / data_name), 'wb') as sink:
+            with ipc.new_file(sink, table.schema) as writer:
+                writer.write_table(table)
+
+        previous = self.meta.get('data_file')
+        self.meta['data_file'] = data_name
+        self._write_meta(remote_hash)
+
+        # Los archivos viejos pueden seguir mapeados (en Windows no se pueden borrar todavía)
+        for old_file in self.base_path.glob("catalog_mirror_*.arrow"):
+            if old_file.name in (data_name, previous):
+                continue
+            try:
+                old_file.unlink()
+            except OSError:
+                pass
+
+    def _write_meta(self, remote_hash: pd.Series):
+        self.meta.update({
+            'schema_version': self.SCHEMA_VERSION,
+            'table': self.table_name,
+            'rows': len(remote_hash),
+            'last_sync': datetime.now().isoformat(),
+            'last_sync_ts': time.time()
+        })
+        if 'data_file' not in self.meta:
+            return
+        self.base_path.mkdir(parents=True, exist_ok=True)
+        tmp_file = self.meta_file.with_suffix('.tmp')
+        with open(tmp_file, 'w', encoding='utf-8') as f:
+            json.dump(self.meta, f, indent=2)
+        tmp_file.replace(self.meta_file)
+
+    @staticmethod
+    def _to_arrow_table(df: pd.DataFrame) -> pa.Table:
+        """Convierte a Arrow; las columnas con tipos mezclados (p. ej. Stock 5 / 'Consultar') se guardan como texto"""
+        df = df.copy()
+        for col in df.columns:
+            if df[col].dtype != object:
+                continue
+            try:
+                pa.array(df[col], from_pandas=True)
+            except (pa.ArrowInvalid, pa.ArrowTypeError):
+                df[col] = df[col].map(lambda v: None if pd.isna(v) else str(v))
+        return pa.Table.from_pandas(df, preserve_index=False)
+
+    def get_info(self) -> Dict[str, Any]:
+        """Estado de la réplica para diagnósticos"""
+        return {
+            'rows': len(self.frame),
+            'version': self.version,
+            'last_sync': self.meta.get('last_sync'),
+            'data_file': self.meta.get('data_file')
+        }
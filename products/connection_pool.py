@@ -0,0 +1,227 @@
+"""
+Pool de Conexiones a la Base de Datos
+Reutiliza conexiones pymysql / Cloud SQL entre consultas
+"""
+
+import threading
+import time
+import logging
+from collections import deque
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator
+
+
+class _PooledConnection:
+    """Conexión física administrada por el pool"""
+
+    __slots__ = ('raw', 'created_at', 'last_used')
+
+    def __init__(self, raw: Any):
+        now = time.monotonic()
+        self.raw = raw
+        self.created_at = now
+        self.last_used = now
+
+
+class ConnectionPool:
+    """Pool acotado de conexiones con health check, reciclado y métricas"""
+
+    def __init__(self, factory: Callable[[], Any], size: int = 5, timeout: float = 30.0,
+                 recycle: float = 300.0, max_lifetime: float = 1800.0, pre_ping: bool = True):
+        """
+        factory: función que abre una conexión nueva
+        size: máximo de conexiones abiertas simultáneamente
+        timeout: segundos máximos de espera para obtener una conexión
+        recycle: segundos de inactividad tras los cuales se descarta una conexión
+        max_lifetime: edad máxima de una conexión antes de reemplazarla
+        pre_ping: verificar la conexión con ping() al entregarla
+        """
+        self.factory = factory
+        self.size = max(1, int(size))
+        self.timeout = float(timeout)
+        self.recycle = float(recycle)
+        self.max_lifetime = float(max_lifetime)
+        self.pre_ping = pre_ping
+        self.logger = logging.getLogger(__name__)
+
+        self._idle = deque()
+        self._open_count = 0
+        self._in_use = 0
+        self._closed = False
+        self._cond = threading.Condition(threading.Lock())
+
+        self._metrics = {
+            'checkouts': 0,
+            'checkout_timeouts': 0,
+            'connections_created': 0,
+            'connections_closed': 0,
+            'recycled_idle': 0,
+            'expired_lifetime': 0,
+            'failed_pings': 0,
+            'discarded_broken': 0,
+            'waits': 0,
+            'total_wait_seconds': 0.0,
+            'max_wait_seconds': 0.0,
+            'total_checkout_seconds': 0.0,
+            'max_checkout_seconds': 0.0
+        }
+
+    @contextmanager
+    def connection(self) -> Iterator[Any]:
+        """Entrega una conexión del pool y la devuelve al salir del bloque"""
+        pooled = self._checkout()
+        checkout_start = time.monotonic()
+        try:
+            yield pooled.raw
+        finally:
+            broken = not self._reset(pooled)
+            self._checkin(pooled, broken, time.monotonic() - checkout_start)
+
+    def _checkout(self) -> _PooledConnection:
+        """Obtiene una conexión sana, esperando si el pool está lleno"""
+        wait_start = time.monotonic()
+        deadline = wait_start + self.timeout
+        waited = False
+
+        while True:
+            create_new = False
+            with self._cond:
+                if self._closed:
+                    raise ConnectionError("El pool de conexiones está cerrado.")
+
+                while not self._idle and self._open_count >= self.size:
+                    waited = True
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        self._metrics['checkout_timeouts'] += 1
+                        raise ConnectionError(
+                            f"Tiempo de espera agotado ({self.timeout:.1f}s) obteniendo conexión del pool "
+                            f"({self._in_use}/{self.size} en uso)."
+                        )
+                    self._cond.wait(remaining)
+
+                if self._idle:
+                    pooled = self._idle.pop()
+                else:
+                    pooled = None
+                    create_new = True
+                # Reservar el lugar antes de abrir la conexión fuera del lock
+                self._in_use += 1
+                if create_new:
+                    self._open_count += 1
+
+            if create_new:
+                try:
+                    pooled = _PooledConnection(self.factory())
+                except Exception:
+                    with self._cond:
+                        self._in_use -= 1
+                        self._open_count -= 1
+                        self._cond.notify()
+                    raise
+                with self._cond:
+                    self._metrics['connections_created'] += 1
+            elif not self._is_usable(pooled):
+                self._discard(pooled)
+                continue
+
+            self._record_checkout(time.monotonic() - wait_start, waited)
+            return pooled
+
+    def _is_usable(self, pooled: _PooledConnection) -> bool:
+        """Aplica reciclado por inactividad, vida máxima y ping"""
+        now = time.monotonic()
+        if self.max_lifetime > 0 and now - pooled.created_at > self.max_lifetime:
+            with self._cond:
+                self._metrics['expired_lifetime'] += 1
+            return False
+        if self.recycle > 0 and now - pooled.last_used > self.recycle:
+            with self._cond:
+                self._metrics['recycled_idle'] += 1
+            return False
+        if self.pre_ping:
+            try:
+                pooled.raw.ping(reconnect=False)
+            except Exception as e:
+                self.logger.warning(f"ConnectionPool: ping fallido, descartando conexión: {e}")
+                with self._cond:
+                    self._metrics['failed_pings'] += 1
+                return False
+        return True
+
+    def _reset(self, pooled: _PooledConnection) -> bool:
+        """Cierra la transacción abierta para que la próxima lectura no vea un snapshot viejo"""
+        try:
+            pooled.raw.rollback()
+            return True
+        except Exception as e:
+            self.logger.warning(f"ConnectionPool: conexión rota al devolverla al pool: {e}")
+            return False
+
+    def _checkin(self, pooled: _PooledConnection, broken: bool, held_seconds: float):
+        """Devuelve una conexión al pool o la descarta si está rota"""
+        with self._cond:
+            self._metrics['total_checkout_seconds'] += held_seconds
+            self._metrics['max_checkout_seconds'] = max(self._metrics['max_checkout_seconds'], held_seconds)
+            if broken:
+                self._metrics['discarded_broken'] += 1
+            elif not self._closed:
+                pooled.last_used = time.monotonic()
+                self._in_use -= 1
+                self._idle.append(pooled)
+                self._cond.notify()
+                return
+        self._discard(pooled)
+
+    def _discard(self, pooled: _PooledConnection):
+        """Cierra una conexión y libera su lugar en el pool"""
+        self._close_raw(pooled)
+        with self._cond:
+            self._in_use -= 1
+            self._open_count -= 1
+            self._cond.notify()
+
+    def _close_raw(self, pooled: _PooledConnection):
+        try:
+            pooled.raw.close()
+        except Exception:
+            pass
+        with self._cond:
+            self._metrics['connections_closed'] += 1
+
+    def _record_checkout(self, wait_seconds: float, waited: bool):
+        with self._cond:
+            self._metrics['checkouts'] += 1
+            self._metrics['total_wait_seconds'] += wait_seconds
+            self._metrics['max_wait_seconds'] = max(self._metrics['max_wait_seconds'], wait_seconds)
+            if waited:
+                self._metrics['waits'] += 1
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Métricas de espera y uso del pool"""
+        with self._cond:
+            stats: Dict[str, Any] = dict(self._metrics)
+            stats.update({
+                'size': self.size,
+                'open': self._open_count,
+                'in_use': self._in_use,
+                'idle': len(self._idle),
+                'closed': self._closed
+            })
+        checkouts = stats['checkouts']
+        stats['avg_wait_ms'] = round(stats['total_wait_seconds'] / checkouts * 1000, 3) if checkouts else 0.0
+        stats['avg_checkout_ms'] = round(stats['total_checkout_seconds'] / checkouts * 1000, 3) if checkouts else 0.0
+        stats['max_wait_ms'] = round(stats.pop('max_wait_seconds') * 1000, 3)
+        stats['max_checkout_ms'] = round(stats.pop('max_checkout_seconds') * 1000, 3)
+        return stats
+
+    def dispose(self):
+        """Cierra las conexiones inactivas; las que están en uso se cierran al devolverse"""
+        with self._cond:
+            self._closed = True
+            idle = list(self._idle)
+            self._idle.clear()
+            self._open_count -= len(idle)
+            self._cond.notify_all()
+        for pooled in idle:
+            self._close_raw(pooled)
@@ -5,22 +5,31 @@ Detecta y corrige problemas comunes en los datos de la base de datos
 
 import pandas as pd
 import numpy as np
-import re
-from typing import Dict, List, Tuple, Any
+from typing import Dict, List, Tuple, Any, Optional
 import logging
+import json
+from pathlib import Path
+
+import pyarrow as pa
+import pyarrow.ipc as ipc
 
 class DataValidator:
     """Validador de calidad de datos para productos"""
     
-    def __init__(self):
+    # Resultados de reglas que dependen solo del contenido de la fila (se guardan en la caché)
+    ROW_RULES = ['header', 'valid_SKU', 'valid_Descripción', 'sku_candidate',
+                 'short_sku', 'numeric_sku', 'short_description']
+    # Columnas que leen esas reglas: su contenido forma la huella de la fila
+    FINGERPRINT_COLUMNS = ['SKU', 'Descripción', 'Marca', 'Familia']
+    # Incrementar al cambiar las reglas por fila para invalidar las cachés guardadas
+    RULES_VERSION = 1
+    
+    def __init__(self, cache_path: Optional[str] = None):
+        """cache_path: archivo de la caché de validación por huella de fila (None = sin caché)"""
         self.logger = logging.getLogger(__name__)
-        
-        # Patrones para detectar filas de encabezado
-        self.header_patterns = [
-            r'^(SKU|Descripción|Marca|Familia|Stock|Modelo|Potencia)$',
-            r'^(sku|descripcion|marca|familia|stock|modelo|potencia)$',
-            r'^[A-Za-z_]+$'  # Solo letras y guiones bajos
-        ]
+        self.cache_path = Path(cache_path) if cache_path else None
+        self._cache: Optional[pd.DataFrame] = None
+        self._cache_columns: Optional[List[str]] = None
         
         # Valores que indican filas inválidas
         self.invalid_values = {
@@ -30,9 +39,13 @@ class DataValidator:
             'Familia': ['Familia', 'familia', 'SKU', 'Descripción', 'Marca']
         }
     
-    def validate_dataframe(self, df: pd.DataFrame) -> Tuple[pd.DataFrame, Dict[str, Any]]:
+    def validate_dataframe(self, df: pd.DataFrame,
+                           fingerprint_column: Optional[str] = None) -> Tuple[pd.DataFrame, Dict[str, Any]]:
         """
-        Valida y limpia un DataFrame completo
+        Valida y limpia un DataFrame completo en una sola pasada: cada regla aporta a una
+        máscara combinada y el frame se copia una única vez al final.
+        fingerprint_column: columna con un checksum por fila ya calculado (p. ej. el de la réplica)
+        que se suma a FINGERPRINT_COLUMNS en la huella de cada fila.
         Retorna: (DataFrame limpio, reporte de validación)
         """
         if df.empty:
@@ -42,26 +55,75 @@ class DataValidator:
         
         original_count = len(df)
         issues = []
+        # Reglas por fila: de la caché para filas sin cambios, evaluadas solo para las nuevas o modificadas
+        rules, cached_count = self._get_row_rules(df, fingerprint_column)
         
-        # 1. Detectar y remover filas de encabezado
-        df_clean, header_issues = self._remove_header_rows(df)
-        issues.extend(header_issues)
+        # 1. Filas de encabezado: al menos 2 campos con nombres de columna
+        keep = ~rules['header']
+        header_count = original_count - int(keep.sum())
+        if header_count > 0:
+            issues.append({
+                'type': 'header_row_detected',
+                'count': header_count,
+                'description': f'Detectadas y removidas {header_count} filas que parecían ser encabezados.'
+            })
+            self.logger.info(f"validate_dataframe: Removiendo {header_count} filas de encabezado.")
         
-        # 2. Validar campos obligatorios
-        df_clean, required_issues = self._validate_required_fields(df_clean)
-        issues.extend(required_issues)
+        # 2. Campos obligatorios (los conteos se hacen sobre las filas que siguen en juego)
+        required_valid = np.ones(original_count, dtype=bool)
+        for field in ['SKU', 'Descripción']:
+            if field not in df.columns:
+                continue
+            field_mask = rules[f'valid_{field}']
+            invalid_count = int((keep & ~field_mask).sum())
+            if invalid_count > 0:
+                required_valid &= field_mask
+                issues.append({
+                    'type': 'required_field_invalid',
+                    'field': field,
+                    'count': invalid_count,
+                    'description': f'Valores inválidos en campo obligatorio {field}'
+                })
+        removed_required = int((keep & ~required_valid).sum())
+        if removed_required:
+            self.logger.warning(f"validate_dataframe: Removidas {removed_required} filas por campos inválidos.")
+        keep &= required_valid
         
-        # 3. Detectar filas duplicadas
-        df_clean, duplicate_issues = self._remove_duplicates(df_clean)
-        issues.extend(duplicate_issues)
+        # 3. SKUs duplicados entre las filas restantes (se conserva la primera)
+        if 'SKU' in df.columns:
+            candidates = keep & rules['sku_candidate']
+            duplicate_mask = np.zeros(original_count, dtype=bool)
+            duplicate_mask[candidates] = df['SKU'][candidates].duplicated(keep='first').to_numpy()
+            duplicate_count = int(duplicate_mask.sum())
+            if duplicate_count > 0:
+                issues.append({
+                    'type': 'duplicate_sku',
+                    'count': duplicate_count,
+                    'description': f'SKUs duplicados encontrados'
+                })
+                self.logger.warning(f"validate_dataframe: Removidas {duplicate_count} filas duplicadas.")
+            keep &= ~duplicate_mask
         
-        # 4. Validar tipos de datos
-        df_clean, type_issues = self._validate_data_types(df_clean)
-        issues.extend(type_issues)
+        # Única copia del frame
+        df_clean = df[keep].reset_index(drop=True)
+        
+        # 4. Tipos de datos: conversión numérica sobre las filas finales
+        for field in ['Precio_USD_con_IVA', 'Stock', 'Potencia_Numerica']:
+            if field not in df_clean.columns:
+                continue
+            original_nulls = int(df_clean[field].isna().sum())
+            df_clean[field] = pd.to_numeric(df_clean[field], errors='coerce')
+            conversion_failures = int(df_clean[field].isna().sum()) - original_nulls
+            if conversion_failures > 0:
+                issues.append({
+                    'type': 'data_type_conversion',
+                    'field': field,
+                    'count': conversion_failures,
+                    'description': f'Valores no numéricos en campo {field}'
+                })
         
-        # 5. Detectar anomalías en los datos
-        anomaly_issues = self._detect_anomalies(df_clean)
-        issues.extend(anomaly_issues)
+        # 5. Anomalías (las de SKU y descripción salen de las reglas por fila)
+        issues.extend(self._detect_anomalies(df_clean, {rule: values[keep] for rule, values in rules.items()}))
         
         final_count = len(df_clean)
         removed_count = original_count - final_count
@@ -73,7 +135,9 @@ class DataValidator:
                 'original_rows': original_count,
                 'final_rows': final_count,
                 'removed_rows': removed_count,
-                'removal_percentage': (removed_count / original_count * 100) if original_count > 0 else 0
+                'removal_percentage': (removed_count / original_count * 100) if original_count > 0 else 0,
+                'cached_rows': cached_count,
+                'validated_rows': original_count - cached_count
             },
             'issues': issues,
             'data_quality_score': self._calculate_quality_score(df_clean)
@@ -83,140 +147,120 @@ class DataValidator:
         
         return df_clean, report
     
-    def _remove_header_rows(self, df: pd.DataFrame) -> Tuple[pd.DataFrame, List[Dict]]:
-        """Detecta y remueve filas que contienen nombres de columnas como datos"""
-        issues = []
-        if df.empty:
-            return df, issues
-
-        # Contar cuántas columnas de una fila coinciden con valores de encabezado
-        header_match_count = pd.DataFrame(index=df.index, columns=list(self.invalid_values.keys()), dtype=int)
+    def _row_rules(self, df: pd.DataFrame) -> Dict[str, np.ndarray]:
+        """Evalúa las reglas que dependen solo de cada fila (ROW_RULES)"""
+        size = len(df)
+        rules = {rule: np.zeros(size, dtype=bool) for rule in self.ROW_RULES}
+        
+        # Filas que contienen nombres de columnas como datos (2 o más campos coincidentes)
+        header_match_count = np.zeros(size, dtype=np.int8)
         for col, invalid_list in self.invalid_values.items():
             if col in df.columns:
-                header_match_count[col] = df[col].isin(invalid_list).astype(int)
+                header_match_count += df[col].isin(invalid_list).to_numpy(dtype=np.int8)
+        rules['header'] = header_match_count >= 2
         
-        # Una fila se considera un encabezado si al menos 2 de sus campos coinciden
-        is_header_mask = header_match_count.sum(axis=1) >= 2
-
-        # Contar cuántas filas se van a eliminar
-        header_rows_count = is_header_mask.sum()
-
-        if header_rows_count > 0:
-            issues.append({
-                'type': 'header_row_detected',
-                'count': int(header_rows_count),
-                'description': f'Detectadas y removidas {header_rows_count} filas que parecían ser encabezados.'
-            })
-            self.logger.info(f"_remove_header_rows: Removiendo {header_rows_count} filas de encabezado.")
-            
-            # Devolver el DataFrame sin las filas de encabezado
-            return df[~is_header_mask].reset_index(drop=True), issues
-        
-        return df, issues
-    
-    def _validate_required_fields(self, df: pd.DataFrame) -> Tuple[pd.DataFrame, List[Dict]]:
-        """Valida que los campos obligatorios tengan valores válidos"""
-        issues = []
-        
-        if df.empty:
-            return df, issues
-        
-        required_fields = ['SKU', 'Descripción']
-        valid_mask = pd.Series([True] * len(df))
-        
-        for field in required_fields:
+        # Texto de SKU y Descripción: se calcula una sola vez para todas las reglas
+        for field in ['SKU', 'Descripción']:
             if field not in df.columns:
+                rules[f'valid_{field}'] = np.ones(size, dtype=bool)
                 continue
-            
-            # REGLA RELAJADA: Se reduce la longitud mínima a 1
-            field_mask = (
-                df[field].notna() &
-                (df[field].astype(str).str.strip() != '') &
-                (df[field].astype(str).str.len() >= 1)
-            )
-            
-            invalid_count = (~field_mask).sum()
-            if invalid_count > 0:
-                valid_mask &= field_mask
-                issues.append({
-                    'type': 'required_field_invalid',
-                    'field': field,
-                    'count': invalid_count,
-                    'description': f'Valores inválidos en campo obligatorio {field}'
-                })
-        
-        removed_df = df[~valid_mask]
-        if not removed_df.empty:
-            self.logger.warning(f"_validate_required_fields: Removidas {len(removed_df)} filas por campos inválidos.")
-
-        df_clean = df[valid_mask].reset_index(drop=True)
-        return df_clean, issues
+            text = df[field].astype(str)
+            rules[f'valid_{field}'] = df[field].notna().to_numpy() & (text.str.strip() != '').to_numpy()
+            if field == 'SKU':
+                rules['sku_candidate'] = ~df['SKU'].isin(['SKU', 'sku', None, '']).to_numpy()
+                rules['short_sku'] = (text.str.len() < 3).to_numpy()
+                rules['numeric_sku'] = text.str.isdigit().to_numpy(dtype=bool)
+            else:
+                rules['short_description'] = (text.str.len() < 10).to_numpy()
+        return rules
     
-    def _remove_duplicates(self, df: pd.DataFrame) -> Tuple[pd.DataFrame, List[Dict]]:
-        """Detecta y remueve filas duplicadas"""
-        issues = []
-        
-        if df.empty or 'SKU' not in df.columns:
-            return df, issues
-        
-        # Detectar duplicados por SKU, ignorando el SKU 'SKU' que es probablemente un header
-        # y otros valores no válidos.
-        valid_sku_mask = ~df['SKU'].isin(['SKU', 'sku', None, ''])
-        
-        # Aplicar la detección de duplicados solo a las filas con SKUs válidos
-        duplicate_mask = df[valid_sku_mask].duplicated(subset=['SKU'], keep='first')
-        
-        # Re-indexar la máscara para que coincida con el DataFrame original
-        duplicate_mask = duplicate_mask.reindex(df.index, fill_value=False)
-        duplicate_count = duplicate_mask.sum()
-        
-        if duplicate_count > 0:
-            issues.append({
-                'type': 'duplicate_sku',
-                'count': duplicate_count,
-                'description': f'SKUs duplicados encontrados'
-            })
-        
-        removed_df = df[duplicate_mask]
-        if not removed_df.empty:
-            self.logger.warning(f"_remove_duplicates: Removidas {len(removed_df)} filas duplicadas.")
-
-        df_clean = df[~duplicate_mask].reset_index(drop=True)
-        return df_clean, issues
+    def _get_row_rules(self, df: pd.DataFrame,
+                       fingerprint_column: Optional[str] = None) -> Tuple[Dict[str, np.ndarray], int]:
+        """
+        Reglas por fila usando la caché: la huella de cada fila (hash_pandas_object de
+        FINGERPRINT_COLUMNS más fingerprint_column) identifica las filas ya validadas.
+        Retorna (reglas, filas tomadas de la caché).
+        """
+        if self.cache_path is None:
+            return self._row_rules(df), 0
+        
+        # Siempre el contenido que leen las reglas: un checksum externo (p. ej. solo updated_at)
+        # puede repetirse entre filas distintas
+        columns = [col for col in self.FINGERPRINT_COLUMNS if col in df.columns]
+        if fingerprint_column and fingerprint_column in df.columns:
+            columns.append(fingerprint_column)
+        if columns:
+            fingerprints = pd.util.hash_pandas_object(df[columns], index=False, categorize=False).to_numpy()
+        else:
+            fingerprints = np.zeros(len(df), dtype=np.uint64)
+        cache = self._load_cache(columns)
+        positions = cache.index.get_indexer(fingerprints)
+        hits = positions >= 0
+        misses = np.flatnonzero(~hits)
+        
+        fresh = self._row_rules(df.iloc[misses])
+        rules = {}
+        for rule in self.ROW_RULES:
+            values = np.zeros(len(df), dtype=bool)
+            values[hits] = cache[rule].to_numpy()[positions[hits]]
+            values[misses] = fresh[rule]
+            rules[rule] = values
+        
+        # La caché conserva solo las huellas vigentes: no crece con filas que ya no existen
+        all_used = np.count_nonzero(np.bincount(positions[hits], minlength=len(cache))) == len(cache)
+        if len(misses) or not all_used:
+            current = pd.DataFrame(rules, index=pd.Index(fingerprints, name='fingerprint'))
+            self._cache = current[~current.index.duplicated()]
+            self._save_cache()
+        
+        cached_count = int(hits.sum())
+        self.logger.info(f"DataValidator: {cached_count} filas desde la caché, {len(misses)} validadas")
+        return rules, cached_count
     
-    def _validate_data_types(self, df: pd.DataFrame) -> Tuple[pd.DataFrame, List[Dict]]:
-        """Valida tipos de datos y convierte cuando es necesario"""
-        issues = []
-        
-        if df.empty:
-            return df, issues
-        
-        # Validar campos numéricos
-        numeric_fields = ['Precio_USD_con_IVA', 'Stock', 'Potencia_Numerica']
-        
-        for field in numeric_fields:
-            if field not in df.columns:
-                continue
-            
-            # Intentar convertir a numérico
-            original_values = df[field].copy()
-            df[field] = pd.to_numeric(df[field], errors='coerce')
-            
-            # Contar conversiones fallidas
-            conversion_failures = df[field].isna().sum() - original_values.isna().sum()
-            
-            if conversion_failures > 0:
-                issues.append({
-                    'type': 'data_type_conversion',
-                    'field': field,
-                    'count': conversion_failures,
-                    'description': f'Valores no numéricos en campo {field}'
-                })
-        
-        return df, issues
+    def _load_cache(self, columns: List[str]) -> pd.DataFrame:
+        """Caché en memoria (se lee del disco la primera vez); se descarta si cambian columnas o reglas"""
+        if self._cache is None:
+            self._cache, self._cache_columns = self._read_cache()
+        if self._cache_columns != columns:
+            self._cache = pd.DataFrame({rule: np.zeros(0, dtype=bool) for rule in self.ROW_RULES},
+                                       index=pd.Index(np.zeros(0, dtype=np.uint64), name='fingerprint'))
+            self._cache_columns = columns
+        return self._cache
+    
+    def _read_cache(self) -> Tuple[Optional[pd.DataFrame], Optional[List[str]]]:
+        if not self.cache_path.exists():
+            return None, None
+        try:
+            with pa.memory_map(str(self.cache_path), 'r') as source:
+                table = ipc.open_file(source).read_all()
+            meta = json.loads(table.schema.metadata[b'validation_cache'])
+            if meta.get('rules_version') != self.RULES_VERSION:
+                self.logger.info("DataValidator: caché de validación de otra versión de reglas, se descarta")
+                return None, None
+            cache = table.to_pandas().set_index('fingerprint')
+            self.logger.info(f"DataValidator: caché de validación cargada ({len(cache)} filas)")
+            return cache, meta.get('columns')
+        except Exception as e:
+            self.logger.warning(f"DataValidator: no se pudo leer la caché de validación: {e}")
+            return None, None
+    
+    def _save_cache(self):
+        """Escribe la caché en un archivo temporal y lo reemplaza (escritura atómica)"""
+        try:
+            table = pa.Table.from_pandas(self._cache, preserve_index=True)
+            meta = {'rules_version': self.RULES_VERSION, 'columns': self._cache_columns}
+            table = table.replace_schema_metadata({b'validation_cache': json.dumps(meta).encode('utf-8')})
+            self.cache_path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_file = self.cache_path.with_suffix('.tmp')
+            with pa.OSFile(str(tmp_file), 'wb') as sink:
+                with ipc.new_file(sink, table.schema) as writer:
+                    writer.write_table(table)
+            tmp_file.replace(self.cache_path)
+        except Exception as e:
+            self.logger.warning(f"DataValidator: no se pudo guardar la caché de validación: {e}")
     
-    def _detect_anomalies(self, df: pd.DataFrame) -> List[Dict]:
-        """Detecta anomalías en los datos"""
+    def _detect_anomalies(self, df: pd.DataFrame, rules: Dict[str, np.ndarray]) -> List[Dict]:
+        """Detecta anomalías en los datos finales (rules: reglas por fila de esas mismas filas)"""
         issues = []
         
         if df.empty:
@@ -225,7 +269,7 @@ class DataValidator:
         # Detectar SKUs con patrones anómalos
         if 'SKU' in df.columns:
             # SKUs muy cortos
-            short_sku_count = (df['SKU'].astype(str).str.len() < 3).sum()
+            short_sku_count = int(rules['short_sku'].sum())
             if short_sku_count > 0:
                 issues.append({
                     'type': 'anomaly_short_sku',
@@ -234,7 +278,7 @@ class DataValidator:
                 })
             
             # SKUs que son solo números
-            numeric_sku_count = df['SKU'].astype(str).str.match(r'^\d+$').sum()
+            numeric_sku_count = int(rules['numeric_sku'].sum())
             if numeric_sku_count > len(df) * 0.8:  # Más del 80%
                 issues.append({
                     'type': 'anomaly_numeric_sku',
@@ -244,7 +288,7 @@ class DataValidator:
         
         # Detectar descripciones muy cortas
         if 'Descripción' in df.columns:
-            short_desc_count = (df['Descripción'].astype(str).str.len() < 10).sum()
+            short_desc_count = int(rules['short_description'].sum())
             if short_desc_count > 0:
                 issues.append({
                     'type': 'anomaly_short_description',
@@ -252,12 +296,12 @@ class DataValidator:
                     'description': 'Descripciones muy cortas (menos de 10 caracteres)'
                 })
         
-        # Detectar precios anómalos
+        # Detectar precios anómalos (la columna ya es numérica tras la conversión de tipos)
         if 'Precio_USD_con_IVA' in df.columns:
-            numeric_prices = pd.to_numeric(df['Precio_USD_con_IVA'], errors='coerce')
+            numeric_prices = df['Precio_USD_con_IVA']
             
             # Precios negativos
-            negative_prices = (numeric_prices < 0).sum()
+            negative_prices = int((numeric_prices < 0).sum())
             if negative_prices > 0:
                 issues.append({
                     'type': 'anomaly_negative_price',
@@ -266,15 +310,14 @@ class DataValidator:
                 })
             
             # Precios extremadamente altos
-            if not numeric_prices.empty:
-                q99 = numeric_prices.quantile(0.99)
-                extreme_prices = (numeric_prices > q99 * 10).sum()
-                if extreme_prices > 0:
-                    issues.append({
-                        'type': 'anomaly_extreme_price',
-                        'count': extreme_prices,
-                        'description': 'Precios extremadamente altos detectados'
-                    })
+            q99 = numeric_prices.quantile(0.99)
+            extreme_prices = int((numeric_prices > q99 * 10).sum())
+            if extreme_prices > 0:
+                issues.append({
+                    'type': 'anomaly_extreme_price',
+                    'count': extreme_prices,
+                    'description': 'Precios extremadamente altos detectados'
+                })
         
         return issues
     
@@ -5,21 +5,65 @@ Gestiona la conexión y consultas a la base de datos
 
 import pymysql
 import pandas as pd
-from typing import Dict, List, Any, Optional
+from typing import Dict, List, Any, Optional, Tuple
 import json
 from datetime import datetime
 from pathlib import Path
 import logging
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from google.cloud.sql.connector import Connector
 from .data_validator import DataValidator
+from .connection_pool import ConnectionPool
+from . import exporters
 
 class DatabaseHandler:
     """Maneja la conexión y operaciones con MySQL"""
     
+    # Condición que cumplen las filas utilizables del catálogo
+    VALID_ROW_CONDITION = "SKU IS NOT NULL AND SKU != '' AND Descripción IS NOT NULL AND Descripción != ''"
+    # Primer número de la potencia, igual que Potencia_Numerica en la ingesta ("5,5 KVA" -> 5.5)
+    POTENCIA_EXPR = "CAST(REPLACE(REGEXP_SUBSTR(Potencia, '[0-9]+([.,][0-9]+)?'), ',', '.') AS DECIMAL(10,2))"
+    # Las columnas numéricas se ordenan por valor, no como texto
+    ORDER_EXPRESSIONS = {
+        'Stock': "CAST(Stock AS SIGNED)",
+        'Precio_USD_con_IVA': "CAST(Precio_USD_con_IVA AS DECIMAL(10,2))",
+        'Potencia': POTENCIA_EXPR
+    }
+    # Perfiles de columnas (None = todas). Se pueden redefinir con 'column_profiles' en la configuración
+    COLUMN_PROFILES: Dict[str, Optional[List[str]]] = {
+        # Lo que muestra la tabla y usan filtros, búsqueda y estadísticas
+        'list': ['SKU', 'Descripción', 'Marca', 'Modelo', 'Familia', 'Precio_USD_con_IVA', 'Stock',
+                 'URL_PDF', 'Potencia', 'Combustible', 'Cabina', 'TTA_Incluido'],
+        # Ficha completa de un producto y exportaciones
+        'detail': None,
+        # El generador de descripciones lee cualquier columna de especificaciones disponible
+        'generation': None
+    }
+    
     def __init__(self, config: Optional[Dict[str, Any]] = None):
         self.config = config or self._load_config_from_file()
         self.logger = logging.getLogger(__name__)
-        self.connector = Connector()
+        # El conector de Cloud SQL solo se crea cuando se usa (requiere credenciales de Google)
+        self.connector = Connector() if self.config.get("use_cloud_sql", False) else None
+        self.pool = ConnectionPool(
+            self.get_connection,
+            size=self.config.get("pool_size", 5),
+            timeout=self.config.get("pool_timeout", 30),
+            recycle=self.config.get("pool_recycle", 300),
+            max_lifetime=self.config.get("pool_max_lifetime", 1800),
+            pre_ping=self.config.get("pool_pre_ping", True)
+        )
+        self._table_columns: Optional[List[str]] = None
+        # Caché de estadísticas para no consultar la BD en cada sondeo del dashboard
+        self._stats_cache: Optional[Dict[str, Any]] = None
+        self._stats_cache_time = 0.0
+        self._stats_lock = threading.Lock()
+        # Filas recientes por (perfil, SKU) para no repetir consultas de detalle durante un lote
+        self._rows_cache: 'OrderedDict[Tuple[Optional[str], str], Tuple[float, Dict[str, Any]]]' = OrderedDict()
+        self._rows_lock = threading.Lock()
 
     def _load_config_from_file(self) -> Dict[str, Any]:
         """Carga configuración desde archivo"""
@@ -32,8 +76,26 @@ class DatabaseHandler:
                 self.logger.error(f"Error cargando configuración: {e}")
         return {}
 
+    def connection(self):
+        """Context manager que toma una conexión del pool compartido."""
+        return self.pool.connection()
+
+    def get_pool_stats(self) -> Dict[str, Any]:
+        """Métricas del pool de conexiones (esperas, checkouts, reciclados)."""
+        return self.pool.get_stats()
+
+    def close(self):
+        """Cierra el pool y el conector de Cloud SQL."""
+        self.pool.dispose()
+        if self.connector is None:
+            return
+        try:
+            self.connector.close()
+        except Exception as e:
+            self.logger.warning(f"Error cerrando el conector de Cloud SQL: {e}")
+
     def get_connection(self):
-        """Crea y retorna una nueva conexión a la base de datos."""
+        """Crea y retorna una nueva conexión a la base de datos (usada por el pool)."""
         use_cloud_sql = self.config.get("use_cloud_sql", False)
         db_user = self.config.get("user")
         db_pass = self.config.get("password")
@@ -45,6 +107,8 @@ class DatabaseHandler:
                 self.logger.error("Configuración de Cloud SQL incompleta.")
                 raise ConnectionError("Configuración de Cloud SQL incompleta.")
             
+            if self.connector is None:
+                self.connector = Connector()
             return self.connector.connect(
                 instance_connection_name,
                 "pymysql",
@@ -69,46 +133,126 @@ class DatabaseHandler:
                 cursorclass=pymysql.cursors.DictCursor
             )
 
+    def get_profile_columns(self, profile: Optional[str]) -> Optional[List[str]]:
+        """
+        Columnas de un perfil que existen en la tabla (en el orden del perfil, SKU siempre incluido).
+        None significa todas las columnas.
+        """
+        profiles = {**self.COLUMN_PROFILES, **self.config.get('column_profiles', {})}
+        columns = profiles.get(profile) if profile else None
+        if not columns:
+            return None
+        try:
+            table_columns = set(self.get_table_columns())
+        except Exception as e:
+            self.logger.warning(f"No se pudieron leer las columnas de la tabla, se usa SELECT *: {e}")
+            return None
+        wanted = ['SKU'] + [c for c in columns if c != 'SKU']
+        return [c for c in wanted if c in table_columns]
+
+    def _select_list(self, profile: Optional[str]) -> str:
+        """Lista de columnas para el SELECT según el perfil"""
+        columns = self.get_profile_columns(profile)
+        if columns is None:
+            return "*"
+        return ", ".join(f"`{c}`" for c in columns)
+
+    def _read_dataframe(self, query: str, params: Optional[List[Any]] = None) -> pd.DataFrame:
+        """
+        Ejecuta una consulta en una conexión del pool y arma el DataFrame.
+        No se usa pd.read_sql: con el DictCursor de pymysql, pandas >= 2.1 convierte
+        cada fila dict en la tupla de sus claves y llena el frame con nombres de columna.
+        """
+        with self.connection() as connection:
+            with connection.cursor() as cursor:
+                cursor.execute(query, params or None)
+                rows = cursor.fetchall()
+                columns = [desc[0] for desc in cursor.description or []]
+        return pd.DataFrame(list(rows), columns=columns)
+
     def test_connection(self) -> bool:
         """Prueba la conexión a la base de datos."""
-        connection = None
         try:
-            connection = self.get_connection()
-            connection_type = "Cloud SQL" if self.config.get("use_cloud_sql") else "MySQL local"
-            self.logger.info(f"Prueba de conexión a {connection_type} exitosa")
-            return True
+            with self.connection():
+                connection_type = "Cloud SQL" if self.config.get("use_cloud_sql") else "MySQL local"
+                self.logger.info(f"Prueba de conexión a {connection_type} exitosa")
+                return True
         except Exception as e:
             connection_type = "Cloud SQL" if self.config.get("use_cloud_sql") else "MySQL local"
             self.logger.error(f"Error en prueba de conexión a {connection_type}: {e}")
             return False
-        finally:
-            if connection:
-                connection.close()
 
-    def get_all_products(self) -> pd.DataFrame:
-        """Obtiene todos los productos de la tabla con validación automática"""
-        connection = None
+    def _fetch_raw_page(self, after_sku: Optional[str], page_size: int,
+                        profile: Optional[str] = 'list') -> Tuple[pd.DataFrame, Optional[str]]:
+        """
+        Lee una página de filas crudas ordenadas por SKU (paginación keyset).
+        Retorna: (DataFrame crudo, cursor para la página siguiente o None si no hay más)
+        """
+        query = f"SELECT {self._select_list(profile)} FROM {self.config['table']} WHERE {self.VALID_ROW_CONDITION}"
+        params: List[Any] = []
+        if after_sku:
+            query += " AND SKU > %s"
+            params.append(after_sku)
+        # Se pide una fila extra para saber si existe una página siguiente
+        query += " ORDER BY SKU LIMIT %s"
+        params.append(int(page_size) + 1)
+        
+        df_raw = self._read_dataframe(query, params)
+        
+        next_cursor = None
+        if len(df_raw) > page_size:
+            df_raw = df_raw.iloc[:page_size]
+            next_cursor = str(df_raw['SKU'].iloc[-1])
+        return df_raw, next_cursor
+
+    def get_products_page(self, after_sku: Optional[str] = None, page_size: Optional[int] = None,
+                          profile: Optional[str] = 'list') -> Tuple[pd.DataFrame, Optional[str]]:
+        """
+        Obtiene una página validada de productos con paginación por cursor (WHERE SKU > cursor).
+        Retorna: (DataFrame validado, next_cursor o None si es la última página)
+        """
+        page_size = page_size or self.config.get('page_size', 1000)
         try:
-            connection = self.get_connection()
-            # Query simplificado - obtener todos los datos y validar en Python
-            query = f"""
-            SELECT * FROM {self.config['table']}
-            WHERE SKU IS NOT NULL 
-            AND SKU != ''
-            AND Descripción IS NOT NULL 
-            AND Descripción != ''
-            ORDER BY SKU
-            LIMIT 3000
-            """
+            df_raw, next_cursor = self._fetch_raw_page(after_sku, page_size, profile)
+            if df_raw.empty:
+                return pd.DataFrame(), None
             
-            self.logger.info(f"get_all_products: Ejecutando query para obtener datos brutos")
-            df_raw = pd.read_sql(query, connection)
+            df_clean, _ = DataValidator().validate_dataframe(df_raw)
+            self.logger.info(
+                f"get_products_page: cursor={after_sku!r} -> {len(df_clean)}/{len(df_raw)} filas válidas, "
+                f"next_cursor={next_cursor!r}"
+            )
+            return df_clean, next_cursor
+        except Exception as e:
+            self.logger.error(f"get_products_page: Error obteniendo página (cursor={after_sku!r}): {e}")
+            return pd.DataFrame(), None
+
+    def get_all_products(self, validate: bool = True, profile: Optional[str] = 'list') -> pd.DataFrame:
+        """
+        Obtiene todos los productos de la tabla con validación automática (validate=False retorna las filas crudas).
+        profile elige las columnas (ver COLUMN_PROFILES); None trae todas.
+        """
+        try:
+            # Recorrer la tabla por páginas keyset en lugar de un LIMIT fijo que trunca el catálogo
+            page_size = self.config.get('page_size', 1000)
+            pages = []
+            cursor = None
+            self.logger.info(f"get_all_products: Obteniendo datos brutos en páginas de {page_size}")
+            while True:
+                df_page, cursor = self._fetch_raw_page(cursor, page_size, profile)
+                if not df_page.empty:
+                    pages.append(df_page)
+                if cursor is None:
+                    break
+            df_raw = pd.concat(pages, ignore_index=True) if pages else pd.DataFrame()
             
             if df_raw.empty:
                 self.logger.warning("get_all_products: No se obtuvieron datos de la base de datos")
                 return pd.DataFrame()
             
             self.logger.info(f"get_all_products: Obtenidos {len(df_raw)} registros brutos de la BD")
+            if not validate:
+                return df_raw
             
             # Aplicar validación automática con DataValidator
             validator = DataValidator()
@@ -149,18 +293,13 @@ class DatabaseHandler:
             import traceback
             self.logger.error(f"Traceback completo: {traceback.format_exc()}")
             return pd.DataFrame()
-        finally:
-            if connection:
-                connection.close()
     
-    def get_products_filtered(self, filters: Dict[str, Any]) -> pd.DataFrame:
-        """Obtiene productos con filtros aplicados"""
-        connection = None
-        base_query = f"SELECT * FROM {self.config.get('table', 'default_table')} WHERE 1=1 "
+    def get_products_filtered(self, filters: Dict[str, Any], profile: Optional[str] = 'list') -> pd.DataFrame:
+        """Obtiene productos con filtros aplicados (solo las columnas del perfil)"""
+        base_query = f"SELECT {self._select_list(profile)} FROM {self.config.get('table', 'default_table')} WHERE 1=1 "
         params: List[Any] = []
         
         try:
-            connection = self.get_connection()
             self.logger.info(f"get_products_filtered: Filtros recibidos: {filters}")
             
             # Construir query con filtros
@@ -199,11 +338,11 @@ class DatabaseHandler:
             
             # Filtros de potencia
             if filters.get('potencia_min') is not None:
-                base_query += " AND CAST(REGEXP_REPLACE(Potencia, '[^0-9.]', '') AS DECIMAL(10,2)) >= %s"
+                base_query += f" AND {self.POTENCIA_EXPR} >= %s"
                 params.append(filters['potencia_min'])
             
             if filters.get('potencia_max') is not None:
-                base_query += " AND CAST(REGEXP_REPLACE(Potencia, '[^0-9.]', '') AS DECIMAL(10,2)) <= %s"
+                base_query += f" AND {self.POTENCIA_EXPR} <= %s"
                 params.append(filters['potencia_max'])
             
             # Filtro de combustible
@@ -239,12 +378,20 @@ class DatabaseHandler:
             
             # Ordenamiento
             order_by = filters.get('order_by', 'SKU')
-            order_dir = filters.get('order_dir', 'ASC')
+            order_dir = 'DESC' if str(filters.get('order_dir', 'ASC')).upper() == 'DESC' else 'ASC'
+            
+            # Paginación keyset: solo aplica al ordenar por SKU (clave única)
+            if filters.get('after_sku') and order_by == 'SKU':
+                base_query += " AND SKU < %s" if order_dir == 'DESC' else " AND SKU > %s"
+                params.append(filters['after_sku'])
             
             # Validar columna de ordenamiento
             valid_columns = ['SKU', 'Descripción', 'Marca', 'Familia', 'Stock', 'Precio_USD_con_IVA', 'Potencia']
-            if order_by in valid_columns:
-                base_query += f" ORDER BY {order_by} {order_dir}"
+            if order_by == 'SKU':
+                base_query += f" ORDER BY SKU {order_dir}"
+            elif order_by in valid_columns:
+                # SKU desempata para que el orden sea estable entre consultas
+                base_query += f" ORDER BY {self.ORDER_EXPRESSIONS.get(order_by, order_by)} {order_dir}, SKU ASC"
             else:
                 base_query += " ORDER BY SKU ASC"
             
@@ -254,7 +401,7 @@ class DatabaseHandler:
             
             self.logger.info(f"Ejecutando query: {base_query}")
             self.logger.info(f"Parámetros: {params}")
-            df = pd.read_sql(base_query, connection, params=params)
+            df = self._read_dataframe(base_query, params)
             
             # Aplicar el mismo filtro que en get_all_products
             if not df.empty:
@@ -278,49 +425,143 @@ class DatabaseHandler:
             self.logger.error(f"Query: {base_query}")
             self.logger.error(f"Params: {params}")
             return pd.DataFrame()
-        finally:
-            if connection:
-                connection.close()
 
     def get_distinct_values(self, column: str) -> List[str]:
         """Obtiene valores únicos de una columna"""
-        connection = None
         try:
-            connection = self.get_connection()
             query = f"SELECT DISTINCT {column} FROM {self.config['table']} WHERE {column} IS NOT NULL ORDER BY {column}"
-            with connection.cursor() as cursor:
-                cursor.execute(query)
-                results = cursor.fetchall()
-                return [row[column] for row in results if row[column]]
+            with self.connection() as connection:
+                with connection.cursor() as cursor:
+                    cursor.execute(query)
+                    results = cursor.fetchall()
+            return [row[column] for row in results if row[column]]
         except Exception as e:
             self.logger.error(f"Error obteniendo valores únicos de {column}: {e}")
             return []
-        finally:
-            if connection:
-                connection.close()
 
-    def get_products_by_ids(self, ids: List[str]) -> pd.DataFrame:
-        """Obtiene productos específicos por SKU"""
+    def get_table_columns(self) -> List[str]:
+        """Obtiene (y cachea) los nombres de columna de la tabla de productos"""
+        if self._table_columns is None:
+            with self.connection() as connection:
+                with connection.cursor() as cursor:
+                    cursor.execute(f"SELECT * FROM {self.config['table']} LIMIT 0")
+                    cursor.fetchall()
+                    self._table_columns = [desc[0] for desc in cursor.description or []]
+        return list(self._table_columns)
+
+    def get_row_checksums(self, profile: Optional[str] = 'list') -> Optional[pd.DataFrame]:
+        """
+        Obtiene SKU y un checksum por fila para sincronizar la réplica local.
+        Usa la columna de última actualización si está configurada (mirror_updated_at_column);
+        si no, un MD5 de las columnas del perfil. Retorna None si la consulta falla.
+        """
+        try:
+            updated_at_column = self.config.get('mirror_updated_at_column')
+            if updated_at_column:
+                checksum_expr = f"CAST(`{updated_at_column}` AS CHAR)"
+            else:
+                # IFNULL distingue NULL de '' (CONCAT_WS omite los NULL)
+                columns = self.get_profile_columns(profile) or self.get_table_columns()
+                fields = ", ".join(f"IFNULL(`{col}`, '<NULL>')" for col in columns)
+                checksum_expr = f"MD5(CONCAT_WS('|', {fields}))"
+            
+            query = f"SELECT SKU, {checksum_expr} AS row_hash FROM {self.config['table']} WHERE {self.VALID_ROW_CONDITION}"
+            return self._read_dataframe(query)
+        except Exception as e:
+            self.logger.error(f"Error obteniendo checksums de filas: {e}")
+            return None
+
+    def get_products_by_ids(self, ids: List[str], profile: Optional[str] = 'detail',
+                            use_cache: bool = True) -> pd.DataFrame:
+        """
+        Obtiene productos específicos por SKU (por defecto la fila completa), en el orden pedido.
+        Las filas recientes salen de la caché LRU; el resto se consulta en bloques de
+        products_chunk_size SKUs, en paralelo si products_fetch_workers > 1.
+        Con use_cache=False se consulta todo a la base (las filas leídas igual actualizan la caché).
+        """
         if not ids:
             return pd.DataFrame()
         
-        connection = None
         try:
-            connection = self.get_connection()
-            placeholders = ', '.join(['%s'] * len(ids))
-            query = f"SELECT * FROM {self.config['table']} WHERE SKU IN ({placeholders})"
-            df = pd.read_sql(query, connection, params=ids)
-            return df
+            skus = list(dict.fromkeys(str(sku) for sku in ids))
+            rows = self._cached_rows(skus, profile) if use_cache else {}
+            missing = [sku for sku in skus if sku not in rows]
+            if missing:
+                chunk_size = max(1, self.config.get('products_chunk_size', 1000))
+                chunks = [missing[i:i + chunk_size] for i in range(0, len(missing), chunk_size)]
+                workers = min(self.config.get('products_fetch_workers', 1), self.pool.size, len(chunks))
+                if workers > 1:
+                    with ThreadPoolExecutor(max_workers=workers) as executor:
+                        frames = list(executor.map(lambda chunk: self._fetch_by_ids(chunk, profile), chunks))
+                else:
+                    frames = [self._fetch_by_ids(chunk, profile) for chunk in chunks]
+                fetched = {}
+                for frame in frames:
+                    for record in frame.to_dict('records'):
+                        fetched.setdefault(str(record['SKU']), record)
+                self._store_rows(fetched, profile)
+                rows.update(fetched)
+            
+            found = [rows[sku] for sku in skus if sku in rows]
+            return pd.DataFrame(found) if found else pd.DataFrame()
         except Exception as e:
             self.logger.error(f"Error obteniendo productos por IDs: {e}")
             return pd.DataFrame()
-        finally:
-            if connection:
-                connection.close()
+    
+    def _fetch_by_ids(self, skus: List[str], profile: Optional[str]) -> pd.DataFrame:
+        """Un bloque de get_products_by_ids (usa su propia conexión del pool)"""
+        placeholders = ', '.join(['%s'] * len(skus))
+        query = f"SELECT {self._select_list(profile)} FROM {self.config['table']} WHERE SKU IN ({placeholders})"
+        return self._read_dataframe(query, skus)
+    
+    def _cached_rows(self, skus: List[str], profile: Optional[str]) -> Dict[str, Dict[str, Any]]:
+        """Filas de la caché que no vencieron (products_cache_ttl segundos)"""
+        ttl = self.config.get('products_cache_ttl', 300)
+        now = time.monotonic()
+        rows = {}
+        with self._rows_lock:
+            for sku in skus:
+                entry = self._rows_cache.get((profile, sku))
+                if entry is None:
+                    continue
+                if now - entry[0] > ttl:
+                    del self._rows_cache[(profile, sku)]
+                    continue
+                self._rows_cache.move_to_end((profile, sku))
+                rows[sku] = entry[1]
+        return rows
+    
+    def _store_rows(self, rows: Dict[str, Dict[str, Any]], profile: Optional[str]):
+        """Guarda filas en la caché LRU (hasta products_cache_size entradas)"""
+        max_size = self.config.get('products_cache_size', 2000)
+        if max_size <= 0:
+            return
+        now = time.monotonic()
+        with self._rows_lock:
+            for sku, row in rows.items():
+                self._rows_cache[(profile, sku)] = (now, row)
+                self._rows_cache.move_to_end((profile, sku))
+            while len(self._rows_cache) > max_size:
+                self._rows_cache.popitem(last=False)
+    
+    def invalidate_rows(self, skus: Optional[List[str]] = None):
+        """Descarta de la caché de filas los SKUs dados (todos si es None)"""
+        with self._rows_lock:
+            if skus is None:
+                self._rows_cache.clear()
+                return
+            targets = {str(sku) for sku in skus}
+            for key in [key for key in self._rows_cache if key[1] in targets]:
+                del self._rows_cache[key]
 
-    def get_statistics(self) -> Dict[str, Any]:
-        """Obtiene estadísticas de la base de datos"""
-        connection = None
+    def get_statistics(self, force_refresh: bool = False) -> Dict[str, Any]:
+        """Obtiene estadísticas de la base de datos en una sola consulta agregada (con caché de TTL corto)"""
+        ttl = self.config.get('stats_cache_ttl', 30)
+        with self._stats_lock:
+            if (not force_refresh and self._stats_cache is not None
+                    and time.monotonic() - self._stats_cache_time < ttl):
+                return dict(self._stats_cache)
+        
         stats = {
             'total_products': 0,
             'total_families': 0,
@@ -332,103 +573,142 @@ class DatabaseHandler:
         }
         
         try:
-            connection = self.get_connection()
-            # Total de productos
-            query = f"SELECT COUNT(*) as count FROM {self.config.get('table', 'default_table')}"
-            with connection.cursor() as cursor:
-                cursor.execute(query)
-                result = cursor.fetchone()
-                if result:
-                    stats['total_products'] = result.get('count', 0)
-            
-            # Familias únicas
-            stats['total_families'] = len(self.get_distinct_values('Familia'))
-            
-            # Marcas únicas
-            stats['total_brands'] = len(self.get_distinct_values('Marca'))
-            
-            # Productos con/sin stock
-            query = f"SELECT COUNT(*) as count FROM {self.config.get('table', 'default_table')} WHERE Stock > 0"
-            with connection.cursor() as cursor:
-                cursor.execute(query)
-                result = cursor.fetchone()
-                if result:
-                    stats['products_with_stock'] = result.get('count', 0)
-            
+            # COUNT DISTINCT ignora NULL; NULLIF descarta los vacíos igual que get_distinct_values
+            query = f"""
+            SELECT
+                COUNT(*) AS total_products,
+                COUNT(DISTINCT NULLIF(Familia, '')) AS total_families,
+                COUNT(DISTINCT NULLIF(Marca, '')) AS total_brands,
+                SUM(CASE WHEN CAST(Stock AS SIGNED) > 0 THEN 1 ELSE 0 END) AS products_with_stock,
+                AVG(CASE WHEN Precio_USD_con_IVA > 0 THEN Precio_USD_con_IVA END) AS avg_price
+            FROM {self.config.get('table', 'default_table')}
+            """
+            with self.connection() as connection:
+                with connection.cursor() as cursor:
+                    cursor.execute(query)
+                    result = cursor.fetchone() or {}
+            
+            stats['total_products'] = int(result.get('total_products') or 0)
+            stats['total_families'] = int(result.get('total_families') or 0)
+            stats['total_brands'] = int(result.get('total_brands') or 0)
+            stats['products_with_stock'] = int(result.get('products_with_stock') or 0)
             stats['products_without_stock'] = stats['total_products'] - stats['products_with_stock']
-            
-            # Precio promedio
-            query = f"SELECT AVG(Precio_USD_con_IVA) as avg_price FROM {self.config.get('table', 'default_table')} WHERE Precio_USD_con_IVA > 0"
-            with connection.cursor() as cursor:
-                cursor.execute(query)
-                result = cursor.fetchone()
-                if result and result.get('avg_price') is not None:
-                    stats['average_price'] = round(float(result['avg_price']), 2)
-                else:
-                    stats['average_price'] = 0
+            if result.get('avg_price') is not None:
+                stats['average_price'] = round(float(result['avg_price']), 2)
             
             stats['last_update'] = datetime.now().isoformat()
             
+            with self._stats_lock:
+                self._stats_cache = dict(stats)
+                self._stats_cache_time = time.monotonic()
+            
         except Exception as e:
             self.logger.error(f"Error obteniendo estadísticas: {e}")
-        finally:
-            if connection:
-                connection.close()
         
         return stats
     
+    def invalidate_statistics(self):
+        """Descarta las estadísticas cacheadas (p. ej. después de una actualización)"""
+        with self._stats_lock:
+            self._stats_cache = None
+    
     def update_product_field(self, sku: str, field: str, value: Any) -> bool:
         """Actualiza un campo específico de un producto"""
-        connection = None
         try:
-            connection = self.get_connection()
             query = f"UPDATE {self.config.get('table', 'default_table')} SET {field} = %s WHERE SKU = %s"
-            with connection.cursor() as cursor:
-                cursor.execute(query, (value, sku))
-                connection.commit()
-                return cursor.rowcount > 0
+            # Si algo falla antes del commit, el pool hace rollback al devolver la conexión
+            with self.connection() as connection:
+                with connection.cursor() as cursor:
+                    cursor.execute(query, (value, sku))
+                    connection.commit()
+                    self.invalidate_statistics()
+                    self.invalidate_rows([sku])
+                    return cursor.rowcount > 0
         except Exception as e:
             self.logger.error(f"Error actualizando producto {sku}: {e}")
-            if connection:
-                connection.rollback()
             return False
-        finally:
-            if connection:
-                connection.close()
 
-    def bulk_update_field(self, updates: List[Dict[str, Any]]) -> Dict[str, int]:
-        """Actualiza múltiples productos en lote"""
-        connection = None
-        results = {'success': 0, 'failed': 0}
+    def bulk_update_field(self, updates: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """
+        Actualiza múltiples productos en lote: agrupa por campo y escribe cada bloque de
+        bulk_update_chunk_size SKUs con un solo UPDATE ... CASE SKU WHEN ..., en su propia transacción.
+        Retorna los conteos success/failed y el resultado por SKU en 'results'
+        ('updated', 'not_found', 'invalid_field' o 'failed').
+        Los elementos sin SKU (o que no son dict) se informan como 'failed' sin cortar el lote.
+        """
+        results: Dict[str, Any] = {'success': 0, 'failed': 0, 'results': []}
+        if not updates:
+            return results
+        
+        valid_updates = []
+        for update in updates:
+            if not isinstance(update, dict) or update.get('sku') in (None, ''):
+                item = update if isinstance(update, dict) else {}
+                results['results'].append({'sku': item.get('sku'), 'field': item.get('field'), 'status': 'failed',
+                                           'error': 'Actualización sin SKU'})
+                continue
+            valid_updates.append(update)
+        updates = valid_updates
         
         try:
-            connection = self.get_connection()
-            with connection.cursor() as cursor:
-                for update in updates:
-                    try:
-                        query = f"UPDATE {self.config.get('table', 'default_table')} SET {update['field']} = %s WHERE SKU = %s"
-                        cursor.execute(query, (update['value'], update['sku']))
-                        if cursor.rowcount > 0:
-                            results['success'] += 1
-                        else:
-                            results['failed'] += 1
-                    except Exception as e:
-                        self.logger.error(f"Error en update de {update['sku']}: {e}")
-                        results['failed'] += 1
-                
-                connection.commit()
+            table_columns = set(self.get_table_columns())
         except Exception as e:
             self.logger.error(f"Error en actualización masiva: {e}")
-            if connection:
-                connection.rollback()
-        finally:
-            if connection:
-                connection.close()
-
+            results['results'].extend({'sku': u.get('sku'), 'field': u.get('field'), 'status': 'failed',
+                                       'error': str(e)} for u in updates)
+            results['failed'] = len(results['results'])
+            return results
+        
+        # Campo -> {SKU: valor}; si un SKU se repite para el mismo campo gana el último valor
+        by_field: Dict[str, Dict[str, Any]] = {}
+        for update in updates:
+            field = update.get('field')
+            if not isinstance(field, str) or field not in table_columns or field == 'SKU':
+                results['results'].append({'sku': update.get('sku'), 'field': field, 'status': 'invalid_field'})
+                continue
+            by_field.setdefault(field, {})[str(update['sku'])] = update.get('value')
+        
+        chunk_size = max(1, self.config.get('bulk_update_chunk_size', 500))
+        for field, values in by_field.items():
+            skus = list(values)
+            for start in range(0, len(skus), chunk_size):
+                chunk = skus[start:start + chunk_size]
+                results['results'].extend(self._update_chunk(field, {sku: values[sku] for sku in chunk}))
+        
+        results['success'] = sum(1 for r in results['results'] if r['status'] == 'updated')
+        results['failed'] = len(results['results']) - results['success']
+        if results['success']:
+            self.invalidate_statistics()
         return results
     
+    def _update_chunk(self, field: str, values: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """Un bloque de bulk_update_field en una transacción: SKUs existentes + un UPDATE con CASE"""
+        skus = list(values)
+        table = self.config.get('table', 'default_table')
+        placeholders = ', '.join(['%s'] * len(skus))
+        cases = ' '.join(['WHEN %s THEN %s'] * len(skus))
+        params: List[Any] = [item for sku in skus for item in (sku, values[sku])]
+        try:
+            # Si algo falla antes del commit, el pool hace rollback al devolver la conexión
+            with self.connection() as connection:
+                with connection.cursor() as cursor:
+                    cursor.execute(f"SELECT SKU FROM {table} WHERE SKU IN ({placeholders})", skus)
+                    existing = {str(row['SKU']) for row in cursor.fetchall()}
+                    cursor.execute(
+                        f"UPDATE {table} SET `{field}` = CASE SKU {cases} ELSE `{field}` END "
+                        f"WHERE SKU IN ({placeholders})",
+                        params + skus
+                    )
+                    connection.commit()
+            self.invalidate_rows(skus)
+        except Exception as e:
+            self.logger.error(f"Error en actualización masiva de {field} ({len(skus)} SKUs): {e}")
+            return [{'sku': sku, 'field': field, 'status': 'failed', 'error': str(e)} for sku in skus]
+        return [{'sku': sku, 'field': field, 'status': 'updated' if sku in existing else 'not_found'}
+                for sku in skus]
+    
     def export_to_excel(self, df: pd.DataFrame, filename: str = None) -> str:
-        """Exporta DataFrame a Excel"""
+        """Exporta DataFrame a Excel (por bloques, en modo write-only)"""
         if filename is None:
             filename = f"productos_export_{datetime.now().strftime('%Y%m%d_%H%M%S')}.xlsx"
         
@@ -436,17 +716,7 @@ class DatabaseHandler:
             filepath = Path("exports") / filename
             filepath.parent.mkdir(exist_ok=True)
             
-            with pd.ExcelWriter(filepath, engine='openpyxl') as writer:
-                df.to_excel(writer, index=False, sheet_name='Productos')
-                
-                # Ajustar anchos de columna
-                worksheet = writer.sheets['Productos']
-                for idx, col in enumerate(df.columns):
-                    max_length = max(
-                        df[col].astype(str).apply(len).max(),
-                        len(col)
-                    ) + 2
-                    worksheet.column_dimensions[chr(65 + idx)].width = min(max_length, 50)
+            exporters.write_excel(df, filepath, chunk_size=self.config.get('export_chunk_size', exporters.DEFAULT_CHUNK_SIZE))
             
             self.logger.info(f"Exportado a {filepath}")
             return str(filepath)
@@ -0,0 +1,123 @@
+"""
+Trabajos de Exportación
+Ejecuta las exportaciones en segundo plano con ID, avance y reutilización de artefactos recientes
+"""
+
+import hashlib
+import logging
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, Optional
+
+# Función que genera el archivo: recibe el callback de avance (filas, total) y retorna la ruta ('' si falla)
+ExportTask = Callable[[Callable[[int, int], None]], str]
+
+
+@dataclass
+class ExportJob:
+    """Estado de una exportación"""
+    id: str
+    key: str
+    format: str
+    total: int
+    status: str = 'pending'  # pending, running, done, error
+    progress: float = 0.0
+    filepath: str = ''
+    error: Optional[str] = None
+    created_at: float = field(default_factory=time.time)
+    finished_at: Optional[float] = None
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'job_id': self.id,
+            'status': self.status,
+            'format': self.format,
+            'total': self.total,
+            'progress': round(self.progress, 3),
+            'filename': Path(self.filepath).name if self.filepath else None,
+            'error': self.error,
+        }
+
+
+class ExportJobs:
+    """
+    Cola de exportaciones en hilos de fondo. Un pedido con la misma selección y formato que otro
+    en curso, o terminado hace menos de ttl segundos (y cuyo archivo sigue existiendo), devuelve ese
+    mismo trabajo en lugar de generar otro archivo.
+    """
+
+    def __init__(self, workers: int = 2, ttl: float = 600):
+        self.logger = logging.getLogger(__name__)
+        self.ttl = ttl
+        self._executor = ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix='export')
+        self._jobs: Dict[str, ExportJob] = {}
+        self._by_key: Dict[str, str] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def make_key(skus: Iterable[str], format: str) -> str:
+        """Clave de deduplicación: formato + SKUs ordenados"""
+        digest = hashlib.sha1(format.encode('utf-8'))
+        for sku in sorted(str(s) for s in skus):
+            digest.update(b'\0' + sku.encode('utf-8'))
+        return digest.hexdigest()
+
+    def submit(self, key: str, format: str, total: int, task: ExportTask) -> ExportJob:
+        """Encola la exportación (o devuelve el trabajo equivalente vigente)"""
+        with self._lock:
+            self._expire()
+            existing = self._jobs.get(self._by_key.get(key, ''))
+            if existing is not None and self._reusable(existing):
+                self.logger.info(f"Exportación {existing.id} reutilizada ({existing.status})")
+                return existing
+
+            job = ExportJob(id=uuid.uuid4().hex, key=key, format=format, total=total)
+            self._jobs[job.id] = job
+            self._by_key[key] = job.id
+        self._executor.submit(self._run, job, task)
+        return job
+
+    def get(self, job_id: str) -> Optional[ExportJob]:
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def _reusable(self, job: ExportJob) -> bool:
+        if job.status in ('pending', 'running'):
+            return True
+        return job.status == 'done' and Path(job.filepath).exists()
+
+    def _expire(self):
+        """Olvida los trabajos terminados hace más de ttl segundos (los archivos quedan en exports/)"""
+        now = time.time()
+        for job_id, job in list(self._jobs.items()):
+            if job.finished_at is not None and now - job.finished_at > self.ttl:
+                del self._jobs[job_id]
+                if self._by_key.get(job.key) == job_id:
+                    del self._by_key[job.key]
+
+    def _run(self, job: ExportJob, task: ExportTask):
+        job.status = 'running'
+        start = time.perf_counter()
+
+        def progress(done: int, total: int):
+            job.progress = done / total if total else 1.0
+
+        try:
+            job.filepath = task(progress)
+            if job.filepath:
+                job.status = 'done'
+                job.progress = 1.0
+            else:
+                job.status = 'error'
+                job.error = 'No se pudo exportar'
+        except Exception as e:
+            self.logger.error(f"Error en la exportación {job.id}: {e}")
+            job.status = 'error'
+            job.error = str(e)
+        job.finished_at = time.time()
+        self.logger.info(f"Exportación {job.id} ({job.format}, {job.total} productos): {job.status} "
+                         f"en {time.perf_counter() - start:.1f}s")
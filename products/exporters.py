@@ -0,0 +1,154 @@
+"""
+Exportación por Bloques
+Escribe un DataFrame en Excel (xlsxwriter u openpyxl en modo write-only), CSV o Parquet
+sin armar el libro completo en memoria
+"""
+
+from pathlib import Path
+from typing import Callable, Dict, Optional, Union
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+from openpyxl import Workbook
+from openpyxl.utils import get_column_letter
+
+try:
+    import xlsxwriter
+except ImportError:  # xlsxwriter es opcional (más rápido); sin él se usa openpyxl write-only
+    xlsxwriter = None
+
+DEFAULT_CHUNK_SIZE = 2000
+# Filas usadas para estimar el ancho de cada columna
+WIDTH_SAMPLE_SIZE = 1000
+MAX_COLUMN_WIDTH = 50
+
+# Formato -> extensión del archivo
+EXTENSIONS = {'excel': 'xlsx', 'csv': 'csv', 'parquet': 'parquet', 'json': 'json'}
+
+# Callback de avance: (filas escritas, total de filas)
+Progress = Optional[Callable[[int, int], None]]
+
+
+def _report(progress: Progress, done: int, total: int):
+    if progress is not None:
+        progress(min(done, total), total)
+
+
+def column_widths(df: pd.DataFrame, sample_size: int = WIDTH_SAMPLE_SIZE,
+                  max_width: int = MAX_COLUMN_WIDTH) -> Dict[str, int]:
+    """Ancho de cada columna según el texto más largo de una muestra (largo vectorizado con .str.len())"""
+    sample = df.sample(sample_size, random_state=0) if len(df) > sample_size else df
+    widths = {}
+    for col in df.columns:
+        longest = sample[col].astype(str).str.len().max() if len(sample) else 0
+        widths[col] = int(min(max(longest if pd.notna(longest) else 0, len(str(col))) + 2, max_width))
+    return widths
+
+
+def write_excel(df: pd.DataFrame, filepath: Union[str, Path], sheet_name: str = 'Productos',
+                chunk_size: int = DEFAULT_CHUNK_SIZE, progress: Progress = None) -> Path:
+    """
+    Excel por bloques: las filas se vuelcan a disco a medida que se escriben (constant_memory de
+    xlsxwriter o write-only de openpyxl). Los anchos se fijan antes de la primera fila.
+    """
+    filepath = Path(filepath)
+    if xlsxwriter is not None:
+        return _write_excel_xlsxwriter(df, filepath, sheet_name, chunk_size, progress)
+    workbook = Workbook(write_only=True)
+    worksheet = workbook.create_sheet(title=sheet_name)
+    for idx, width in enumerate(column_widths(df).values(), start=1):
+        worksheet.column_dimensions[get_column_letter(idx)].width = width
+
+    worksheet.append([str(col) for col in df.columns])
+    for start in range(0, len(df), max(1, chunk_size)):
+        chunk = df.iloc[start:start + chunk_size]
+        # NaN/NA -> celda vacía
+        for row in chunk.astype(object).where(chunk.notna(), None).itertuples(index=False, name=None):
+            worksheet.append(row)
+        _report(progress, start + chunk_size, len(df))
+    workbook.save(filepath)
+    return filepath
+
+
+def _write_excel_xlsxwriter(df: pd.DataFrame, filepath: Path, sheet_name: str, chunk_size: int,
+                            progress: Progress) -> Path:
+    workbook = xlsxwriter.Workbook(str(filepath), {'constant_memory': True})
+    try:
+        worksheet = workbook.add_worksheet(sheet_name)
+        for idx, width in enumerate(column_widths(df).values()):
+            worksheet.set_column(idx, idx, width)
+
+        worksheet.write_row(0, 0, [str(col) for col in df.columns])
+        row_number = 1
+        for start in range(0, len(df), max(1, chunk_size)):
+            chunk = df.iloc[start:start + chunk_size]
+            for row in chunk.astype(object).where(chunk.notna(), None).itertuples(index=False, name=None):
+                worksheet.write_row(row_number, 0, row)
+                row_number += 1
+            _report(progress, start + chunk_size, len(df))
+    finally:
+        workbook.close()
+    return filepath
+
+
+def write_csv(df: pd.DataFrame, filepath: Union[str, Path], chunk_size: int = DEFAULT_CHUNK_SIZE,
+              progress: Progress = None) -> Path:
+    """CSV en UTF-8 con BOM (Excel reconoce los acentos), escrito por bloques"""
+    filepath = Path(filepath)
+    chunk_size = max(1, chunk_size)
+    with open(filepath, 'w', encoding='utf-8-sig', newline='') as f:
+        df.iloc[:0].to_csv(f, index=False)
+        for start in range(0, len(df), chunk_size):
+            df.iloc[start:start + chunk_size].to_csv(f, index=False, header=False)
+            _report(progress, start + chunk_size, len(df))
+    return filepath
+
+
+def write_parquet(df: pd.DataFrame, filepath: Union[str, Path], chunk_size: int = DEFAULT_CHUNK_SIZE,
+                  progress: Progress = None) -> Path:
+    """Parquet con un row group por bloque (conserva los tipos de la caché)"""
+    filepath = Path(filepath)
+    table = pa.Table.from_pandas(_arrow_compatible(df), preserve_index=False)
+    written = 0
+    with pq.ParquetWriter(filepath, table.schema) as writer:
+        for batch in table.to_batches(max_chunksize=max(1, chunk_size)):
+            writer.write_batch(batch)
+            written += batch.num_rows
+            _report(progress, written, len(df))
+    return filepath
+
+
+def _arrow_compatible(df: pd.DataFrame) -> pd.DataFrame:
+    """Columnas object con tipos mezclados (p. ej. Stock: 5 y 'Consultar') pasan a texto"""
+    mixed = []
+    for col in df.columns[df.dtypes == object]:
+        try:
+            pa.array(df[col], from_pandas=True)
+        except (pa.ArrowInvalid, pa.ArrowTypeError):
+            mixed.append(col)
+    if not mixed:
+        return df
+    return df.astype({col: 'string' for col in mixed})
+
+
+def write_json(df: pd.DataFrame, filepath: Union[str, Path], progress: Progress = None) -> Path:
+    """JSON con una lista de registros (mismo formato que la exportación original)"""
+    filepath = Path(filepath)
+    df.to_json(filepath, orient='records', force_ascii=False, indent=2)
+    _report(progress, len(df), len(df))
+    return filepath
+
+
+def export_dataframe(df: pd.DataFrame, filepath: Union[str, Path], format: str = 'excel',
+                     chunk_size: int = DEFAULT_CHUNK_SIZE, progress: Progress = None) -> Path:
+    """Exporta en el formato pedido ('excel', 'csv', 'parquet' o 'json'); progress recibe (filas, total)"""
+    if format == 'excel':
+        return write_excel(df, filepath, chunk_size=chunk_size, progress=progress)
+    if format == 'csv':
+        return write_csv(df, filepath, chunk_size=chunk_size, progress=progress)
+    if format == 'parquet':
+        return write_parquet(df, filepath, chunk_size=chunk_size, progress=progress)
+    if format == 'json':
+        return write_json(df, filepath, progress=progress)
+    raise ValueError(f"Formato de exportación no soportado: {format}")
@@ -0,0 +1,119 @@
+"""
+Motor de Facetas
+Conteos por valor (Familia, Marca, Combustible) y por rango (potencia, precio) sobre el catálogo cacheado
+"""
+
+import logging
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from .filter_engine import FilterEngine, FilterIndex
+
+
+class FacetEngine:
+    """
+    Conteo disjuntivo: cada faceta cuenta las filas que cumplen todos los filtros menos los suyos,
+    así el sidebar muestra cuántos productos quedarían al elegir cada opción.
+    Usa el FilterIndex de FilterEngine (misma semántica de filtros que el SQL).
+    """
+
+    # Faceta -> columna del catálogo (valores normalizados como en el filtro)
+    VALUE_FACETS = {'familia': 'Familia', 'marca': 'Marca', 'combustible': 'Combustible'}
+    # Faceta -> (atributo numérico del FilterIndex, límites de los rangos)
+    RANGE_FACETS = {
+        'potencia': ('potencia', [0, 5, 10, 20, 50, 100, 200, np.inf]),
+        'precio': ('precio', [0, 500, 1000, 2500, 5000, 10000, 25000, np.inf]),
+    }
+    # Filtros que ignora cada faceta al contar
+    FACET_FILTERS = {
+        'familia': ('familia',),
+        'marca': ('marca',),
+        'combustible': ('combustible',),
+        'potencia': ('potencia_min', 'potencia_max'),
+        'precio': ('precio_min', 'precio_max'),
+    }
+    # Máscaras recordadas por combinación de filtros (al cambiar un filtro solo se recalculan las afectadas)
+    MASK_CACHE_SIZE = 64
+    # Claves del diccionario de filtros que no restringen filas
+    IGNORED_KEYS = ('order_by', 'order_dir', 'limit', 'after_sku')
+
+    def __init__(self, filter_engine: Optional[FilterEngine] = None):
+        self.logger = logging.getLogger(__name__)
+        self.filter_engine = filter_engine or FilterEngine()
+        self._key: Optional[Hashable] = None
+        self._codes: Dict[str, np.ndarray] = {}
+        self._labels: Dict[str, List[Any]] = {}
+        self._masks: 'OrderedDict[Any, np.ndarray]' = OrderedDict()
+
+    def facets(self, df: pd.DataFrame, filters: Dict[str, Any], key: Optional[Hashable] = None,
+               valid: Optional[np.ndarray] = None, search_index=None) -> Dict[str, Any]:
+        """
+        Conteos de cada faceta para los filtros dados. valid descarta filas (p. ej. las que la
+        validación removió); key identifica la versión de df para reutilizar índices y máscaras.
+        """
+        if df.empty:
+            return {'total': 0, **{name: [] for name in self.FACET_FILTERS}}
+
+        idx = self.filter_engine.get_index(df, key)
+        self._prepare(df, idx, key)
+        active = {k: v for k, v in filters.items() if k not in self.IGNORED_KEYS and v is not None and v != ''}
+        valid = np.ones(idx.size, dtype=bool) if valid is None else valid
+
+        result: Dict[str, Any] = {'total': int((self._mask(df, active, key, search_index) & valid).sum())}
+        for name, own_filters in self.FACET_FILTERS.items():
+            others = {k: v for k, v in active.items() if k not in own_filters}
+            mask = self._mask(df, others, key, search_index) & valid
+            codes = self._codes[name][mask]
+            counts = np.bincount(codes[codes >= 0], minlength=len(self._labels[name]))
+            result[name] = [dict(label, count=int(count))
+                            for label, count in zip(self._labels[name], counts) if count > 0]
+        return result
+
+    def _mask(self, df: pd.DataFrame, filters: Dict[str, Any], key: Optional[Hashable], search_index) -> np.ndarray:
+        cache_key = tuple(sorted((k, repr(v)) for k, v in filters.items()))
+        mask = self._masks.get(cache_key) if key is not None else None
+        if mask is None:
+            mask = self.filter_engine.build_mask(df, filters, key=key, search_index=search_index)
+            if key is not None:
+                self._masks[cache_key] = mask
+                if len(self._masks) > self.MASK_CACHE_SIZE:
+                    self._masks.popitem(last=False)
+        else:
+            self._masks.move_to_end(cache_key)
+        return mask
+
+    def _prepare(self, df: pd.DataFrame, idx: FilterIndex, key: Optional[Hashable]):
+        """Códigos por fila de cada faceta (una vez por versión del catálogo)"""
+        if key is not None and key == self._key and self._codes:
+            return
+        self._key = key
+        self._masks.clear()
+
+        for name, column in self.VALUE_FACETS.items():
+            normalized = idx.column(column)
+            blank = pd.isna(normalized) | (normalized == '')
+            codes, uniques = pd.factorize(np.where(blank, None, normalized), sort=True, use_na_sentinel=True)
+            # Se muestra el valor original más frecuente de cada grupo normalizado
+            raw = df[column].astype(object).to_numpy() if column in df.columns else normalized
+            pairs = pd.DataFrame({'code': codes, 'raw': raw})[codes >= 0]
+            display = pairs.value_counts().reset_index().drop_duplicates('code').set_index('code')['raw']
+            self._codes[name] = codes
+            self._labels[name] = [{'value': str(display.get(code, value)).strip()}
+                                  for code, value in enumerate(uniques)]
+
+        for name, (attribute, edges) in self.RANGE_FACETS.items():
+            values = getattr(idx, attribute)
+            # Rangos (min, max], con max inclusivo como potencia_max/precio_max; el primero incluye su mínimo
+            codes = np.maximum(np.searchsorted(edges, values, side='left') - 1, 0)
+            codes[np.isnan(values) | (values < edges[0])] = -1
+            self._codes[name] = codes.astype(np.intp)
+            self._labels[name] = [self._range_label(low, high) for low, high in zip(edges[:-1], edges[1:])]
+
+    @staticmethod
+    def _range_label(low: float, high: float) -> Dict[str, Any]:
+        if np.isinf(high):
+            return {'value': f'{low:g}+', 'min': low, 'max': None}
+        return {'value': f'{low:g}-{high:g}', 'min': low, 'max': high}
@@ -0,0 +1,221 @@
+"""
+Motor de Filtros en Memoria
+Evalúa los filtros de ProductFilters sobre el catálogo cacheado con máscaras de NumPy
+"""
+
+import unicodedata
+from typing import Any, Dict, Hashable, Optional
+
+import numpy as np
+import pandas as pd
+
+from .catalog_ingest import PARSED_COLUMNS, STOCK_CON_STOCK, STOCK_CONSULTAR, STOCK_DISPONIBLE, parse_catalog_columns
+
+
+def normalize_text(series: pd.Series) -> np.ndarray:
+    """
+    Normaliza texto como la collation de MySQL (*_ci): sin mayúsculas, sin acentos
+    y sin espacios finales. Los NULL quedan como None.
+    """
+    codes, uniques = pd.factorize(series.astype(object), use_na_sentinel=True)
+    normalized = np.array([normalize_value(v) for v in uniques] + [None], dtype=object)
+    # El código -1 (NULL) apunta al último elemento
+    return normalized[codes]
+
+
+def normalize_value(value: Any) -> str:
+    """Normaliza un valor suelto con las mismas reglas que normalize_text"""
+    text = unicodedata.normalize('NFKD', str(value))
+    text = ''.join(c for c in text if not unicodedata.combining(c))
+    return text.casefold().rstrip()
+
+
+class FilterIndex:
+    """Texto normalizado y columnas numéricas de un frame para evaluar filtros"""
+
+    TEXT_COLUMNS = ['SKU', 'Descripción', 'Modelo', 'Marca', 'Familia', 'Combustible',
+                    'Cabina', 'TTA_Incluido', 'URL_PDF']
+
+    def __init__(self, df: pd.DataFrame):
+        self.size = len(df)
+        self.text: Dict[str, np.ndarray] = {}
+        for col in self.TEXT_COLUMNS:
+            if col in df.columns:
+                self.text[col] = normalize_text(df[col])
+        # La réplica ya trae las columnas parseadas en la ingesta; si no, se parsean aquí
+        parsed = df if all(col in df.columns for col in PARSED_COLUMNS) else parse_catalog_columns(df)
+        self.stock = parsed['Stock_Numerico'].to_numpy(dtype=float, na_value=np.nan)
+        self.stock_state = parsed['Stock_Estado'].astype(object).to_numpy()
+        self.precio = parsed['Precio_Numerico'].to_numpy(dtype=float, na_value=np.nan)
+        self.potencia = parsed['Potencia_Numerica'].to_numpy(dtype=float, na_value=np.nan)
+
+    def column(self, name: str) -> np.ndarray:
+        """Texto normalizado de una columna (todo NULL si no existe)"""
+        if name in self.text:
+            return self.text[name]
+        return np.full(self.size, None, dtype=object)
+
+
+class FilterEngine:
+    """Evalúa el diccionario de ProductFilters.apply_filter con la misma semántica que el SQL"""
+
+    ORDER_COLUMNS = ['SKU', 'Descripción', 'Marca', 'Familia', 'Stock', 'Precio_USD_con_IVA', 'Potencia']
+
+    def __init__(self):
+        self._index: Optional[FilterIndex] = None
+        self._index_key: Optional[Hashable] = None
+
+    def get_index(self, df: pd.DataFrame, key: Optional[Hashable] = None) -> FilterIndex:
+        """Construye (o reutiliza, si la clave coincide) el índice de columnas del frame"""
+        if key is None or key != self._index_key or self._index is None or self._index.size != len(df):
+            self._index = FilterIndex(df)
+            self._index_key = key
+        return self._index
+
+    def build_mask(self, df: pd.DataFrame, filters: Dict[str, Any], key: Optional[Hashable] = None,
+                   search_index=None) -> np.ndarray:
+        """
+        Máscara booleana de las filas que cumplen todos los filtros.
+        search_index (SearchIndex construido sobre el mismo df) acelera search_text.
+        """
+        return self._mask(self.get_index(df, key), filters, search_index)
+
+    def _mask(self, idx: FilterIndex, filters: Dict[str, Any], search_index=None) -> np.ndarray:
+        mask = np.ones(idx.size, dtype=bool)
+
+        if filters.get('familia'):
+            mask &= self._equals(idx.column('Familia'), filters['familia'])
+
+        if filters.get('marca'):
+            mask &= self._equals(idx.column('Marca'), filters['marca'])
+
+        # Stock: Stock_Numerico equivale a CAST(Stock AS SIGNED)
+        if filters.get('stock_min') is not None:
+            mask &= self._compare(idx.stock, '>=', filters['stock_min'])
+
+        if filters.get('stock_max') is not None:
+            mask &= self._compare(idx.stock, '<=', filters['stock_max'])
+
+        if filters.get('stock_disponible'):
+            mask &= np.isin(idx.stock_state, [STOCK_DISPONIBLE, STOCK_CON_STOCK])
+
+        if filters.get('stock_consultar'):
+            mask &= idx.stock_state == STOCK_CONSULTAR
+
+        # Precio y potencia
+        if filters.get('precio_min') is not None:
+            mask &= self._compare(idx.precio, '>=', filters['precio_min'])
+
+        if filters.get('precio_max') is not None:
+            mask &= self._compare(idx.precio, '<=', filters['precio_max'])
+
+        if filters.get('potencia_min') is not None:
+            mask &= self._compare(idx.potencia, '>=', filters['potencia_min'])
+
+        if filters.get('potencia_max') is not None:
+            mask &= self._compare(idx.potencia, '<=', filters['potencia_max'])
+
+        # Combustible LIKE %x%
+        if filters.get('combustible'):
+            mask &= self._contains(idx.column('Combustible'), filters['combustible'])
+
+        # Cabina, TTA y PDF
+        if filters.get('has_cabina') is not None:
+            cabina = idx.column('Cabina')
+            sin_cabina = self._is_blank(cabina) | self._equals(cabina, 'Sin Cabina')
+            mask &= ~sin_cabina if filters['has_cabina'] else sin_cabina
+
+        if filters.get('has_tta') is not None:
+            tta = idx.column('TTA_Incluido')
+            if filters['has_tta']:
+                mask &= self._equals(tta, 'Sí') | self._equals(tta, '1')
+            else:
+                mask &= self._equals(tta, 'No') | self._equals(tta, '0') | self._is_null(tta)
+
+        if filters.get('has_pdf') is not None:
+            sin_pdf = self._is_blank(idx.column('URL_PDF'))
+            mask &= ~sin_pdf if filters['has_pdf'] else sin_pdf
+
+        # Búsqueda de texto en SKU, Descripción, Modelo y Marca
+        if filters.get('search_text'):
+            if search_index is not None and len(normalize_value(filters['search_text'])) >= search_index.GRAM:
+                mask &= search_index.match_mask(filters['search_text'], idx.size)
+                return mask
+            text_mask = np.zeros(idx.size, dtype=bool)
+            for col in ['SKU', 'Descripción', 'Modelo', 'Marca']:
+                text_mask |= self._contains(idx.column(col), filters['search_text'])
+            mask &= text_mask
+
+        return mask
+
+    def select(self, df: pd.DataFrame, filters: Dict[str, Any], key: Optional[Hashable] = None,
+               search_index=None) -> np.ndarray:
+        """Posiciones de las filas resultantes, ya ordenadas y limitadas (after_sku y limit incluidos)"""
+        if df.empty:
+            return np.zeros(0, dtype=np.intp)
+        idx = self.get_index(df, key)
+        mask = self._mask(idx, filters, search_index)
+
+        order_by = filters.get('order_by', 'SKU')
+        descending = str(filters.get('order_dir', 'ASC')).upper() == 'DESC'
+        if order_by not in self.ORDER_COLUMNS:
+            order_by, descending = 'SKU', False
+
+        # Paginación keyset: solo aplica al ordenar por SKU (clave única)
+        if filters.get('after_sku') and order_by == 'SKU':
+            skus = idx.column('SKU')
+            skus = np.where(pd.isna(skus), '', skus).astype(str)
+            after = normalize_value(filters['after_sku'])
+            mask &= skus < after if descending else skus > after
+
+        positions = self._order(idx, np.flatnonzero(mask), order_by, descending)
+
+        limit = filters.get('limit')
+        if limit and isinstance(limit, int) and limit > 0:
+            positions = positions[:limit]
+        return positions
+
+    def evaluate(self, df: pd.DataFrame, filters: Dict[str, Any], key: Optional[Hashable] = None) -> pd.DataFrame:
+        """Aplica filtros, ordenamiento y límite; retorna un frame nuevo con índice 0..n-1"""
+        return df.iloc[self.select(df, filters, key)].reset_index(drop=True)
+
+    def _order(self, idx: FilterIndex, positions: np.ndarray, order_by: str, descending: bool) -> np.ndarray:
+        """Ordena las posiciones; NULL primero en ASC y último en DESC, como MySQL. Empates por orden del catálogo"""
+        if order_by == 'Stock':
+            keys = idx.stock[positions]
+        elif order_by == 'Precio_USD_con_IVA':
+            keys = idx.precio[positions]
+        elif order_by == 'Potencia':
+            keys = idx.potencia[positions]
+        else:
+            keys = idx.column(order_by)[positions]
+
+        # factorize ordenado da rangos densos con -1 para NULL
+        ranks, _ = pd.factorize(pd.Series(keys), sort=True, use_na_sentinel=True)
+        if descending:
+            ranks = -ranks
+        return positions[np.lexsort((positions, ranks))]
+
+    def _equals(self, values: np.ndarray, target: Any) -> np.ndarray:
+        return values == normalize_value(target)
+
+    def _contains(self, values: np.ndarray, needle: Any) -> np.ndarray:
+        needle = normalize_value(needle)
+        return pd.Series(values, dtype=object).str.contains(needle, regex=False, na=False).to_numpy(dtype=bool)
+
+    @staticmethod
+    def _is_null(values: np.ndarray) -> np.ndarray:
+        return pd.isna(values)
+
+    @staticmethod
+    def _is_blank(values: np.ndarray) -> np.ndarray:
+        return pd.isna(values) | (values == '')
+
+    @staticmethod
+    def _compare(values: np.ndarray, op: str, target: Any) -> np.ndarray:
+        """Comparación numérica donde NULL nunca cumple (igual que en SQL)"""
+        target = float(target)
+        with np.errstate(invalid='ignore'):
+            if op == '>=':
+                return values >= target
+            return values <= target
@@ -0,0 +1,77 @@
+"""
+Payloads para Procesamiento
+Secuencia perezosa de productos seleccionados: los dicts se arman por bloques a medida que se consumen
+"""
+
+from collections.abc import Sequence
+from typing import Any, Dict, Iterator, List
+
+import pandas as pd
+
+from .streaming import to_records
+
+# Campo del payload -> (columna del catálogo, valor si la columna no existe)
+PAYLOAD_FIELDS = {
+    'sku': ('SKU', None),
+    'nombre': ('Descripción', None),
+    'marca': ('Marca', ''),
+    'modelo': ('Modelo', ''),
+    'familia': ('Familia', ''),
+    'precio': ('Precio_USD_con_IVA', 0),
+    'stock': ('Stock', 0),
+    'pdf_url': ('URL_PDF', ''),
+}
+
+
+class ProcessingPayloads(Sequence):
+    """
+    Lista de solo lectura con el formato de prepare_for_processing. Cada bloque de CHUNK_SIZE filas
+    se convierte con to_dict('records') recién cuando se accede a él, así un lote grande empieza
+    a procesarse sin esperar a que se armen todos los payloads.
+    """
+
+    CHUNK_SIZE = 200
+
+    def __init__(self, df: pd.DataFrame, chunk_size: int = CHUNK_SIZE):
+        self._df = df.reset_index(drop=True)
+        self.chunk_size = max(1, chunk_size)
+        # Solo se conserva el último bloque armado (acceso secuencial sin acumular memoria)
+        self._chunk_start = -1
+        self._chunk: List[Dict[str, Any]] = []
+
+    def __len__(self) -> int:
+        return len(self._df)
+
+    def __getitem__(self, item):
+        if isinstance(item, slice):
+            return [self[i] for i in range(*item.indices(len(self)))]
+        if item < 0:
+            item += len(self)
+        if not 0 <= item < len(self):
+            raise IndexError('ProcessingPayloads: índice fuera de rango')
+        start = item - item % self.chunk_size
+        return self._load_chunk(start)[item - start]
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        for start in range(0, len(self), self.chunk_size):
+            yield from self._load_chunk(start)
+
+    def to_list(self) -> List[Dict[str, Any]]:
+        """Todos los payloads (p. ej. para serializar el lote completo)"""
+        return list(self)
+
+    def _load_chunk(self, start: int) -> List[Dict[str, Any]]:
+        if start != self._chunk_start:
+            self._chunk = self._build(self._df.iloc[start:start + self.chunk_size])
+            self._chunk_start = start
+        return self._chunk
+
+    @staticmethod
+    def _build(df: pd.DataFrame) -> List[Dict[str, Any]]:
+        """Payloads de un bloque: NaN/NA -> None en una sola conversión vectorizada"""
+        payloads = []
+        for record in to_records(df):
+            product = {field: record.get(column, default) for field, (column, default) in PAYLOAD_FIELDS.items()}
+            product['row_data'] = record  # Datos completos
+            payloads.append(product)
+        return payloads
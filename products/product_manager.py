@@ -5,23 +5,75 @@ Coordina la base de datos, filtros y operaciones
 
 import pandas as pd
 import numpy as np
-from typing import Dict, List, Any, Optional, Callable
+from typing import Dict, List, Any, Optional, Callable, Sequence
 import logging
 from datetime import datetime
 import json
+import time
 from pathlib import Path
 
 from .database_handler import DatabaseHandler
 from .product_filters import ProductFilters, FilterCriteria
+from .catalog_mirror import CatalogMirror
+from .data_validator import DataValidator
+from .filter_engine import FilterEngine
+from .facet_engine import FacetEngine
+from .search_index import SearchIndex
+from .catalog_ingest import PARSED_COLUMNS, add_parsed_columns
+from .streaming import to_records
+from .processing_payloads import ProcessingPayloads
+from .export_jobs import ExportJobs
+from . import exporters
+
+try:
+    # Texto en Arrow con NaN como faltante (el mismo tipo 'str' por defecto de pandas 3)
+    TEXT_DTYPE = pd.StringDtype('pyarrow', na_value=np.nan)
+except TypeError:  # pandas sin soporte de na_value: el texto queda como object
+    TEXT_DTYPE = None
 
 class ProductManager:
     """Gestor principal del módulo de productos"""
     
+    # Representación compacta de la caché de productos
+    CATEGORY_COLUMNS = ['Familia', 'Marca', 'Combustible', 'Cabina', 'TTA_Incluido', 'Potencia']
+    TEXT_COLUMNS = ['SKU', 'Descripción', 'Modelo', 'URL_PDF', 'Precio_Formateado']
+    NULLABLE_COLUMNS = {
+        'Precio_USD_con_IVA': 'Float64',
+        'Precio_Numerico': 'Float64',
+        'Potencia_Numerica': 'Float64',
+        'Stock_Numerico': 'Int64'
+    }
+    
     def __init__(self):
         self.db_handler = DatabaseHandler()
         self.filters = ProductFilters()
         self.selected_products = set()
         self.product_cache = pd.DataFrame()
+        self.next_cursor: Optional[str] = None
+        
+        # Réplica local del catálogo: MySQL solo se consulta para sincronizar
+        config = self.db_handler.config
+        self.mirror: Optional[CatalogMirror] = None
+        if config.get('use_local_mirror', True):
+            self.mirror = CatalogMirror(config.get('mirror_path', 'cache'), config.get('table', ''),
+                                        profile=config.get('mirror_profile', 'list'))
+        self.mirror_sync_interval = config.get('mirror_sync_interval', 60)
+        self.mirror_max_staleness = config.get('mirror_max_staleness', 900)
+        # Caché de validación por huella de fila (persistida junto a la réplica)
+        validation_cache = None
+        if self.mirror is not None and config.get('validation_cache', False):
+            validation_cache = str(Path(config.get('mirror_path', 'cache')) / 'validation_cache.arrow')
+        self.validator = DataValidator(cache_path=validation_cache)
+        self.filter_engine = FilterEngine()
+        self.facet_engine = FacetEngine(self.filter_engine)
+        self.export_jobs = ExportJobs(workers=config.get('export_workers', 2), ttl=config.get('export_job_ttl', 600))
+        self.search_index = SearchIndex()
+        self._search_version = -1
+        self._catalog = pd.DataFrame()
+        self._catalog_version = -1
+        self._catalog_rows = np.zeros(0, dtype=np.intp)
+        self._catalog_index = pd.Index([], dtype=object)
+        
         self.callbacks = {
             'on_selection_change': None,
             'on_filter_change': None,
@@ -29,6 +81,105 @@ class ProductManager:
         }
         self.logger = logging.getLogger(__name__)
         
+    @property
+    def product_cache(self) -> pd.DataFrame:
+        """Productos visibles (último listado o filtro)"""
+        return self._product_cache
+    
+    @product_cache.setter
+    def product_cache(self, df: pd.DataFrame):
+        """Al reemplazar la caché se reconstruyen el índice SKU -> posición y el vector de selección"""
+        self._product_cache = df
+        # SKU -> fila; se construye en la primera búsqueda por SKU
+        self._sku_to_row: Optional[Dict[str, int]] = None
+        if df.empty or 'SKU' not in df.columns:
+            self._sku_index = pd.Index([], dtype=object)
+            self._selection = np.zeros(len(df), dtype=bool)
+            return
+        self._sku_index = pd.Index(df['SKU'].astype(str))
+        self._selection = np.array(self._sku_index.isin(self.selected_products), dtype=bool)
+        df['selected'] = self._selection.copy()
+    
+    def _sku_positions(self, skus) -> np.ndarray:
+        """Posiciones en product_cache de los SKUs dados (búsqueda en el índice, sin recorrer el frame)"""
+        if not len(self._sku_index):
+            return np.zeros(0, dtype=np.intp)
+        if self._sku_to_row is None:
+            unique = self._sku_index.is_unique
+            self._sku_to_row = dict(zip(self._sku_index.tolist(), range(len(self._sku_index)))) if unique else {}
+        if self._sku_to_row:
+            rows = self._sku_to_row
+            return np.array([rows[sku] for sku in map(str, skus) if sku in rows], dtype=np.intp)
+        # SKUs repetidos: el índice devuelve todas las posiciones
+        positions = self._sku_index.get_indexer_for([str(sku) for sku in skus])
+        return positions[positions >= 0]
+    
+    @staticmethod
+    def _index_positions(index: pd.Index, skus) -> np.ndarray:
+        """Posición de cada SKU en index (primera aparición si hay repetidos); -1 si no está"""
+        if not len(index):
+            return np.full(len(skus), -1, dtype=np.intp)
+        if index.is_unique:
+            return index.get_indexer(skus)
+        first = np.flatnonzero(~index.duplicated())
+        positions = index[first].get_indexer(skus)
+        return np.where(positions >= 0, first[positions], -1)
+    
+    def get_products_by_skus(self, skus, profile: Optional[str] = None) -> pd.DataFrame:
+        """
+        Filas preparadas de los SKUs pedidos (en ese orden). Se buscan con los índices de SKU de
+        product_cache y del catálogo; los que no están en memoria se piden a la BD en una sola consulta.
+        Con profile ('detail', 'generation') se completan con las columnas de ese perfil.
+        """
+        skus = list(dict.fromkeys(str(sku) for sku in skus))
+        if not skus:
+            return pd.DataFrame()
+        
+        parts = []
+        pending = np.array(skus, dtype=object)
+        for df, index in ((self._product_cache, self._sku_index), (self._catalog, self._catalog_index)):
+            if df.empty or not len(pending):
+                continue
+            positions = self._index_positions(index, pending)
+            parts.append(df.iloc[positions[positions >= 0]])
+            pending = pending[positions < 0]
+        
+        if len(pending):
+            self.logger.info(f"get_products_by_skus: {len(pending)} SKUs no están en memoria, se leen de la BD")
+            fetched = self.db_handler.get_products_by_ids(pending.tolist(), profile='list')
+            if not fetched.empty:
+                fetched = fetched.drop_duplicates(subset=['SKU'], keep='first').reset_index(drop=True)
+                parts.append(self._prepare_dataframe(fetched))
+        
+        parts = [part for part in parts if not part.empty]
+        if not parts:
+            return pd.DataFrame()
+        result = parts[0] if len(parts) == 1 else self._compact_dtypes(pd.concat(parts, ignore_index=True))
+        order = self._index_positions(pd.Index(result['SKU'].astype(str)), skus)
+        result = result.iloc[order[order >= 0]].reset_index(drop=True)
+        result['selected'] = result['SKU'].isin(self.selected_products)
+        return self._with_profile(result, profile)
+    
+    def set_selection(self, skus):
+        """Reemplaza la selección por los SKUs dados (p. ej. la selección enviada por el frontend)"""
+        self.selected_products = set(str(sku) for sku in skus)
+        self._selection = np.array(self._sku_index.isin(self.selected_products), dtype=bool)
+        if not self._product_cache.empty:
+            self._product_cache['selected'] = self._selection.copy()
+        
+        if self.callbacks['on_selection_change']:
+            self.callbacks['on_selection_change'](len(self.selected_products))
+    
+    def _mark_selected(self, positions, selected: bool):
+        """Actualiza el vector de selección y la columna 'selected' solo en las posiciones dadas"""
+        self._selection[positions] = selected
+        if 'selected' in self._product_cache.columns:
+            column = self._product_cache.columns.get_loc('selected')
+            if isinstance(positions, np.ndarray) and len(positions) == 1:
+                self._product_cache.iat[int(positions[0]), column] = selected
+            else:
+                self._product_cache.iloc[positions, column] = selected
+    
     def set_callback(self, event_name: str, callback: Callable):
         """Establece callbacks para eventos"""
         if event_name in self.callbacks:
@@ -38,42 +189,81 @@ class ProductManager:
         """Prueba la conexión a la base de datos"""
         return self.db_handler.test_connection()
 
-    def refresh_products(self, use_filter: bool = True) -> pd.DataFrame:
-        """Recarga la lista de productos desde la BD con manejo robusto de caché"""
+    def refresh_products(self, use_filter: bool = True, cursor: Optional[str] = None,
+                         page_size: Optional[int] = None) -> pd.DataFrame:
+        """
+        Recarga la lista de productos desde la BD con manejo robusto de caché.
+        Con page_size se trae una sola página (paginación por cursor de SKU): la página
+        se retorna y se acumula en product_cache, y self.next_cursor indica la siguiente.
+        """
         try:
-            self.logger.info(f"refresh_products: Iniciando recarga - use_filter={use_filter}")
+            self.logger.info(f"refresh_products: Iniciando recarga - use_filter={use_filter}, cursor={cursor!r}, page_size={page_size}")
             
-            # Invalidar caché completamente
-            self.product_cache = pd.DataFrame()
+            # Una página intermedia se agrega a la caché; cualquier otra recarga la invalida
+            appending = bool(page_size and cursor)
+            if not appending:
+                self.product_cache = pd.DataFrame()
+            self.next_cursor = None
+            prepared = False
             
-            # Obtener datos desde la base de datos
+            # Obtener datos desde la base de datos o la réplica local
             if use_filter and self.filters.current_filter != FilterCriteria():
                 self.logger.info(f"refresh_products: Aplicando filtros: {self.filters.current_filter.__dict__}")
                 filter_dict = self.filters.apply_filter(self.filters.current_filter)
-                self.product_cache = self.db_handler.get_products_filtered(filter_dict)
+                paged = bool(page_size) and filter_dict.get('order_by', 'SKU') == 'SKU'
+                if paged:
+                    filter_dict['after_sku'] = cursor
+                    filter_dict['limit'] = page_size + 1
+                # Con otro orden no hay cursor estable: se retorna el resultado completo
+                df = self._filter_catalog(filter_dict)
+                if df is not None:
+                    prepared = True
+                else:
+                    df = self.db_handler.get_products_filtered(filter_dict)
+                if paged and len(df) > page_size:
+                    df = df.iloc[:page_size]
+                    self.next_cursor = str(df['SKU'].iloc[-1])
+            elif self.mirror is not None:
+                self.logger.info("refresh_products: Obteniendo productos desde la réplica local")
+                df = self.get_catalog()
+                if page_size:
+                    df, self.next_cursor = self._slice_page(df, cursor, page_size)
+                # La réplica ya está preparada; solo se actualiza el estado de selección
+                df = df.copy()
+                df['selected'] = df['SKU'].isin(self.selected_products)
+                prepared = True
+            elif page_size:
+                self.logger.info("refresh_products: Obteniendo página de productos sin filtros")
+                df, self.next_cursor = self.db_handler.get_products_page(cursor, page_size)
             else:
                 self.logger.info("refresh_products: Obteniendo todos los productos sin filtros")
-                self.product_cache = self.db_handler.get_all_products()
+                df = self.db_handler.get_all_products()
             
             # Validar datos obtenidos
-            if self.product_cache.empty:
+            if df.empty:
                 self.logger.warning("refresh_products: No se obtuvieron datos de la base de datos")
                 return pd.DataFrame()
             
-            self.logger.info(f"refresh_products: Obtenidos {len(self.product_cache)} registros de la BD")
+            self.logger.info(f"refresh_products: Obtenidos {len(df)} registros de la BD")
             
-            # Validación adicional de calidad de datos
-            self._validate_data_quality()
-            
-            # Preparar DataFrame para la interfaz
-            self.product_cache = self._prepare_dataframe(self.product_cache)
+            if not prepared:
+                # Validación adicional de calidad de datos
+                self._validate_data_quality(df)
+                
+                # Preparar DataFrame para la interfaz
+                df = self._prepare_dataframe(df)
+            if appending and not self.product_cache.empty:
+                # Las categorías de cada página pueden diferir: se vuelve a compactar al unir
+                self.product_cache = self._compact_dtypes(pd.concat([self.product_cache, df], ignore_index=True))
+            else:
+                self.product_cache = df
             
             # Notificar callback
             if self.callbacks['on_data_refresh']:
                 self.callbacks['on_data_refresh'](len(self.product_cache))
             
-            self.logger.info(f"refresh_products: Completado exitosamente - {len(self.product_cache)} productos listos")
-            return self.product_cache
+            self.logger.info(f"refresh_products: Completado exitosamente - {len(df)} productos listos")
+            return df
             
         except Exception as e:
             self.logger.error(f"refresh_products: Error crítico: {e}")
@@ -81,34 +271,131 @@ class ProductManager:
             self.logger.error(f"refresh_products: Traceback: {traceback.format_exc()}")
             # Retornar DataFrame vacío en caso de error
             self.product_cache = pd.DataFrame()
+            self.next_cursor = None
             return self.product_cache
     
-    def _validate_data_quality(self):
+    def get_catalog(self, force_sync: bool = False) -> pd.DataFrame:
+        """
+        Retorna el catálogo completo preparado desde la réplica local.
+        En frío se carga con memory-map; luego solo se sincroniza cada mirror_sync_interval segundos.
+        """
+        if self.mirror is None:
+            return self._prepare_dataframe(self.db_handler.get_all_products())
+        
+        if self.mirror.frame.empty:
+            self.mirror.load()
+        if force_sync or self.mirror.needs_sync(self.mirror_sync_interval):
+            self.mirror.sync(self.db_handler)
+        
+        if self._catalog_version != self.mirror.version:
+            catalog = self.mirror.frame
+            if not catalog.empty:
+                # El checksum de la réplica sirve de huella: la caché solo revalida filas modificadas
+                catalog, _ = self.validator.validate_dataframe(catalog, fingerprint_column=CatalogMirror.HASH_COLUMN)
+                self._validate_data_quality(catalog)
+            catalog = catalog.drop(columns=[CatalogMirror.HASH_COLUMN], errors='ignore')
+            self._catalog = self._prepare_dataframe(catalog.reset_index(drop=True))
+            # Posición en el catálogo de cada fila cruda de la réplica (-1 si la validación la descartó)
+            if self._catalog.empty:
+                self._catalog_index = pd.Index([], dtype=object)
+                self._catalog_rows = np.full(len(self.mirror.frame), -1, dtype=np.intp)
+            else:
+                self._catalog_index = pd.Index(self._catalog['SKU'].astype(str))
+                self._catalog_rows = self._catalog_index.get_indexer(self.mirror.frame['SKU'].astype(str))
+            self._catalog_version = self.mirror.version
+        return self._catalog
+    
+    def _catalog_available(self) -> bool:
+        """Indica si la réplica tiene datos y su última sincronización está dentro de mirror_max_staleness"""
+        if self.mirror is None:
+            return False
+        catalog = self.get_catalog()
+        age = time.time() - self.mirror.meta.get('last_sync_ts', 0)
+        if catalog.empty or age > self.mirror_max_staleness:
+            self.logger.info(f"_catalog_available: réplica no disponible o desactualizada ({age:.0f}s)")
+            return False
+        return True
+    
+    def _get_search_index(self) -> SearchIndex:
+        """Índice de búsqueda sobre la réplica, actualizado de forma incremental al cambiar su versión"""
+        if self._search_version != self.mirror.version:
+            self.search_index.update(self.mirror.frame, signature_column=CatalogMirror.HASH_COLUMN)
+            self._search_version = self.mirror.version
+        return self.search_index
+    
+    def _filter_catalog(self, filter_dict: Dict[str, Any]) -> Optional[pd.DataFrame]:
+        """
+        Evalúa los filtros en memoria sobre la réplica local.
+        Retorna None si la réplica no está disponible o está desactualizada (se usa SQL).
+        """
+        if not self._catalog_available():
+            return None
+        catalog = self._catalog
+        
+        # El motor evalúa sobre los valores crudos de la réplica (misma semántica que el SQL)
+        # El límite se aplica después de descartar las filas que la validación removió
+        engine_filters = dict(filter_dict)
+        limit = engine_filters.pop('limit', None)
+        search_index = self._get_search_index() if engine_filters.get('search_text') else None
+        positions = self.filter_engine.select(self.mirror.frame, engine_filters, key=self.mirror.version,
+                                              search_index=search_index)
+        rows = self._catalog_rows[positions]
+        rows = rows[rows >= 0]
+        if limit and isinstance(limit, int) and limit > 0:
+            rows = rows[:limit]
+        df = catalog.iloc[rows].reset_index(drop=True)
+        df['selected'] = df['SKU'].isin(self.selected_products)
+        self.logger.info(f"_filter_catalog: {len(df)} productos filtrados en memoria")
+        return df
+    
+    def sync_catalog(self) -> Dict[str, Any]:
+        """Fuerza una sincronización incremental de la réplica local"""
+        if self.mirror is None:
+            return {'status': 'disabled'}
+        if self.mirror.frame.empty:
+            self.mirror.load()
+        result = self.mirror.sync(self.db_handler)
+        result['mirror'] = self.mirror.get_info()
+        return result
+    
+    @staticmethod
+    def _slice_page(df: pd.DataFrame, cursor: Optional[str], page_size: int):
+        """Página keyset sobre un frame ordenado por SKU: filas con SKU > cursor"""
+        start = 0
+        if cursor:
+            start = int(df['SKU'].astype(str).searchsorted(cursor, side='right'))
+        page = df.iloc[start:start + page_size]
+        next_cursor = None
+        if start + page_size < len(df) and not page.empty:
+            next_cursor = str(page['SKU'].iloc[-1])
+        return page, next_cursor
+    
+    def _validate_data_quality(self, df: pd.DataFrame):
         """Valida la calidad de los datos obtenidos"""
-        if self.product_cache.empty:
+        if df.empty:
             return
         
         # Verificar que no haya filas con nombres de columnas como datos
         header_rows = 0
         for col in ['SKU', 'Descripción', 'Marca', 'Familia']:
-            if col in self.product_cache.columns:
-                header_rows += (self.product_cache[col] == col).sum()
+            if col in df.columns:
+                header_rows += (df[col] == col).sum()
         
         if header_rows > 0:
             self.logger.warning(f"_validate_data_quality: Detectadas {header_rows} filas con nombres de columnas como datos")
         
         # Verificar diversidad de datos
-        unique_skus = self.product_cache['SKU'].nunique()
-        total_rows = len(self.product_cache)
+        unique_skus = df['SKU'].nunique()
+        total_rows = len(df)
         
         if unique_skus < total_rows * 0.8:  # Menos del 80% de SKUs únicos
             self.logger.warning(f"_validate_data_quality: Baja diversidad de SKUs - {unique_skus}/{total_rows}")
         
         # Log de muestra de datos
-        if not self.product_cache.empty:
-            sample_size = min(3, len(self.product_cache))
+        if not df.empty:
+            sample_size = min(3, len(df))
             for i in range(sample_size):
-                row = self.product_cache.iloc[i]
+                row = df.iloc[i]
                 self.logger.info(f"_validate_data_quality: Muestra {i+1} - SKU: '{row.get('SKU')}', Desc: '{row.get('Descripción')[:50]}...'")
     
     def _prepare_dataframe(self, df: pd.DataFrame) -> pd.DataFrame:
@@ -116,9 +403,9 @@ class ProductManager:
         if df.empty:
             return df
         
-        # Agregar columnas calculadas
-        if 'Potencia' in df.columns:
-            df['Potencia_Numerica'] = df['Potencia'].apply(self._extract_numeric_value)
+        # Columnas parseadas (la réplica ya las trae de la ingesta)
+        if not all(col in df.columns for col in PARSED_COLUMNS):
+            df = add_parsed_columns(df)
         
         # Agregar columna de selección
         df['selected'] = df['SKU'].isin(self.selected_products)
@@ -132,36 +419,76 @@ class ProductManager:
                 lambda x: f"${x:,.2f}" if pd.notna(x) else "N/A"
             )
         
-        # Reemplazar NaN por None para compatibilidad con JSON
-        return df.replace({np.nan: None})
-    
-    def _extract_numeric_value(self, text: str) -> float:
-        """Extrae valor numérico de un texto"""
-        import re
-        if pd.isna(text):
-            return 0
-        match = re.search(r'(\d+(?:[.,]\d+)?)', str(text))
-        if match:
-            return float(match.group(1).replace(',', '.'))
-        return 0
-    
-    def apply_filter(self, criteria: FilterCriteria) -> pd.DataFrame:
-        """Aplica un filtro y actualiza los productos"""
+        # Los NaN se mantienen: la conversión a None se hace al serializar (streaming.to_records)
+        return self._compact_dtypes(df)
+    
+    def _compact_dtypes(self, df: pd.DataFrame) -> pd.DataFrame:
+        """Categorías para columnas de baja cardinalidad, numéricos nullable y texto en Arrow"""
+        for col in self.CATEGORY_COLUMNS:
+            if col not in df.columns or isinstance(df[col].dtype, pd.CategoricalDtype):
+                continue
+            # Solo conviene si los valores se repiten
+            if df[col].nunique() <= len(df) // 2:
+                df[col] = df[col].astype('category')
+        
+        for col, dtype in self.NULLABLE_COLUMNS.items():
+            if col in df.columns and df[col].dtype != dtype:
+                numeric = pd.to_numeric(df[col], errors='coerce')
+                if dtype == 'Int64':
+                    # Int64 no admite fracciones: un stock '2.5' queda en 2 (como CAST AS SIGNED)
+                    numeric = np.trunc(numeric)
+                df[col] = numeric.astype(dtype)
+        
+        if TEXT_DTYPE is not None:
+            for col in self.TEXT_COLUMNS:
+                if col in df.columns and df[col].dtype == object:
+                    df[col] = df[col].astype(TEXT_DTYPE)
+        return df
+    
+    def memory_footprint(self) -> Dict[str, Any]:
+        """Memoria (bytes) de la caché de productos, el catálogo preparado y la réplica"""
+        def _bytes(df: pd.DataFrame) -> int:
+            return int(df.memory_usage(deep=True).sum()) if not df.empty else 0
+        
+        footprint = {
+            'product_cache_bytes': _bytes(self.product_cache),
+            'catalog_bytes': _bytes(self._catalog),
+            'mirror_bytes': _bytes(self.mirror.frame) if self.mirror is not None else 0,
+            'product_cache_rows': len(self.product_cache)
+        }
+        # Las 5 columnas más pesadas de la caché de productos
+        if not self.product_cache.empty:
+            usage = self.product_cache.memory_usage(deep=True, index=False).sort_values(ascending=False)
+            footprint['product_cache_columns'] = {col: int(size) for col, size in usage.head(5).items()}
+        return footprint
+    
+    def apply_filter(self, criteria: FilterCriteria, cursor: Optional[str] = None,
+                     page_size: Optional[int] = None) -> pd.DataFrame:
+        """Aplica un filtro y actualiza los productos (opcionalmente paginado por cursor)"""
         self.filters.current_filter = criteria
-        return self.refresh_products(use_filter=True)
+        return self.refresh_products(use_filter=True, cursor=cursor, page_size=page_size)
     
-    def search_products(self, query: str) -> pd.DataFrame:
-        """Búsqueda rápida de productos"""
+    def search_products(self, query: str, limit: Optional[int] = None) -> pd.DataFrame:
+        """Búsqueda rápida de productos (type-ahead con índice de trigramas si hay réplica local)"""
         if not query:
             return self.product_cache
         
         # Parsear query avanzado
         advanced_filters = self.filters.parse_search_query(query)
         
-        if advanced_filters:
-            # Crear nuevo criterio con los filtros parseados
+        if set(advanced_filters) - {'search_text'}:
+            # Crear nuevo criterio con los filtros parseados (marca:, stock:>, ...)
             criteria = FilterCriteria(**advanced_filters)
             return self.apply_filter(criteria)
+        elif self._catalog_available():
+            # Búsqueda en el catálogo completo con el índice (sin distinguir mayúsculas ni acentos)
+            rows = self._catalog_rows[self._get_search_index().search(query)]
+            rows = rows[rows >= 0]
+            if limit:
+                rows = rows[:limit]
+            df = self._catalog.iloc[rows].reset_index(drop=True)
+            df['selected'] = df['SKU'].isin(self.selected_products)
+            return df
         else:
             # Búsqueda simple en caché
             query_lower = query.lower()
@@ -170,7 +497,7 @@ class ProductManager:
                 self.product_cache['Descripción'].str.lower().str.contains(query_lower, na=False) |
                 self.product_cache['Modelo'].str.lower().str.contains(query_lower, na=False)
             )
-            return self.product_cache[mask]
+            return self.product_cache[mask].head(limit) if limit else self.product_cache[mask]
     
     def select_product(self, sku: str, selected: bool = True):
         """Selecciona o deselecciona un producto"""
@@ -179,23 +506,37 @@ class ProductManager:
         else:
             self.selected_products.discard(sku)
         
-        # Actualizar DataFrame
-        if not self.product_cache.empty:
-            self.product_cache.loc[self.product_cache['SKU'] == sku, 'selected'] = selected
+        # Actualizar solo la fila del producto (posición desde el índice de SKU)
+        self._mark_selected(self._sku_positions([sku]), selected)
         
         # Callback
         if self.callbacks['on_selection_change']:
             self.callbacks['on_selection_change'](len(self.selected_products))
     
+    def select_range(self, start: int, stop: int, select: bool = True):
+        """Selecciona o deselecciona las filas visibles [start, stop) (p. ej. shift+click)"""
+        start, stop, _ = slice(start, stop).indices(len(self._selection))
+        if start >= stop:
+            return
+        skus = self._sku_index[start:stop]
+        if select:
+            self.selected_products.update(skus)
+        else:
+            self.selected_products.difference_update(skus)
+        self._mark_selected(slice(start, stop), select)
+        
+        if self.callbacks['on_selection_change']:
+            self.callbacks['on_selection_change'](len(self.selected_products))
+    
     def select_all(self, select: bool = True):
         """Selecciona o deselecciona todos los productos visibles"""
         if select:
-            visible_skus = self.product_cache['SKU'].tolist()
-            self.selected_products.update(visible_skus)
-            self.product_cache['selected'] = True
+            self.selected_products.update(self._sku_index)
         else:
             self.selected_products.clear()
-            self.product_cache['selected'] = False
+        self._selection[:] = select
+        if not self._product_cache.empty:
+            self._product_cache['selected'] = self._selection.copy()
         
         # Callback
         if self.callbacks['on_selection_change']:
@@ -203,56 +544,117 @@ class ProductManager:
     
     def select_by_criteria(self, criteria: Dict[str, Any]):
         """Selecciona productos según criterios específicos"""
-        mask = pd.Series([True] * len(self.product_cache))
+        df = self._product_cache
+        if df.empty:
+            return
+        mask = np.ones(len(df), dtype=bool)
         
         if 'min_stock' in criteria:
-            mask &= self.product_cache['Stock'] >= criteria['min_stock']
+            # Stock puede traer textos ('Disponible'); se compara el valor numérico de la ingesta
+            stock = df['Stock_Numerico'] if 'Stock_Numerico' in df.columns else pd.to_numeric(df['Stock'], errors='coerce')
+            mask &= (stock >= criteria['min_stock']).to_numpy(dtype=bool, na_value=False)
         
         if 'max_price' in criteria:
-            mask &= self.product_cache['Precio_USD_con_IVA'] <= criteria['max_price']
+            # Float64 nullable: los precios faltantes (NA) no cumplen el criterio
+            mask &= (df['Precio_USD_con_IVA'] <= criteria['max_price']).to_numpy(dtype=bool, na_value=False)
         
         if 'familia' in criteria:
-            mask &= self.product_cache['Familia'] == criteria['familia']
+            mask &= (df['Familia'] == criteria['familia']).to_numpy(dtype=bool, na_value=False)
         
         if 'marca' in criteria:
-            mask &= self.product_cache['Marca'] == criteria['marca']
+            mask &= (df['Marca'] == criteria['marca']).to_numpy(dtype=bool, na_value=False)
         
         # Seleccionar productos que cumplan los criterios
-        matching_skus = self.product_cache[mask]['SKU'].tolist()
-        self.selected_products.update(matching_skus)
-        self.product_cache.loc[mask, 'selected'] = True
+        self.selected_products.update(self._sku_index[mask])
+        self._selection |= mask
+        self._product_cache['selected'] = self._selection.copy()
         
         # Callback
         if self.callbacks['on_selection_change']:
             self.callbacks['on_selection_change'](len(self.selected_products))
     
-    def get_selected_products(self) -> pd.DataFrame:
-        """Obtiene los productos seleccionados"""
+    def get_selected_products(self, profile: Optional[str] = None) -> pd.DataFrame:
+        """
+        Obtiene los productos seleccionados. Con profile ('detail', 'generation') se leen
+        de la BD las columnas de ese perfil; si la BD no responde se usan las filas en caché.
+        """
         if not self.selected_products:
             return pd.DataFrame()
         
-        return self.product_cache[self.product_cache['SKU'].isin(self.selected_products)]
+        # Filas visibles seleccionadas (vector de selección) y luego las que no están visibles,
+        # buscadas en el catálogo por índice de SKU o en la BD en una sola consulta
+        visible = self._sku_index[self._selection]
+        hidden = self.selected_products.difference(visible)
+        if hidden:
+            cached = self.get_products_by_skus(list(visible) + sorted(hidden))
+        else:
+            cached = self._product_cache.iloc[np.flatnonzero(self._selection)]
+        return self._with_profile(cached, profile)
+    
+    def get_selected_skus(self) -> List[str]:
+        """SKUs seleccionados en el orden de get_selected_products (visibles y luego el resto)"""
+        visible = self._sku_index[self._selection]
+        return list(visible) + sorted(self.selected_products.difference(visible))
+    
+    def _with_profile(self, cached: pd.DataFrame, profile: Optional[str]) -> pd.DataFrame:
+        """Completa las filas con las columnas del perfil leídas de la BD (si no responde, quedan las de caché)"""
+        if profile is None or cached.empty:
+            return cached
+        # Mismo orden que las filas en caché (get_products_by_ids respeta el orden pedido)
+        full = self.db_handler.get_products_by_ids(cached['SKU'].astype(str).tolist(), profile=profile)
+        if full.empty:
+            return cached
+        return self._merge_full_rows(cached, full)
+    
+    def _merge_full_rows(self, cached: pd.DataFrame, full: pd.DataFrame) -> pd.DataFrame:
+        """Completa las filas en caché con las columnas leídas de la BD (la BD tiene prioridad)"""
+        full = full.drop_duplicates(subset=['SKU'], keep='first')
+        if cached.empty:
+            return self._prepare_dataframe(full.reset_index(drop=True))
+        derived = cached[['SKU'] + [c for c in cached.columns if c not in full.columns]]
+        return full.merge(derived, on='SKU', how='left')
     
     def get_product_details(self, sku: str) -> Optional[Dict[str, Any]]:
-        """Obtiene detalles completos de un producto"""
-        product = self.product_cache[self.product_cache['SKU'] == sku]
+        """Obtiene detalles completos de un producto (la fila completa se lee bajo demanda)"""
+        positions = self._sku_positions([sku])
+        cached = self._product_cache.iloc[positions[:1]] if len(positions) else pd.DataFrame()
         
-        if product.empty:
-            # Buscar en base de datos
-            df = self.db_handler.get_products_by_ids([sku])
-            if not df.empty:
-                product = df
+        full = self.db_handler.get_products_by_ids([sku], profile='detail')
+        if not full.empty:
+            return to_records(self._merge_full_rows(cached, full).iloc[:1])[0]
         
-        if not product.empty:
-            return product.iloc[0].to_dict()
+        if not cached.empty:
+            return to_records(cached.iloc[:1])[0]
         
         return None
     
+    def get_facets(self, criteria: Optional[FilterCriteria] = None) -> Dict[str, Any]:
+        """
+        Conteos por Familia, Marca, Combustible y rangos de potencia/precio para los filtros dados
+        (por defecto el filtro actual). Con réplica se calculan en memoria; sin ella solo se listan
+        los valores de la base, sin conteos.
+        """
+        filter_dict = self.filters.apply_filter(criteria or self.filters.current_filter)
+        if self._catalog_available():
+            search_index = self._get_search_index() if filter_dict.get('search_text') else None
+            return self.facet_engine.facets(self.mirror.frame, filter_dict, key=self.mirror.version,
+                                            valid=self._catalog_rows >= 0, search_index=search_index)
+        return {
+            'total': None,
+            'familia': [{'value': v, 'count': None} for v in self.db_handler.get_distinct_values('Familia')],
+            'marca': [{'value': v, 'count': None} for v in self.db_handler.get_distinct_values('Marca')],
+            'combustible': [],
+            'potencia': [],
+            'precio': [],
+        }
+    
     def get_filter_options(self) -> Dict[str, List[str]]:
         """Obtiene opciones disponibles para filtros"""
+        # Con réplica las opciones salen de las facetas (sin consultas a la base)
+        facets = self.get_facets(FilterCriteria())
         return {
-            'familias': self.db_handler.get_distinct_values('Familia'),
-            'marcas': self.db_handler.get_distinct_values('Marca'),
+            'familias': sorted(item['value'] for item in facets['familia']),
+            'marcas': sorted(item['value'] for item in facets['marca']),
             'combustibles': ['diesel', 'nafta', 'gas'],
             'saved_filters': list(self.filters.saved_filters.keys()),
             'preset_filters': list(self.filters.filter_presets.keys())
@@ -310,63 +712,96 @@ class ProductManager:
             self.logger.error(f"Error cargando selección: {e}")
             return False
     
-    def export_selected_products(self, format: str = 'excel') -> str:
-        """Exporta los productos seleccionados"""
-        selected_df = self.get_selected_products()
+    def export_selected_products(self, format: str = 'excel', skus: Optional[List[str]] = None,
+                                 filename: Optional[str] = None,
+                                 progress: Optional[Callable[[int, int], None]] = None) -> str:
+        """
+        Exporta los productos seleccionados ('excel', 'csv', 'parquet' o 'json').
+        skus fija la lista a exportar (p. ej. la selección al momento de encolar el trabajo).
+        """
+        if format not in exporters.EXTENSIONS:
+            return ""
+        if skus is None:
+            selected_df = self.get_selected_products(profile='detail')
+        else:
+            selected_df = self._with_profile(self.get_products_by_skus(skus), 'detail')
         
         if selected_df.empty:
             return ""
         
-        if format == 'excel':
-            return self.db_handler.export_to_excel(selected_df)
-        elif format == 'json':
-            filename = f"export_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
+        chunk_size = self.db_handler.config.get('export_chunk_size', exporters.DEFAULT_CHUNK_SIZE)
+        if format == 'excel' and progress is None:
+            return self.db_handler.export_to_excel(selected_df, filename)
+        
+        try:
+            if filename is None:
+                filename = f"export_{datetime.now().strftime('%Y%m%d_%H%M%S')}.{exporters.EXTENSIONS[format]}"
             filepath = Path("exports") / filename
             filepath.parent.mkdir(exist_ok=True)
-            
-            selected_df.to_json(filepath, orient='records', force_ascii=False, indent=2)
-            return str(filepath)
-        
-        return ""
+            return str(exporters.export_dataframe(selected_df, filepath, format=format,
+                                                  chunk_size=chunk_size, progress=progress))
+        except Exception as e:
+            self.logger.error(f"Error exportando selección a {format}: {e}")
+            return ""
+    
+    def start_export(self, format: str = 'excel') -> Dict[str, Any]:
+        """
+        Encola la exportación de la selección actual en segundo plano y retorna el estado del trabajo.
+        La misma selección y formato dentro de export_job_ttl reutiliza el archivo ya generado.
+        """
+        if format not in exporters.EXTENSIONS:
+            return {'status': 'error', 'error': f'Formato no soportado: {format}'}
+        skus = self.get_selected_skus()
+        if not skus:
+            return {'status': 'error', 'error': 'No hay productos seleccionados'}
+        
+        key = self.export_jobs.make_key(skus, format)
+        filename = f"export_{datetime.now().strftime('%Y%m%d_%H%M%S')}_{key[:8]}.{exporters.EXTENSIONS[format]}"
+        job = self.export_jobs.submit(
+            key, format, len(skus),
+            lambda progress: self.export_selected_products(format, skus=skus, filename=filename, progress=progress)
+        )
+        return job.to_dict()
     
-    def get_statistics(self) -> Dict[str, Any]:
-        """Obtiene estadísticas de productos"""
-        db_stats = self.db_handler.get_statistics()
+    def get_export_job(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """Estado de un trabajo de exportación (None si no existe o ya venció)"""
+        job = self.export_jobs.get(job_id)
+        return job.to_dict() if job else None
+    
+    def get_statistics(self, force_refresh: bool = False, include_memory: bool = False) -> Dict[str, Any]:
+        """Obtiene estadísticas de productos (include_memory agrega memory_footprint, que recorre toda la caché)"""
+        db_stats = self.db_handler.get_statistics(force_refresh=force_refresh)
         
         # Agregar estadísticas de selección
         db_stats['selected_products'] = len(self.selected_products)
         db_stats['filtered_products'] = len(self.product_cache)
+        if include_memory:
+            db_stats['memory'] = self.memory_footprint()
         
         if not self.product_cache.empty:
             selected_df = self.get_selected_products()
             if not selected_df.empty:
-                db_stats['selected_total_value'] = selected_df['Precio_USD_con_IVA'].sum()
-                db_stats['selected_total_stock'] = selected_df['Stock'].sum()
+                # Stock puede traer textos como 'Disponible'/'Consultar'; solo se suman los números
+                db_stats['selected_total_value'] = float(pd.to_numeric(selected_df['Precio_USD_con_IVA'], errors='coerce').sum())
+                db_stats['selected_total_stock'] = float(pd.to_numeric(selected_df['Stock'], errors='coerce').sum())
         
         return db_stats
     
-    def prepare_for_processing(self) -> List[Dict[str, Any]]:
-        """Prepara los productos seleccionados para procesamiento"""
-        selected_df = self.get_selected_products()
+    def prepare_for_processing(self) -> Sequence[Dict[str, Any]]:
+        """
+        Prepara los productos seleccionados para procesamiento (con las columnas del perfil 'generation').
+        Retorna una secuencia perezosa: cada payload se arma cuando el lote lo consume.
+        """
+        selected_df = self.get_selected_products(profile='generation')
         
         if selected_df.empty:
             return []
         
-        # Convertir a formato esperado por otros módulos
-        products = []
-        for _, row in selected_df.iterrows():
-            product = {
-                'sku': row['SKU'],
-                'nombre': row['Descripción'],
-                'marca': row.get('Marca', ''),
-                'modelo': row.get('Modelo', ''),
-                'familia': row.get('Familia', ''),
-                'precio': row.get('Precio_USD_con_IVA', 0),
-                'stock': row.get('Stock', 0),
-                'pdf_url': row.get('URL_PDF', ''),
-                # Agregar más campos según necesidad
-                'row_data': row.to_dict()  # Datos completos
-            }
-            products.append(product)
-        
-        return products
+        return ProcessingPayloads(selected_df)
+    
+    def prepare_skus_for_processing(self, skus) -> Sequence[Dict[str, Any]]:
+        """Como prepare_for_processing, pero para los SKUs dados (filas releídas con el perfil 'generation')"""
+        df = self.get_products_by_skus(skus, profile='generation')
+        if df.empty:
+            return []
+        return ProcessingPayloads(df)
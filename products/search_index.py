@@ -0,0 +1,240 @@
+"""
+Índice de Búsqueda del Catálogo
+Índice invertido de trigramas sobre SKU, Descripción, Modelo y Marca para búsqueda type-ahead
+"""
+
+import logging
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+
+from .filter_engine import normalize_text, normalize_value
+
+
+class SearchIndex:
+    """
+    Búsqueda por subcadena (y por lo tanto prefijo) sin distinguir mayúsculas ni acentos.
+    Las consultas de 3+ caracteres usan trigramas; las de 1-2 caracteres recorren todos los textos
+    (coinciden en medio de una palabra, p. ej. "12" encuentra "GD12000").
+    Las actualizaciones son incrementales: solo se indexan los SKUs nuevos o modificados.
+    """
+
+    FIELDS = ['SKU', 'Descripción', 'Modelo', 'Marca']
+    GRAM = 3
+    # Separador entre campos: ningún texto buscado lo contiene, así no hay coincidencias entre campos
+    SEPARATOR = '\x1f'
+    # Fracción de documentos obsoletos o pendientes a partir de la cual se recompacta el índice
+    COMPACT_RATIO = 0.2
+    # Con pocos candidatos es más barato verificar la subcadena que seguir intersectando
+    VERIFY_DIRECTLY = 64
+    # Máximo de trigramas (los menos frecuentes) usados para generar candidatos
+    MAX_GRAMS = 4
+
+    def __init__(self):
+        self.logger = logging.getLogger(__name__)
+        self._clear()
+
+    def _clear(self):
+        self._texts: List[str] = []
+        self._signatures: List[Optional[str]] = []
+        self._alive = np.zeros(0, dtype=bool)
+        self._positions = np.zeros(0, dtype=np.intp)
+        self._sku_to_doc: Dict[str, int] = {}
+        # Índice base (arreglos ordenados) y delta (documentos agregados desde la última compactación)
+        self._postings: Dict[str, np.ndarray] = {}
+        self._delta_postings: Dict[str, List[int]] = {}
+        self._delta_docs = 0
+        self._arrow: Optional[pa.Array] = None
+
+    def __len__(self) -> int:
+        return len(self._sku_to_doc)
+
+    def update(self, df: pd.DataFrame, signature_column: Optional[str] = None) -> Dict[str, int]:
+        """
+        Sincroniza el índice con df (una fila por SKU). signature_column identifica cambios
+        (p. ej. el checksum de la réplica); sin ella se compara el texto de los campos.
+        Retorna cuántos documentos se agregaron, actualizaron y eliminaron.
+        """
+        result = {'added': 0, 'updated': 0, 'removed': 0}
+        if df.empty:
+            result['removed'] = len(self._sku_to_doc)
+            self._clear()
+            return result
+
+        skus = df['SKU'].astype(str).to_numpy()
+        if signature_column and signature_column in df.columns:
+            signatures = df[signature_column].astype(str).to_numpy()
+        else:
+            signatures = self._raw_text(df).to_numpy()
+
+        changed = []
+        for row, (sku, signature) in enumerate(zip(skus, signatures)):
+            doc = self._sku_to_doc.get(sku)
+            if doc is None:
+                result['added'] += 1
+                changed.append(row)
+            elif self._signatures[doc] != signature:
+                result['updated'] += 1
+                self._alive[doc] = False
+                changed.append(row)
+
+        current = set(skus)
+        removed = [sku for sku in self._sku_to_doc if sku not in current]
+        for sku in removed:
+            self._alive[self._sku_to_doc.pop(sku)] = False
+        result['removed'] = len(removed)
+
+        if changed:
+            texts = self._normalized_text(df.iloc[changed])
+            rebuild = not self._texts
+            start = len(self._texts)
+            for offset, row in enumerate(changed):
+                self._sku_to_doc[skus[row]] = start + offset
+            self._texts.extend(texts)
+            self._arrow = None
+            self._signatures.extend(signatures[changed].tolist())
+            self._alive = np.concatenate([self._alive, np.ones(len(changed), dtype=bool)])
+            if rebuild:
+                self._build_base()
+            else:
+                self._add_delta(range(start, len(self._texts)))
+
+        dead = len(self._texts) - len(self._sku_to_doc)
+        if dead + self._delta_docs > self.COMPACT_RATIO * max(len(self._sku_to_doc), 1):
+            self._compact()
+
+        # Posición de cada documento dentro de df (para devolver filas sin buscar por SKU)
+        self._positions = np.full(len(self._texts), -1, dtype=np.intp)
+        doc_ids = np.fromiter((self._sku_to_doc[sku] for sku in skus), dtype=np.intp, count=len(skus))
+        self._positions[doc_ids] = np.arange(len(skus))
+
+        if any(result.values()):
+            self.logger.info(f"SearchIndex: índice actualizado {result} ({len(self)} documentos)")
+        return result
+
+    def search(self, query: str, limit: Optional[int] = None) -> np.ndarray:
+        """Posiciones (en el último df indexado) de las filas que contienen query, en orden del catálogo"""
+        needle = normalize_value(query) if query is not None else ''
+        if not needle or not self._texts:
+            return np.zeros(0, dtype=np.intp)
+
+        if len(needle) < self.GRAM:
+            # Sin trigramas que intersectar: todos los documentos son candidatos
+            docs, verify = np.flatnonzero(self._alive), True
+        else:
+            docs, verify = self._trigram_candidates(needle)
+        docs = docs[self._alive[docs]]
+        positions = self._positions[docs]
+        keep = positions >= 0
+        docs, positions = docs[keep], positions[keep]
+
+        if not verify:
+            return self._first(positions, limit)
+
+        # Los trigramas pueden coincidir en otro orden: se verifica la subcadena
+        if limit:
+            # Type-ahead: se recorre en orden del catálogo y se corta al llegar al límite
+            order = np.argsort(positions, kind='stable')
+            texts = self._texts
+            matches = []
+            for i in order:
+                if needle in texts[docs[i]]:
+                    matches.append(positions[i])
+                    if len(matches) >= limit:
+                        break
+            return np.array(matches, dtype=np.intp)
+        found = pc.match_substring(self._arrow_texts().take(pa.array(docs)), needle)
+        return np.sort(positions[found.to_numpy(zero_copy_only=False)])
+
+    def match_mask(self, query: str, size: int) -> np.ndarray:
+        """Máscara booleana de tamaño size con las filas que coinciden (para FilterEngine)"""
+        mask = np.zeros(size, dtype=bool)
+        mask[self.search(query)] = True
+        return mask
+
+    @staticmethod
+    def _first(positions: np.ndarray, limit: Optional[int]) -> np.ndarray:
+        if limit and len(positions) > limit:
+            positions = np.partition(positions, limit - 1)[:limit]
+        return np.sort(positions)
+
+    def _trigram_candidates(self, needle: str):
+        """
+        Candidatos que contienen los trigramas menos frecuentes de needle.
+        Retorna (documentos, hay_que_verificar_la_subcadena).
+        """
+        grams = sorted({needle[i:i + self.GRAM] for i in range(len(needle) - self.GRAM + 1)},
+                       key=self._posting_size)
+        docs = self._posting(grams[0])
+        for gram in grams[1:self.MAX_GRAMS]:
+            if len(docs) <= self.VERIFY_DIRECTLY:
+                break
+            member = np.zeros(len(self._texts), dtype=bool)
+            member[self._posting(gram)] = True
+            docs = docs[member[docs]]
+        return docs, len(needle) > self.GRAM
+
+    def _arrow_texts(self) -> pa.Array:
+        if self._arrow is None:
+            self._arrow = pa.array(self._texts, type=pa.string())
+        return self._arrow
+
+    def _posting(self, gram: str) -> np.ndarray:
+        base = self._postings.get(gram)
+        delta = self._delta_postings.get(gram)
+        if delta is None:
+            return base if base is not None else np.zeros(0, dtype=np.intp)
+        delta = np.array(delta, dtype=np.intp)
+        return delta if base is None else np.concatenate([base, delta])
+
+    def _posting_size(self, gram: str) -> int:
+        base = self._postings.get(gram)
+        return (0 if base is None else len(base)) + len(self._delta_postings.get(gram, ()))
+
+    def _build_base(self):
+        """Construye los arreglos de postings de todos los documentos vivos"""
+        gram_docs: Dict[str, List[int]] = {}
+        for doc in np.flatnonzero(self._alive):
+            text = self._texts[doc]
+            for gram in self._grams(text):
+                gram_docs.setdefault(gram, []).append(doc)
+
+        # Los documentos se recorren en orden, así cada posting queda ordenado
+        self._postings = {gram: np.array(docs, dtype=np.intp) for gram, docs in gram_docs.items()}
+        self._delta_postings = {}
+        self._delta_docs = 0
+
+    def _add_delta(self, docs):
+        for doc in docs:
+            text = self._texts[doc]
+            for gram in self._grams(text):
+                self._delta_postings.setdefault(gram, []).append(doc)
+            self._delta_docs += 1
+
+    def _compact(self):
+        """Renumera los documentos vivos y reconstruye el índice base"""
+        order = sorted(self._sku_to_doc.items(), key=lambda item: item[1])
+        self._texts = [self._texts[doc] for _, doc in order]
+        self._arrow = None
+        self._signatures = [self._signatures[doc] for _, doc in order]
+        self._sku_to_doc = {sku: new_doc for new_doc, (sku, _) in enumerate(order)}
+        self._alive = np.ones(len(order), dtype=bool)
+        self._build_base()
+
+    def _grams(self, text: str) -> set:
+        return {text[i:i + self.GRAM] for i in range(len(text) - self.GRAM + 1)}
+
+    def _raw_text(self, df: pd.DataFrame) -> pd.Series:
+        text = pd.Series('', index=df.index, dtype=object)
+        for col in self.FIELDS:
+            if col in df.columns:
+                text = text + self.SEPARATOR + df[col].astype(object).fillna('').astype(str)
+        return text
+
+    def _normalized_text(self, df: pd.DataFrame) -> List[str]:
+        columns = [normalize_text(df[col]) if col in df.columns else np.full(len(df), None, dtype=object)
+                   for col in self.FIELDS]
+        return [self.SEPARATOR.join(value or '' for value in values) for values in zip(*columns)]
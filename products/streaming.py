@@ -0,0 +1,89 @@
+"""
+Respuestas en Streaming
+Serializa un DataFrame por lotes (JSON por partes o NDJSON) con compresión gzip/brotli opcional
+"""
+
+import json
+import zlib
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+
+import pandas as pd
+
+try:
+    import brotli
+except ImportError:  # brotli es opcional: sin el paquete solo se ofrece gzip
+    brotli = None
+
+DEFAULT_BATCH_SIZE = 500
+
+
+def project_columns(df: pd.DataFrame, columns: Optional[List[str]]) -> pd.DataFrame:
+    """Deja solo las columnas pedidas que existen (en ese orden); SKU siempre se incluye"""
+    if not columns:
+        return df
+    wanted = ['SKU'] + [c for c in columns if c != 'SKU']
+    return df[[c for c in wanted if c in df.columns]]
+
+
+def to_records(df: pd.DataFrame) -> List[Dict[str, Any]]:
+    """Filas como dicts para jsonify: NaN/NA se convierten en None solo al serializar"""
+    return df.astype(object).where(df.notna(), None).to_dict('records')
+
+
+def iter_json(df: pd.DataFrame, header: Dict[str, Any], batch_size: int = DEFAULT_BATCH_SIZE) -> Iterator[str]:
+    """
+    Mismo formato que jsonify({... , 'products': [...]}) pero generado por lotes:
+    el cliente empieza a recibir filas antes de que termine la serialización.
+    """
+    opening = json.dumps(header, ensure_ascii=False, default=str)[:-1]
+    yield (opening + ', ' if header else opening) + '"products": ['
+    first = True
+    for batch in _iter_batches(df, batch_size):
+        # to_json (serializador en C de pandas) retorna "[{...},{...}]"
+        rows = batch.to_json(orient='records', force_ascii=False, date_format='iso')[1:-1]
+        yield rows if first else ',' + rows
+        first = False
+    yield ']}'
+
+
+def iter_ndjson(df: pd.DataFrame, header: Dict[str, Any], batch_size: int = DEFAULT_BATCH_SIZE) -> Iterator[str]:
+    """NDJSON: la primera línea es header (totales, cursor) y luego un producto por línea"""
+    yield json.dumps(header, ensure_ascii=False, default=str) + '\n'
+    for batch in _iter_batches(df, batch_size):
+        yield batch.to_json(orient='records', lines=True, force_ascii=False, date_format='iso').rstrip('\n') + '\n'
+
+
+def _iter_batches(df: pd.DataFrame, batch_size: int) -> Iterator[pd.DataFrame]:
+    for start in range(0, len(df), batch_size):
+        yield df.iloc[start:start + batch_size]
+
+
+def available_encodings() -> List[str]:
+    """Codificaciones soportadas en orden de preferencia"""
+    return ['br', 'gzip'] if brotli is not None else ['gzip']
+
+
+def negotiate_encoding(accept_encodings) -> Optional[str]:
+    """Elige la codificación según el Accept-Encoding del cliente (werkzeug Accept); None = sin comprimir"""
+    return accept_encodings.best_match(available_encodings()) if accept_encodings else None
+
+
+def encode_stream(chunks: Iterable[str], encoding: Optional[str] = None) -> Iterator[bytes]:
+    """Codifica en UTF-8 y comprime cada lote; el flush por lote permite procesar la respuesta a medida que llega"""
+    if encoding == 'br' and brotli is not None:
+        compressor = brotli.Compressor()
+        for chunk in chunks:
+            data = compressor.process(chunk.encode('utf-8')) + compressor.flush()
+            if data:
+                yield data
+        yield compressor.finish()
+    elif encoding == 'gzip':
+        compressor = zlib.compressobj(6, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+        for chunk in chunks:
+            data = compressor.compress(chunk.encode('utf-8')) + compressor.flush(zlib.Z_SYNC_FLUSH)
+            if data:
+                yield data
+        yield compressor.flush()
+    else:
+        for chunk in chunks:
+            yield chunk.encode('utf-8')
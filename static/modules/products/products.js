@@ -267,8 +267,9 @@ function applyFilters() {
     // Actualizar resumen de filtros
     updateFilterSummary();
     
-    // Recargar productos
+    // Recargar productos y conteos del sidebar
     refreshProducts();
+    loadDynamicFilters();
 }
 
 function clearFilters() {
@@ -288,6 +289,7 @@ function clearFilters() {
     moduleState.filters = {};
     updateFilterSummary();
     refreshProducts();
+    loadDynamicFilters();
 }
 
 async function quickSearch() {
@@ -951,6 +953,8 @@ async function exportSelection() {
             <div class="modal-buttons">
                 <button onclick="confirmExport('excel', this)" class="btn btn-primary">📊 Excel</button>
                 <button onclick="confirmExport('json', this)" class="btn btn-secondary">📄 JSON</button>
+                <button onclick="confirmExport('csv', this)" class="btn btn-secondary">🧾 CSV</button>
+                <button onclick="confirmExport('parquet', this)" class="btn btn-secondary">🗃️ Parquet</button>
                 <button onclick="this.closest('.modal').remove()" class="btn">Cancelar</button>
             </div>
         </div>
@@ -971,11 +975,27 @@ async function confirmExport(format, button) {
             })
         });
         
-        const result = await response.json();
+        let job = await response.json();
+        if (!job.success) {
+            mostrarNotificacion(`Error exportando: ${job.error}`, 'error');
+            return;
+        }
         
-        if (result.success) {
+        // La exportación corre en segundo plano: se consulta el avance hasta que termina
+        if (job.status !== 'done') {
+            mostrarNotificacion(`Exportando ${job.total} productos en segundo plano...`, 'info');
+        }
+        while (job.status === 'pending' || job.status === 'running') {
+            console.log(`Exportación ${job.job_id}: ${Math.round(job.progress * 100)}%`);
+            await new Promise(resolve => setTimeout(resolve, 1000));
+            job = await (await fetch(`${API_BASE_URL}/export-status/${job.job_id}`)).json();
+        }
+        
+        if (job.status === 'done') {
             // Descargar archivo
-            window.open(`${API_BASE_URL}/download-export/${result.filename}`, '_blank');
+            window.open(`${API_BASE_URL}/download-export/${job.filename}`, '_blank');
+        } else {
+            mostrarNotificacion(`Error exportando: ${job.error}`, 'error');
         }
     } catch (error) {
         console.error('Error exportando:', error);
@@ -1254,34 +1274,59 @@ function formatearPotenciaInteligente(potenciaWatts) {
     return `${Math.round(potenciaWatts)} W`;
 }
 
-function loadDynamicFilters() {
-    // Cargar filtros dinámicos basados en los productos cargados
-    const familias = [...new Set(moduleState.products.map(p => p.familia).filter(Boolean))].sort();
-    const marcas = [...new Set(moduleState.products.map(p => p.marca).filter(Boolean))].sort();
-    
-    // Llenar select de familias
-    const familiaSelect = document.getElementById('filter-familia');
-    if (familiaSelect) {
-        familiaSelect.innerHTML = '<option value="">Todas las familias</option>';
-        familias.forEach(familia => {
-            const option = document.createElement('option');
-            option.value = familia;
-            option.textContent = familia;
-            familiaSelect.appendChild(option);
+async function loadDynamicFilters() {
+    // Conteos por faceta calculados en el servidor; si no responde se cuentan los productos cargados
+    let facets = null;
+    try {
+        const { pdf, ...filters } = moduleState.filters;
+        if (pdf) filters.has_pdf = pdf === 'con_pdf';
+        const response = await fetch(`${API_BASE_URL}/facets`, {
+            method: 'POST',
+            headers: { 'Content-Type': 'application/json' },
+            body: JSON.stringify({ filters })
         });
+        const result = await response.json();
+        if (result.success) facets = result.facets;
+    } catch (error) {
+        console.warn('Facetas no disponibles, se cuentan los productos cargados:', error);
     }
     
-    // Llenar select de marcas
-    const marcaSelect = document.getElementById('filter-marca');
-    if (marcaSelect) {
-        marcaSelect.innerHTML = '<option value="">Todas las marcas</option>';
-        marcas.forEach(marca => {
-            const option = document.createElement('option');
-            option.value = marca;
-            option.textContent = marca;
-            marcaSelect.appendChild(option);
-        });
+    if (!facets) {
+        facets = {
+            familia: countValues(moduleState.products.map(p => p.familia)),
+            marca: countValues(moduleState.products.map(p => p.marca))
+        };
+    }
+    
+    fillFacetSelect('filter-familia', 'Todas las familias', facets.familia);
+    fillFacetSelect('filter-marca', 'Todas las marcas', facets.marca);
+}
+
+function countValues(values) {
+    const counts = {};
+    values.filter(Boolean).forEach(value => { counts[value] = (counts[value] || 0) + 1; });
+    return Object.keys(counts).sort().map(value => ({ value, count: counts[value] }));
+}
+
+function fillFacetSelect(selectId, allLabel, items) {
+    // Opciones "Valor (N)" conservando el valor elegido
+    const select = document.getElementById(selectId);
+    if (!select) return;
+    const current = select.value;
+    select.innerHTML = `<option value="">${allLabel}</option>`;
+    (items || []).forEach(item => {
+        const option = document.createElement('option');
+        option.value = item.value;
+        option.textContent = item.count == null ? item.value : `${item.value} (${item.count})`;
+        select.appendChild(option);
+    });
+    if (current && !(items || []).some(item => item.value === current)) {
+        const option = document.createElement('option');
+        option.value = current;
+        option.textContent = `${current} (0)`;
+        select.appendChild(option);
     }
+    select.value = current;
 }
 
 // Event Listeners
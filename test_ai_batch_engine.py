@@ -0,0 +1,123 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Test del motor de lotes (BatchEngine): paralelismo, orden, reintentos y límite de cuota
+"""
+import random
+import sys
+import threading
+import time
+from pathlib import Path
+sys.path.append(str(Path(__file__).parent))
+
+from ai_generator.batch_engine import BatchEngine, BatchPrefetcher, RateLimiter, TokenBucket
+
+
+def test_lote_en_paralelo_conserva_el_orden():
+    activos = []
+    maximo = [0]
+    lock = threading.Lock()
+
+    def generar(n):
+        with lock:
+            activos.append(n)
+            maximo[0] = max(maximo[0], len(activos))
+        # Los primeros tardan más: sin orden explícito terminarían al final
+        time.sleep(0.05 if n < 3 else 0.01)
+        with lock:
+            activos.remove(n)
+        return n * 10
+
+    motor = BatchEngine(max_workers=4, max_retries=0)
+    inicio = time.perf_counter()
+    resultados = motor.run(range(12), generar)
+    assert [r.value for r in resultados] == [n * 10 for n in range(12)]
+    assert [r.index for r in resultados] == list(range(12))
+    assert all(r.success for r in resultados)
+    assert maximo[0] <= 4
+    assert maximo[0] > 1
+    # Secuencial serían ~0.24s
+    assert time.perf_counter() - inicio < 0.2
+
+
+def test_reintentos_con_espera_y_error_final():
+    intentos = {}
+
+    def generar(sku):
+        intentos[sku] = intentos.get(sku, 0) + 1
+        if sku == 'FALLA':
+            raise RuntimeError('429 Resource exhausted')
+        if sku == 'TEMPORAL' and intentos[sku] < 3:
+            raise RuntimeError('503 Service unavailable')
+        return f"<html>{sku}</html>"
+
+    random.seed(0)
+    motor = BatchEngine(max_workers=2, max_retries=2, backoff_base=0.01, backoff_max=0.02)
+    resultados = motor.run(['OK', 'TEMPORAL', 'FALLA'], generar)
+    assert [r.success for r in resultados] == [True, True, False]
+    assert resultados[1].value == '<html>TEMPORAL</html>'
+    assert [r.attempts for r in resultados] == [1, 3, 3]
+    assert '429' in resultados[2].error
+    # La espera es aleatoria y acotada por backoff_max
+    assert all(0 <= motor._backoff(n) <= 0.02 for n in range(10))
+
+
+def test_detener_corta_el_lote():
+    detenido = threading.Event()
+    procesados = []
+
+    def generar(n):
+        procesados.append(n)
+        return n
+
+    motor = BatchEngine(max_workers=1, max_retries=0, window=2)
+    for resultado in motor.imap(range(100), generar, should_stop=detenido.is_set):
+        if resultado.index == 3:
+            detenido.set()
+            break
+    # Solo se generó la ventana en curso, no el lote completo
+    assert len(procesados) <= 6
+
+
+def test_limite_de_pedidos_y_tokens_por_minuto():
+    # 600 pedidos por minuto = 10 por segundo, con ráfaga de 2
+    balde = TokenBucket(600, capacity=2)
+    inicio = time.perf_counter()
+    for _ in range(4):
+        balde.acquire()
+    # Los 2 primeros salen de la ráfaga; los otros 2 esperan ~0.1s cada uno
+    assert 0.15 < time.perf_counter() - inicio < 0.5
+
+    limite = RateLimiter(requests_per_minute=6000, tokens_per_minute=6000)
+    reservado = limite.acquire(RateLimiter.estimate_tokens('x' * 400))
+    assert reservado == 100 + RateLimiter.OUTPUT_TOKENS_ESTIMATE
+    disponibles = limite.tokens.tokens
+    # La API informó menos tokens de los reservados: se devuelve la diferencia
+    limite.record_usage(reservado, 300)
+    assert limite.tokens.tokens >= disponibles + reservado - 300 - 1
+
+
+def test_bloques_compartidos_entre_hilos():
+    pedidos = []
+
+    def extraer(bloque):
+        pedidos.append(list(bloque))
+        time.sleep(0.02)
+        return {sku: sku.lower() for sku in bloque}
+
+    skus = [f"SKU{n}" for n in range(7)]
+    bloques = BatchPrefetcher(skus, extraer, key=str, size=3)
+    resultados = BatchEngine(max_workers=4, max_retries=0).run(skus, bloques.get)
+    assert [r.value for r in resultados] == [sku.lower() for sku in skus]
+    # Una llamada por bloque aunque varios hilos pidan elementos del mismo bloque
+    assert sorted(pedidos) == [skus[0:3], skus[3:6], skus[6:]]
+    assert bloques.get('OTRO') is None
+
+
+if __name__ == '__main__':
+    test_lote_en_paralelo_conserva_el_orden()
+    test_reintentos_con_espera_y_error_final()
+    test_detener_corta_el_lote()
+    test_limite_de_pedidos_y_tokens_por_minuto()
+    test_bloques_compartidos_entre_hilos()
+    print("[OK] Todos los tests del motor de lotes pasaron")
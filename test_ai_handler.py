@@ -0,0 +1,99 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Test de las etapas de AIHandler.generate_description y de la extracción por lotes (extract_batch)
+"""
+import json
+import sys
+import tempfile
+from pathlib import Path
+sys.path.append(str(Path(__file__).parent))
+
+import pytest
+
+from ai_generator import ai_handler as modulo_handler
+from ai_generator.ai_handler import AIHandler
+from ai_generator.response_cache import ResponseCache
+from modelo_falso import PRODUCTO, Respuesta, crear_handler
+
+
+def test_solo_corren_las_etapas_que_consume_la_plantilla(tmp_path):
+    handler = crear_handler(tmp_path)
+    tiempos = {}
+    handler.generate_description(dict(PRODUCTO), timings=tiempos)
+    # El marketing genérico no se ejecuta: su resultado no lo usa la plantilla
+    assert list(tiempos) == ['pdf', 'extraccion', 'categoria', 'marketing_categoria',
+                                                'caracteristicas']
+    assert 'marketing industrial' not in handler.model.llamadas[1]
+
+    # Una categoría puede elegir el prompt general para el marketing
+    handler = crear_handler(tmp_path / 'generico')
+    handler._category_pipeline = lambda categoria: {'marketing': 'marketing_generico'}
+    tiempos = {}
+    handler.generate_description(dict(PRODUCTO), timings=tiempos)
+    assert 'marketing_generico' in tiempos
+    assert 'marketing_categoria' not in tiempos
+    assert 'marketing industrial' in handler.model.llamadas[1]
+
+
+class ModeloPorLotes:
+    """Responde el array de la extracción por lotes; con más de 2 productos devuelve un JSON roto"""
+
+    def __init__(self):
+        self.llamadas = []
+
+    def generate_content(self, prompt):
+        self.llamadas.append(prompt)
+        if 'ARRAY JSON' not in prompt:
+            return Respuesta(json.dumps({'titulo': 'Generador', 'descripcion': 'Energía confiable'}))
+        inicio = prompt.index('[', prompt.index('**PRODUCTOS'))
+        productos = json.loads(prompt[inicio:prompt.index('```', inicio)])
+        if len(productos) > 2:
+            return Respuesta('[{"sku": "A1", "potencia_kva": ')
+        return Respuesta(json.dumps([{'sku': p['sku'], 'categoria_producto': 'default',
+                                      'potencia_kva': p['modelo']} for p in productos]))
+
+
+def test_extraccion_por_lotes_parte_el_lote_si_falla(tmp_path):
+    handler = AIHandler(response_cache=ResponseCache(str(tmp_path / 'respuestas.sqlite')))
+    handler.model = ModeloPorLotes()
+    productos = [dict(PRODUCTO, SKU=f"A{n}", Modelo=f"GE-{n}") for n in range(1, 5)]
+
+    extraidos = handler.extract_batch(productos)
+    # 1 lote de 4 inválido -> 2 lotes de 2 válidos
+    assert len(handler.model.llamadas) == 3
+    assert sorted(extraidos) == ['A1', 'A2', 'A3', 'A4']
+    assert extraidos['A3']['info']['potencia_kva'] == 'GE-3'
+    assert extraidos['A3']['info']['nombre'] == 'GENERADOR GAMMA 3300W'
+
+    # Con la extracción resuelta, la descripción solo pide el marketing
+    handler.model.llamadas.clear()
+    tiempos = {}
+    html = handler.generate_description(productos[2], prefetched=extraidos['A3'], timings=tiempos)
+    assert len(handler.model.llamadas) == 1
+    assert 'extraccion' not in tiempos and 'marketing_categoria' in tiempos
+    assert 'La IA no pudo generar' not in html
+
+
+def test_error_al_armar_los_datos_base_devuelve_la_pagina_de_error(tmp_path):
+    handler = crear_handler(tmp_path)
+    original = modulo_handler.extraer_info_tecnica
+    modulo_handler.extraer_info_tecnica = lambda producto: producto['Potencia'].split()[1]
+    try:
+        html = handler.generate_description({'SKU': 'A1', 'Potencia': '3.3'})
+        assert 'La IA no pudo generar' in html
+        with pytest.raises(IndexError):
+            handler.generate_description({'SKU': 'A1', 'Potencia': '3.3'}, raise_errors=True)
+    finally:
+        modulo_handler.extraer_info_tecnica = original
+    assert handler.model.llamadas == []
+
+
+if __name__ == '__main__':
+    with tempfile.TemporaryDirectory() as carpeta:
+        test_solo_corren_las_etapas_que_consume_la_plantilla(Path(carpeta))
+    with tempfile.TemporaryDirectory() as carpeta:
+        test_extraccion_por_lotes_parte_el_lote_si_falla(Path(carpeta))
+    with tempfile.TemporaryDirectory() as carpeta:
+        test_error_al_armar_los_datos_base_devuelve_la_pagina_de_error(Path(carpeta))
+    print("[OK] Todos los tests de AIHandler pasaron")
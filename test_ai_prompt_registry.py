@@ -0,0 +1,65 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Test del registro de prompts en memoria (PromptRegistry): recarga por mtime y recarga forzada
+"""
+import json
+import os
+import sys
+import tempfile
+from pathlib import Path
+sys.path.append(str(Path(__file__).parent))
+
+import pytest
+
+from ai_generator.prompt_registry import PromptRegistry
+
+
+def escribir(ruta, datos, mtime):
+    ruta.write_text(json.dumps(datos, ensure_ascii=False), encoding='utf-8')
+    os.utime(ruta, (mtime, mtime))
+
+
+def test_recarga_cuando_cambia_el_archivo(tmp_path):
+    ruta = tmp_path / 'generador_prompt.json'
+    escribir(ruta, {'prompt_generate': 'Datos: {product_data_json}'}, 1000)
+    registro = PromptRegistry(tmp_path, check_interval=0)
+
+    assert registro.fields('generador_prompt.json', 'prompt_generate') == {'product_data_json'}
+    assert registro.render('generador_prompt.json', 'prompt_generate', product_data_json='{}') == 'Datos: {}'
+    with pytest.raises(KeyError):
+        registro.render('generador_prompt.json', 'prompt_generate')
+
+    escribir(ruta, {'prompt_generate': 'Nuevo: {product_data_json}'}, 2000)
+    assert registro.render('generador_prompt.json', 'prompt_generate', product_data_json='x') == 'Nuevo: x'
+
+    # Un JSON a medio guardar no reemplaza la versión cargada
+    ruta.write_text('{"prompt_generate": ', encoding='utf-8')
+    os.utime(ruta, (3000, 3000))
+    assert registro.get('generador_prompt.json')['prompt_generate'] == 'Nuevo: {product_data_json}'
+
+    # Archivos nuevos y borrados
+    escribir(tmp_path / 'otro_prompt.json', {'prompt_generate': 'Otro'}, 1000)
+    assert registro.exists('otro_prompt.json')
+    ruta.unlink()
+    assert registro.get('generador_prompt.json') is None
+
+
+def test_sin_cambios_no_relee_y_reload_fuerza(tmp_path):
+    ruta = tmp_path / 'default_prompt.json'
+    escribir(ruta, {'prompt': 'A'}, 1000)
+    registro = PromptRegistry(tmp_path, check_interval=3600)
+    escribir(ruta, {'prompt': 'B'}, 2000)
+    # Dentro del intervalo se responde desde memoria
+    assert registro.get('default_prompt.json')['prompt'] == 'A'
+    registro.reload('default_prompt.json')
+    assert registro.get('default_prompt.json')['prompt'] == 'B'
+    assert PromptRegistry.shared(tmp_path) is PromptRegistry.shared(str(tmp_path))
+
+
+if __name__ == '__main__':
+    with tempfile.TemporaryDirectory() as carpeta:
+        test_recarga_cuando_cambia_el_archivo(Path(carpeta))
+    with tempfile.TemporaryDirectory() as carpeta:
+        test_sin_cambios_no_relee_y_reload_fuerza(Path(carpeta))
+    print("[OK] Todos los tests del registro de prompts pasaron")
@@ -0,0 +1,75 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Test de la caché de respuestas del modelo (ResponseCache) en AIHandler.generate_description
+"""
+import sys
+import tempfile
+import time
+from pathlib import Path
+sys.path.append(str(Path(__file__).parent))
+
+from ai_generator.response_cache import ResponseCache
+from modelo_falso import PRODUCTO, Respuesta, crear_handler
+
+
+def test_repetir_un_producto_no_llama_a_la_api(tmp_path):
+    handler = crear_handler(tmp_path)
+    primero = handler.generate_description(dict(PRODUCTO))
+    # Extracción + marketing de la categoría
+    assert len(handler.model.llamadas) == 2
+    assert 'La IA no pudo generar' not in primero
+
+    inicio = time.perf_counter()
+    segundo = handler.generate_description(dict(PRODUCTO))
+    assert len(handler.model.llamadas) == 2
+    assert segundo == primero
+    assert time.perf_counter() - inicio < 1
+
+    # La caché persiste en disco: otra instancia tampoco llama a la API
+    otro = crear_handler(tmp_path)
+    assert otro.generate_description(dict(PRODUCTO)) == primero
+    assert otro.model.llamadas == []
+    assert otro.response_cache.get_stats()['hits'] == 2
+
+
+def test_clave_por_modelo_prompt_y_parametros():
+    base = ResponseCache.make_key('gemini-1.5-flash', 'prompt', {'temperature': 0.7})
+    assert base == ResponseCache.make_key('gemini-1.5-flash', 'prompt', {'temperature': 0.7})
+    assert base != ResponseCache.make_key('gemini-1.5-pro', 'prompt', {'temperature': 0.7})
+    assert base != ResponseCache.make_key('gemini-1.5-flash', 'prompt ', {'temperature': 0.7})
+    assert base != ResponseCache.make_key('gemini-1.5-flash', 'prompt', {'temperature': 0.2})
+
+
+def test_vencimiento_y_limite_de_tamano(tmp_path):
+    cache = ResponseCache(str(tmp_path / 'respuestas.sqlite'), ttl=60, max_bytes=25)
+    cache.put('a', 'x' * 10)
+    cache.put('b', 'y' * 10)
+    assert cache.get('a') == 'x' * 10
+    # Supera los 25 bytes: se descarta la de acceso más antiguo ('b')
+    cache.put('c', 'z' * 10)
+    assert cache.get('b') is None
+    assert cache.get('a') is not None and cache.get('c') is not None
+
+    cache.ttl = 0
+    time.sleep(0.01)
+    assert cache.get('a') is None
+    assert cache.get_stats()['entries'] == 1
+
+
+def test_respuesta_invalida_no_queda_cacheada(tmp_path):
+    handler = crear_handler(tmp_path)
+    handler.model.generate_content = lambda prompt: Respuesta('sin json')
+    handler.generate_description(dict(PRODUCTO))
+    assert handler.response_cache.get_stats()['entries'] == 0
+
+
+if __name__ == '__main__':
+    test_clave_por_modelo_prompt_y_parametros()
+    with tempfile.TemporaryDirectory() as carpeta:
+        test_repetir_un_producto_no_llama_a_la_api(Path(carpeta))
+    with tempfile.TemporaryDirectory() as carpeta:
+        test_vencimiento_y_limite_de_tamano(Path(carpeta))
+    with tempfile.TemporaryDirectory() as carpeta:
+        test_respuesta_invalida_no_queda_cacheada(Path(carpeta))
+    print("[OK] Todos los tests de la caché de respuestas pasaron")
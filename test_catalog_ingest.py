@@ -0,0 +1,37 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Test de la ingesta del catálogo: columnas numéricas derivadas (potencia, stock y precio)
+"""
+import sys
+from pathlib import Path
+sys.path.append(str(Path(__file__).parent))
+
+
+
+def test_ingesta_parsea_potencia_stock_y_precio():
+    import pandas as pd
+    from products.catalog_ingest import parse_catalog_columns
+    from products.filter_engine import FilterEngine
+
+    crudo = pd.DataFrame({
+        'Potencia': ['5,5 KVA', '20kW', '7.5 / 8 HP', None, 'Consultar'],
+        'Stock': [0, '12 unidades', 'Disponible', 'consultar', '2.5'],
+        'Precio_USD_con_IVA': [1500, '2000 USD', None, '', None],
+    })
+    parseado = parse_catalog_columns(crudo)
+    assert parseado['Potencia_Numerica'].tolist()[:3] == [5.5, 20.0, 7.5]
+    assert parseado['Potencia_Unidad'].tolist()[:3] == ['kVA', 'kW', 'HP']
+    # Sin número la potencia queda en NA, no en 0: como el REGEXP_SUBSTR del SQL, potencia_max no la incluye
+    assert parseado['Potencia_Numerica'].isna().tolist() == [False, False, False, True, True]
+    mascara = FilterEngine().build_mask(crudo, {'potencia_max': 10})
+    assert mascara.tolist() == [True, False, True, False, False]
+    # CAST(Stock AS SIGNED) descarta la parte decimal
+    assert parseado['Stock_Numerico'].tolist() == [0, 12, 0, 0, 2]
+    assert parseado['Stock_Estado'].tolist() == ['Sin stock', 'Con stock', 'Disponible', 'Consultar', 'Con stock']
+    assert parseado['Precio_Numerico'].tolist()[:2] == [1500.0, 2000.0]
+
+
+if __name__ == '__main__':
+    test_ingesta_parsea_potencia_stock_y_precio()
+    print("[OK] Todos los tests de ingesta pasaron")
@@ -0,0 +1,70 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Test de la réplica local del catálogo (CatalogMirror): sincronización incremental y perfiles
+"""
+import sys
+import tempfile
+from pathlib import Path
+sys.path.append(str(Path(__file__).parent))
+
+from catalogo_sqlite import TABLA, crear_handler, catalogo
+from products.catalog_mirror import CatalogMirror
+
+
+def test_replica_local_sincroniza_solo_cambios(tmp_path):
+    handler = crear_handler(catalogo(25))
+    replica = CatalogMirror(str(tmp_path), TABLA)
+
+    resultado = replica.sync(handler)
+    assert resultado['total'] == 25
+    # Fila leída hace poco (queda en la caché LRU) y editada fuera de la aplicación
+    assert handler.get_products_by_ids(['SKU0003'], profile=replica.profile).iloc[0]['Marca'] != 'Honda'
+
+    handler.sqlite.execute(f"UPDATE {TABLA} SET Marca = 'Honda' WHERE SKU = 'SKU0003'")
+    handler.sqlite.execute(f"DELETE FROM {TABLA} WHERE SKU = 'SKU0004'")
+    handler.sqlite.commit()
+
+    consultas = []
+    handler.sqlite.set_trace_callback(consultas.append)
+    resultado = replica.sync(handler)
+    assert resultado['changed'] == 1
+    assert resultado['deleted'] == 1
+    assert resultado['total'] == 24
+    # Solo el checksum y el SKU modificado se leen de la BD
+    assert any("IN ('SKU0003')" in c for c in consultas)
+    fila = replica.frame[replica.frame['SKU'] == 'SKU0003'].iloc[0]
+    assert fila['Marca'] == 'Honda'
+
+    # Arranque en frío: se lee el archivo Arrow sin consultar MySQL
+    consultas.clear()
+    nueva = CatalogMirror(str(tmp_path), TABLA)
+    assert nueva.load()
+    assert consultas == []
+    assert nueva.frame['SKU'].tolist() == replica.frame['SKU'].tolist()
+    assert nueva.sync(handler)['changed'] == 0
+
+
+def test_replica_ignora_cambios_fuera_del_perfil(tmp_path):
+    handler = crear_handler(catalogo(10))
+    replica = CatalogMirror(str(tmp_path), TABLA)
+    replica.sync(handler)
+    assert 'Especificaciones' not in replica.frame.columns
+
+    handler.sqlite.execute(f"UPDATE {TABLA} SET Especificaciones = 'otra' WHERE SKU = 'SKU0001'")
+    handler.sqlite.commit()
+    assert replica.sync(handler)['changed'] == 0
+
+    # Cambiar el perfil fuerza una relectura completa
+    handler.config['column_profiles'] = {'list': ['SKU', 'Descripción', 'Especificaciones']}
+    resultado = replica.sync(handler)
+    assert resultado['changed'] == 10
+    assert replica.frame.loc[replica.frame['SKU'] == 'SKU0001', 'Especificaciones'].iloc[0] == 'otra'
+
+
+if __name__ == '__main__':
+    with tempfile.TemporaryDirectory() as carpeta:
+        test_replica_local_sincroniza_solo_cambios(Path(carpeta))
+    with tempfile.TemporaryDirectory() as carpeta:
+        test_replica_ignora_cambios_fuera_del_perfil(Path(carpeta))
+    print("[OK] Todos los tests de la réplica pasaron")
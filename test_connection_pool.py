@@ -0,0 +1,154 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Test del pool de conexiones de products (sin necesidad de MySQL)
+"""
+import sys
+import threading
+import time
+from pathlib import Path
+sys.path.append(str(Path(__file__).parent))
+
+from products.connection_pool import ConnectionPool
+
+
+class ConexionFalsa:
+    """Conexión mínima con la interfaz de pymysql que usa el pool"""
+
+    def __init__(self):
+        self.closed = False
+        self.ping_ok = True
+        self.rollbacks = 0
+
+    def ping(self, reconnect=False):
+        if not self.ping_ok:
+            raise OSError("conexión perdida")
+
+    def rollback(self):
+        self.rollbacks += 1
+
+    def close(self):
+        self.closed = True
+
+
+def crear_pool(**kwargs):
+    creadas = []
+
+    def factory():
+        conexion = ConexionFalsa()
+        creadas.append(conexion)
+        return conexion
+
+    return ConnectionPool(factory, **kwargs), creadas
+
+
+def test_reutiliza_conexiones():
+    pool, creadas = crear_pool(size=2)
+    for _ in range(5):
+        with pool.connection() as conexion:
+            assert not conexion.closed
+
+    stats = pool.get_stats()
+    assert len(creadas) == 1
+    assert stats['checkouts'] == 5
+    assert stats['idle'] == 1
+    assert stats['in_use'] == 0
+    # Cada devolución cierra la transacción abierta
+    assert creadas[0].rollbacks == 5
+
+
+def test_descarta_conexion_con_ping_fallido():
+    pool, creadas = crear_pool(size=1)
+    with pool.connection() as conexion:
+        pass
+    conexion.ping_ok = False
+
+    with pool.connection() as nueva:
+        assert nueva is not conexion
+
+    stats = pool.get_stats()
+    assert conexion.closed
+    assert stats['failed_pings'] == 1
+    assert stats['open'] == 1
+
+
+def test_recicla_por_inactividad_y_vida_maxima():
+    pool, creadas = crear_pool(size=1, recycle=0.01)
+    with pool.connection():
+        pass
+    time.sleep(0.02)
+    with pool.connection():
+        pass
+    assert pool.get_stats()['recycled_idle'] == 1
+
+    pool, creadas = crear_pool(size=1, max_lifetime=0.01, recycle=0)
+    with pool.connection():
+        pass
+    time.sleep(0.02)
+    with pool.connection():
+        pass
+    assert pool.get_stats()['expired_lifetime'] == 1
+    assert len(creadas) == 2
+
+
+def test_limite_y_timeout():
+    pool, creadas = crear_pool(size=1, timeout=0.05)
+    with pool.connection():
+        try:
+            with pool.connection():
+                pass
+            assert False, "Debió agotarse el tiempo de espera"
+        except ConnectionError:
+            pass
+    assert pool.get_stats()['checkout_timeouts'] == 1
+
+
+def test_espera_hasta_liberacion():
+    pool, creadas = crear_pool(size=1, timeout=2)
+    liberar = threading.Event()
+
+    def retener():
+        with pool.connection():
+            liberar.wait(1)
+
+    hilo = threading.Thread(target=retener)
+    hilo.start()
+    time.sleep(0.05)
+    threading.Timer(0.05, liberar.set).start()
+    with pool.connection():
+        pass
+    hilo.join()
+
+    stats = pool.get_stats()
+    assert len(creadas) == 1
+    assert stats['waits'] == 1
+    assert stats['max_wait_ms'] > 0
+
+
+def test_conexion_rota_no_vuelve_al_pool():
+    pool, creadas = crear_pool(size=1)
+
+    def rollback_roto():
+        raise OSError("socket cerrado")
+
+    try:
+        with pool.connection() as conexion:
+            conexion.rollback = rollback_roto
+            raise RuntimeError("fallo en la consulta")
+    except RuntimeError:
+        pass
+
+    stats = pool.get_stats()
+    assert stats['discarded_broken'] == 1
+    assert stats['open'] == 0
+    assert conexion.closed
+
+
+if __name__ == '__main__':
+    test_reutiliza_conexiones()
+    test_descarta_conexion_con_ping_fallido()
+    test_recicla_por_inactividad_y_vida_maxima()
+    test_limite_y_timeout()
+    test_espera_hasta_liberacion()
+    test_conexion_rota_no_vuelve_al_pool()
+    print("[OK] Todos los tests del pool pasaron")
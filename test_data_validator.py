@@ -0,0 +1,76 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Test del validador de datos (DataValidator): reglas en una pasada y caché por huella de fila
+"""
+import sys
+import tempfile
+from pathlib import Path
+sys.path.append(str(Path(__file__).parent))
+
+from products.data_validator import DataValidator
+
+
+def test_validador_en_una_pasada_cuenta_cada_regla():
+    import pandas as pd
+    df = pd.DataFrame({
+        'SKU': ['SKU', 'A100', 'A100', None, 'B200', 'C300', 'D400'],
+        'Descripción': ['Descripción', 'Generador 10 kVA', 'Generador repetido', 'Sin SKU válido', '  ', 'Motobomba 3"', 'Compresor 50 litros'],
+        'Marca': ['Marca', 'Gamma', 'Gamma', 'Toyama', 'Niwa', 'Honda', 'Pramac'],
+        'Precio_USD_con_IVA': ['Precio', '1500', '1500', '10', '20', 'consultar', '-5'],
+    })
+    limpio, reporte = DataValidator().validate_dataframe(df)
+
+    assert limpio['SKU'].tolist() == ['A100', 'C300', 'D400']
+    assert list(limpio.index) == [0, 1, 2]
+    conteos = {(i['type'], i.get('field')): i['count'] for i in reporte['issues']}
+    assert conteos[('header_row_detected', None)] == 1
+    assert conteos[('required_field_invalid', 'SKU')] == 1
+    assert conteos[('required_field_invalid', 'Descripción')] == 1
+    assert conteos[('duplicate_sku', None)] == 1
+    assert conteos[('data_type_conversion', 'Precio_USD_con_IVA')] == 1
+    assert conteos[('anomaly_negative_price', None)] == 1
+    assert reporte['stats'] == {'original_rows': 7, 'final_rows': 3, 'removed_rows': 4,
+                                'removal_percentage': 4 / 7 * 100, 'cached_rows': 0, 'validated_rows': 7}
+    # El frame original no se modifica
+    assert df['Precio_USD_con_IVA'].tolist()[-1] == '-5'
+
+
+def test_cache_de_validacion_solo_revalida_filas_modificadas(tmp_path):
+    import pandas as pd
+    df = pd.DataFrame({
+        'SKU': ['SKU', 'A100', 'A100', 'B200', 'C300'],
+        'Descripción': ['Descripción', 'Generador 10 kVA', 'Generador repetido', 'corto', 'Compresor 50 litros'],
+        'Marca': ['Marca', 'Gamma', 'Gamma', 'Niwa', 'Honda'],
+        'Precio_USD_con_IVA': ['Precio', '1500', '1500', '10', '20'],
+    })
+    cache_path = tmp_path / 'validation_cache.arrow'
+    _, reporte = DataValidator(str(cache_path)).validate_dataframe(df)
+    assert reporte['stats']['validated_rows'] == 5
+    assert cache_path.exists()
+
+    # Otra instancia (reinicio del proceso) lee la caché del disco
+    modificado = df.copy()
+    modificado.loc[3, 'Descripción'] = None
+    limpio, reporte = DataValidator(str(cache_path)).validate_dataframe(modificado)
+    assert reporte['stats']['cached_rows'] == 4
+    assert reporte['stats']['validated_rows'] == 1
+
+    limpio_sin_cache, reporte_sin_cache = DataValidator().validate_dataframe(modificado)
+    pd.testing.assert_frame_equal(limpio, limpio_sin_cache)
+    assert reporte['issues'] == reporte_sin_cache['issues']
+    assert reporte['data_quality_score'] == reporte_sin_cache['data_quality_score']
+
+    # Checksum de la réplica repetido entre filas distintas (mirror_updated_at_column)
+    con_hash = df.iloc[[0, 1, 4]].assign(_row_hash='2024-01-01 00:00:00')
+    ruta = tmp_path / 'validation_hash.arrow'
+    primero, _ = DataValidator(str(ruta)).validate_dataframe(con_hash, fingerprint_column='_row_hash')
+    segundo, _ = DataValidator(str(ruta)).validate_dataframe(con_hash, fingerprint_column='_row_hash')
+    assert primero['SKU'].tolist() == segundo['SKU'].tolist() == ['A100', 'C300']
+
+
+if __name__ == '__main__':
+    test_validador_en_una_pasada_cuenta_cada_regla()
+    with tempfile.TemporaryDirectory() as carpeta:
+        test_cache_de_validacion_solo_revalida_filas_modificadas(Path(carpeta))
+    print("[OK] Todos los tests del validador pasaron")
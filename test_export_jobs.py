@@ -0,0 +1,56 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Test de las exportaciones en segundo plano (ExportJobs)
+"""
+import sys
+import tempfile
+from pathlib import Path
+sys.path.append(str(Path(__file__).parent))
+
+from catalogo_sqlite import crear_handler, crear_manager, catalogo
+from products import product_manager as modulo_manager
+
+
+def test_exportacion_en_segundo_plano_reutiliza_el_archivo(tmp_path):
+    import os
+    import time
+    import pandas as pd
+    handler = crear_handler(catalogo(25), use_local_mirror=True, mirror_path=str(tmp_path / 'cache'))
+    manager = crear_manager(handler)
+    manager.apply_filter(modulo_manager.FilterCriteria(marca='Gamma'))
+    manager.set_selection(['SKU0003', 'SKU0001', 'SKU0000'])
+
+    directorio = os.getcwd()
+    os.chdir(tmp_path)
+    try:
+        def esperar(job_id):
+            limite = time.time() + 10
+            while manager.get_export_job(job_id)['status'] in ('pending', 'running') and time.time() < limite:
+                time.sleep(0.02)
+            return manager.get_export_job(job_id)
+
+        trabajo = manager.start_export('csv')
+        assert trabajo['status'] in ('pending', 'running', 'done') and trabajo['total'] == 3
+        estado = esperar(trabajo['job_id'])
+        assert estado['status'] == 'done' and estado['progress'] == 1.0
+        exportado = pd.read_csv(tmp_path / 'exports' / estado['filename'], encoding='utf-8-sig')
+        # Visibles seleccionados primero y luego el resto; la ficha completa incluye Especificaciones
+        assert exportado['SKU'].tolist() == ['SKU0000', 'SKU0003', 'SKU0001']
+        assert 'Especificaciones' in exportado.columns
+
+        # Misma selección y formato: mismo trabajo y archivo; otro formato genera otro trabajo
+        assert manager.start_export('csv')['job_id'] == trabajo['job_id']
+        parquet = manager.start_export('parquet')
+        assert parquet['job_id'] != trabajo['job_id']
+        assert esperar(parquet['job_id'])['filename'].endswith('.parquet')
+        assert manager.start_export('pdf')['status'] == 'error'
+        assert manager.get_export_job('no-existe') is None
+    finally:
+        os.chdir(directorio)
+
+
+if __name__ == '__main__':
+    with tempfile.TemporaryDirectory() as carpeta:
+        test_exportacion_en_segundo_plano_reutiliza_el_archivo(Path(carpeta))
+    print("[OK] Todos los tests de exportaciones pasaron")
@@ -0,0 +1,70 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Test de las facetas en memoria (FacetEngine)
+"""
+import sys
+import tempfile
+from pathlib import Path
+sys.path.append(str(Path(__file__).parent))
+
+from catalogo_sqlite import crear_handler, crear_manager, catalogo
+from products import product_manager as modulo_manager
+from products.facet_engine import FacetEngine
+from products.filter_engine import FilterEngine
+
+
+def test_facetas_cuentan_en_memoria_sin_consultar_la_base(tmp_path):
+    import pandas as pd
+    handler = crear_handler(catalogo(25), use_local_mirror=True, mirror_path=str(tmp_path))
+    manager = crear_manager(handler)
+    manager.get_catalog(force_sync=True)
+    consultas = []
+    handler.get_distinct_values = lambda columna: consultas.append(columna) or []
+
+    criterio = modulo_manager.FilterCriteria(marca='gamma', precio_min=1500)
+    facetas = manager.get_facets(criterio)
+    filtrado = manager.apply_filter(criterio)
+    assert facetas['total'] == len(filtrado)
+
+    def conteos(items):
+        return {item['value']: item['count'] for item in items}
+
+    assert conteos(facetas['familia']) == filtrado['Familia'].value_counts().to_dict()
+    # Disyuntivo: Marca cuenta todas las marcas con el resto de los filtros
+    sin_marca = manager.apply_filter(modulo_manager.FilterCriteria(precio_min=1500))
+    assert conteos(facetas['marca']) == sin_marca['Marca'].value_counts().to_dict()
+    # Rangos (min, max]: precio ignora su propio filtro
+    solo_marca = manager.apply_filter(modulo_manager.FilterCriteria(marca='gamma'))
+    bordes = [0, 500, 1000, 2500, 5000, 10000, 25000, float('inf')]
+    esperados = pd.cut(solo_marca['Precio_Numerico'], bordes, include_lowest=True).value_counts()
+    assert [item['count'] for item in facetas['precio']] == [int(esperados[i]) for i in esperados.index.sort_values() if esperados[i]]
+    assert sum(item['count'] for item in facetas['potencia']) == len(filtrado)
+
+    opciones = manager.get_filter_options()
+    assert opciones['marcas'] == ['Cummins', 'Gamma', 'Toyama']
+    assert opciones['familias'] == ['Generadores', 'Motobombas']
+    assert consultas == []
+
+
+def test_valor_en_el_borde_cuenta_en_el_rango_que_lo_filtra():
+    import pandas as pd
+    filas = pd.DataFrame([
+        {'SKU': 'A', 'Potencia': '5 KVA', 'Precio_USD_con_IVA': 1000},
+        {'SKU': 'B', 'Potencia': '10 KVA', 'Precio_USD_con_IVA': 0},
+        {'SKU': 'C', 'Potencia': '5.5 KVA', 'Precio_USD_con_IVA': 25000.5},
+    ])
+    facetas = FacetEngine().facets(filas, {})
+    assert [(item['value'], item['count']) for item in facetas['potencia']] == [('0-5', 1), ('5-10', 2)]
+    assert [(item['value'], item['count']) for item in facetas['precio']] == [('0-500', 1), ('500-1000', 1),
+                                                                             ('25000+', 1)]
+    # 5 KVA queda en 0-5, igual que con el filtro potencia_max=5
+    mascara = FilterEngine().build_mask(filas, {'potencia_min': 0, 'potencia_max': 5})
+    assert mascara.tolist() == [True, False, False]
+
+
+if __name__ == '__main__':
+    with tempfile.TemporaryDirectory() as carpeta:
+        test_facetas_cuentan_en_memoria_sin_consultar_la_base(Path(carpeta))
+    test_valor_en_el_borde_cuenta_en_el_rango_que_lo_filtra()
+    print("[OK] Todos los tests de facetas pasaron")
@@ -0,0 +1,69 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Test del motor de filtros en memoria (FilterEngine): mismos resultados que el SQL
+"""
+import sys
+from pathlib import Path
+sys.path.append(str(Path(__file__).parent))
+
+from catalogo_sqlite import crear_handler, catalogo, FILAS_BORDE
+from products.filter_engine import FilterEngine
+from products.search_index import SearchIndex
+
+
+FILTROS_EQUIVALENCIA = [
+    {},
+    {'familia': 'Generadores'},
+    {'marca': 'Toyama', 'has_pdf': True},
+    {'stock_min': 1},
+    {'stock_max': 0},
+    {'stock_disponible': True},
+    {'stock_consultar': True},
+    {'precio_min': 1500, 'precio_max': 2500},
+    {'potencia_min': 10, 'potencia_max': 20.5},
+    {'combustible': 'diesel'},
+    {'has_cabina': True},
+    {'has_cabina': False},
+    {'has_tta': True},
+    {'has_tta': False},
+    {'has_pdf': False},
+    {'search_text': 'gd1'},
+    {'search_text': 'cummins', 'stock_disponible': True},
+    {'marca': 'Gamma', 'after_sku': 'SKU0010', 'limit': 3},
+    {'familia': 'Motobombas', 'order_by': 'SKU', 'order_dir': 'DESC', 'after_sku': 'SKU0015'},
+    {'order_by': 'Precio_USD_con_IVA', 'order_dir': 'DESC', 'limit': 5},
+    {'order_by': 'Potencia', 'potencia_max': 9},
+    {'order_by': 'Stock', 'order_dir': 'DESC'},
+]
+
+
+def test_motor_en_memoria_equivale_al_sql():
+    handler = crear_handler(catalogo(25) + FILAS_BORDE)
+    catalogo_crudo = handler.get_all_products(validate=False)
+    motor = FilterEngine()
+
+    for filtros in FILTROS_EQUIVALENCIA:
+        esperado = handler.get_products_filtered(dict(filtros))['SKU'].tolist()
+        obtenido = motor.evaluate(catalogo_crudo, filtros, key=1)['SKU'].tolist()
+        assert obtenido == esperado, f"{filtros}: {obtenido} != {esperado}"
+
+
+def test_motor_con_indice_de_busqueda_equivale_al_sql():
+    handler = crear_handler(catalogo(25) + FILAS_BORDE)
+    catalogo_crudo = handler.get_all_products(validate=False)
+    indice = SearchIndex()
+    indice.update(catalogo_crudo)
+    motor = FilterEngine()
+
+    for texto in ['gd1', 'DIESEL MODELO 2', 'inverter', 'sku002', 'zz0', 'no existe']:
+        filtros = {'search_text': texto}
+        esperado = handler.get_products_filtered(dict(filtros))['SKU'].tolist()
+        obtenido = catalogo_crudo['SKU'].iloc[motor.select(catalogo_crudo, filtros, search_index=indice)].tolist()
+        assert obtenido == esperado, f"{texto}: {obtenido} != {esperado}"
+
+
+if __name__ == '__main__':
+    test_motor_en_memoria_equivale_al_sql()
+    test_motor_con_indice_de_busqueda_equivale_al_sql()
+    print("[OK] Todos los tests del motor de filtros pasaron")
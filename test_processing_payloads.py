@@ -0,0 +1,49 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Test de los payloads de procesamiento perezosos (ProcessingPayloads)
+"""
+import sys
+import tempfile
+from pathlib import Path
+sys.path.append(str(Path(__file__).parent))
+
+from catalogo_sqlite import crear_handler, crear_manager, catalogo
+
+
+def test_payloads_de_procesamiento_perezosos(tmp_path):
+    from products.processing_payloads import ProcessingPayloads
+    handler = crear_handler(catalogo(25), use_local_mirror=True, mirror_path=str(tmp_path))
+    manager = crear_manager(handler)
+    manager.refresh_products(use_filter=False)
+    manager.select_range(0, 7)
+
+    payloads = manager.prepare_for_processing()
+    assert isinstance(payloads, ProcessingPayloads) and len(payloads) == 7
+    primero = payloads[0]
+    assert primero['sku'] == 'SKU0000' and primero['nombre'] == 'Generador diesel modelo 0'
+    assert primero['marca'] == 'Gamma' and primero['pdf_url'] == ''
+    # row_data trae la fila completa del perfil 'generation' con None en lugar de NaN
+    assert 'Especificaciones' in primero['row_data']
+    assert payloads[2]['row_data']['Cabina'] is None
+    assert [p['sku'] for p in payloads] == [f'SKU{i:04d}' for i in range(7)]
+    assert payloads[-1]['sku'] == 'SKU0006'
+
+    # Los lotes enviados por el frontend se releen por SKU con el perfil 'generation'
+    por_sku = manager.prepare_skus_for_processing(['SKU0012', 'SKU0003', 'NO_EXISTE'])
+    assert [p['sku'] for p in por_sku] == ['SKU0012', 'SKU0003']
+    assert 'Especificaciones' in por_sku[0]['row_data']
+    assert 'Especificaciones' not in manager.product_cache.columns
+
+    # Los bloques se arman a medida que se recorren
+    perezosos = ProcessingPayloads(manager.product_cache, chunk_size=3)
+    iterador = iter(perezosos)
+    next(iterador)
+    assert perezosos._chunk_start == 0
+    assert len(list(iterador)) == 24
+
+
+if __name__ == '__main__':
+    with tempfile.TemporaryDirectory() as carpeta:
+        test_payloads_de_procesamiento_perezosos(Path(carpeta))
+    print("[OK] Todos los tests de payloads pasaron")
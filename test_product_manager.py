@@ -0,0 +1,121 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Test de ProductManager: caché de productos, selección y búsqueda por SKU
+"""
+import sys
+import tempfile
+from pathlib import Path
+sys.path.append(str(Path(__file__).parent))
+
+from catalogo_sqlite import crear_handler, crear_manager, catalogo
+from products import product_manager as modulo_manager
+
+
+def test_cache_de_productos_compacta_y_reporta_memoria(tmp_path):
+    import pandas as pd
+    handler = crear_handler(catalogo(40), use_local_mirror=True, mirror_path=str(tmp_path))
+    manager = crear_manager(handler)
+    df = manager.refresh_products(use_filter=False)
+
+    assert len(df) == 40
+    for columna in ['Marca', 'Familia', 'Combustible', 'Stock_Estado']:
+        assert isinstance(df[columna].dtype, pd.CategoricalDtype), columna
+    assert df['Precio_USD_con_IVA'].dtype == 'Float64'
+    assert df['Stock_Numerico'].dtype == 'Int64'
+    # Los faltantes siguen siendo NA en memoria (no se reemplazan por None)
+    assert df['Cabina'].isna().sum() > 0
+    assert None not in df['Cabina'].tolist()
+
+    # Un stock con decimales no rompe la conversión a Int64
+    compacto = manager._compact_dtypes(pd.DataFrame({'Stock_Numerico': [2.5, None, '3', -1.7]}))
+    assert compacto['Stock_Numerico'].tolist()[::2] == [2, 3]
+    assert compacto['Stock_Numerico'].tolist()[3] == -1
+
+    assert 'memory' not in manager.get_statistics()
+    memoria = manager.get_statistics(include_memory=True)['memory']
+    assert memoria['product_cache_rows'] == 40
+    assert memoria['product_cache_bytes'] > 0 and memoria['mirror_bytes'] > 0
+    detalle = manager.get_product_details('SKU0002')
+    assert detalle['Cabina'] is None
+
+
+def test_seleccion_con_vector_y_indice_de_sku(tmp_path):
+    handler = crear_handler(catalogo(25), use_local_mirror=True, mirror_path=str(tmp_path))
+    manager = crear_manager(handler)
+    manager.refresh_products(use_filter=False)
+
+    manager.select_product('SKU0003')
+    manager.select_range(5, 8)
+    manager.select_by_criteria({'marca': 'Gamma', 'min_stock': 1})
+    manager.select_product('SKU0006', selected=False)
+    manager.select_product('NO_EXISTE')
+
+    esperado = {'SKU0003', 'SKU0005', 'SKU0007', 'SKU0009', 'SKU0021', 'SKU0024', 'NO_EXISTE'}
+    assert manager.selected_products == esperado
+    # La columna 'selected' y las filas seleccionadas coinciden con la selección
+    cache = manager.product_cache
+    assert cache.loc[cache['selected'], 'SKU'].tolist() == sorted(esperado - {'NO_EXISTE'})
+    assert manager.get_selected_products()['SKU'].tolist() == sorted(esperado - {'NO_EXISTE'})
+
+    # La selección se conserva al recargar (el vector se reconstruye desde el conjunto)
+    manager.refresh_products(use_filter=False)
+    assert manager.product_cache['selected'].sum() == 6
+
+    manager.select_all()
+    assert manager.product_cache['selected'].all()
+    manager.select_all(False)
+    assert not manager.product_cache['selected'].any() and not manager.selected_products
+
+
+def test_busqueda_por_sku_agrupa_los_faltantes_en_una_consulta(tmp_path):
+    handler = crear_handler(catalogo(25), use_local_mirror=True, mirror_path=str(tmp_path))
+    manager = crear_manager(handler)
+    manager.get_catalog(force_sync=True)
+    manager.apply_filter(modulo_manager.FilterCriteria(marca='Gamma'))
+
+    consultas = []
+    original = handler.get_products_by_ids
+    handler.get_products_by_ids = lambda ids, profile='detail': consultas.append(list(ids)) or original(ids, profile)
+
+    # SKU0000 está visible, SKU0001 solo en el catálogo y los otros dos no existen
+    df = manager.get_products_by_skus(['SKU0001', 'NO_EXISTE', 'SKU0000', 'OTRO', 'SKU0001'])
+    assert df['SKU'].tolist() == ['SKU0001', 'SKU0000']
+    assert consultas == [['NO_EXISTE', 'OTRO']]
+
+    # Selección con SKUs fuera de los visibles: se completan desde el catálogo
+    manager.set_selection(['SKU0003', 'SKU0001'])
+    assert manager.get_selected_products()['SKU'].tolist() == ['SKU0003', 'SKU0001']
+    assert manager.product_cache['selected'].sum() == 1
+
+    consultas.clear()
+    detalle = manager.get_product_details('SKU0003')
+    assert detalle['SKU'] == 'SKU0003' and 'Especificaciones' in detalle
+    assert consultas == [['SKU0003']]
+
+
+def test_busqueda_de_texto_usa_el_indice_y_respeta_el_limite(tmp_path):
+    esperado = ['SKU0001'] + [f'SKU{i:04d}' for i in range(10, 20)]
+    for replica in (True, False):
+        handler = crear_handler(catalogo(25), use_local_mirror=replica, mirror_path=str(tmp_path))
+        manager = crear_manager(handler)
+        manager.refresh_products(use_filter=False)
+        manager.apply_filter = lambda *args, **kwargs: (_ for _ in ()).throw(AssertionError('apply_filter'))
+
+        # Texto libre: no pasa por apply_filter y no reemplaza los productos cargados
+        assert sorted(manager.search_products('gd1')['SKU']) == esperado, replica
+        limitado = manager.search_products('GD1', limit=4)
+        assert len(limitado) == 4 and set(limitado['SKU']) <= set(esperado), replica
+        assert len(manager.product_cache) == 25
+
+
+if __name__ == '__main__':
+    with tempfile.TemporaryDirectory() as carpeta:
+        test_cache_de_productos_compacta_y_reporta_memoria(Path(carpeta))
+    with tempfile.TemporaryDirectory() as carpeta:
+        test_seleccion_con_vector_y_indice_de_sku(Path(carpeta))
+    with tempfile.TemporaryDirectory() as carpeta:
+        test_busqueda_por_sku_agrupa_los_faltantes_en_una_consulta(Path(carpeta))
+    with tempfile.TemporaryDirectory() as carpeta:
+        test_busqueda_de_texto_usa_el_indice_y_respeta_el_limite(Path(carpeta))
+    print("[OK] Todos los tests de ProductManager pasaron")
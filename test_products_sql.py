@@ -0,0 +1,143 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Test de las consultas de DatabaseHandler contra una base SQLite en memoria
+(emula el DictCursor de pymysql, sin necesidad de MySQL)
+"""
+import sys
+from pathlib import Path
+sys.path.append(str(Path(__file__).parent))
+
+from catalogo_sqlite import TABLA, crear_handler, catalogo
+
+
+def test_paginacion_keyset_recorre_todo_el_catalogo():
+    handler = crear_handler(catalogo(25))
+    vistos = []
+    cursor = None
+    paginas = 0
+    while True:
+        df, cursor = handler.get_products_page(cursor, page_size=10)
+        vistos.extend(df['SKU'].tolist())
+        paginas += 1
+        if cursor is None:
+            break
+
+    assert paginas == 3
+    assert vistos == sorted(f['SKU'] for f in catalogo(25))
+
+
+def test_get_all_products_no_trunca():
+    handler = crear_handler(catalogo(25), page_size=7)
+    df = handler.get_all_products()
+    assert len(df) == 25
+
+
+def test_paginacion_filtrada_por_sku():
+    handler = crear_handler(catalogo(25))
+    df = handler.get_products_filtered({'marca': 'Gamma', 'after_sku': 'SKU0010', 'order_by': 'SKU'})
+    assert df['SKU'].tolist() == ['SKU0012', 'SKU0015', 'SKU0018', 'SKU0021', 'SKU0024']
+
+
+def test_estadisticas_en_una_consulta_y_cacheadas():
+    handler = crear_handler(catalogo(25))
+    consultas = []
+    handler.sqlite.set_trace_callback(consultas.append)
+
+    stats = handler.get_statistics()
+    assert len(consultas) == 1
+    assert stats['total_products'] == 25
+    assert stats['total_families'] == 2
+    assert stats['total_brands'] == 3
+    # Stock numérico > 0: los valores 5 y 12 (10 filas)
+    assert stats['products_with_stock'] == 10
+    assert stats['products_without_stock'] == 15
+    assert stats['average_price'] == 2200.0
+
+    # Dentro del TTL no se vuelve a consultar
+    handler.get_statistics()
+    assert len(consultas) == 1
+    handler.get_statistics(force_refresh=True)
+    assert len(consultas) == 2
+
+
+def test_perfiles_de_columnas():
+    handler = crear_handler(catalogo(10))
+    consultas = []
+    handler.sqlite.set_trace_callback(consultas.append)
+
+    listado = handler.get_all_products()
+    assert 'Especificaciones' not in listado.columns
+    assert 'Marca' in listado.columns
+    assert not any('SELECT *' in c for c in consultas if 'LIMIT 0' not in c)
+
+    completo = handler.get_products_by_ids(['SKU0003'])
+    assert completo.iloc[0]['Especificaciones'].startswith('Ficha técnica')
+
+    # Las columnas que no existen en la tabla se ignoran
+    handler.config['column_profiles'] = {'list': ['SKU', 'Marca', 'No_Existe']}
+    assert handler.get_profile_columns('list') == ['SKU', 'Marca']
+
+
+def test_actualizacion_masiva_por_bloques_con_resultado_por_sku():
+    handler = crear_handler(catalogo(10), bulk_update_chunk_size=3)
+    consultas = []
+    handler.sqlite.set_trace_callback(consultas.append)
+
+    updates = [{'sku': f'SKU{i:04d}', 'field': 'Stock', 'value': 100 + i} for i in range(7)]
+    updates += [{'sku': 'NO_EXISTE', 'field': 'Stock', 'value': 1},
+                {'sku': 'SKU0001', 'field': 'Marca', 'value': 'Honda'},
+                {'sku': 'SKU0002', 'field': 'Marca; DROP TABLE productos', 'value': 'x'},
+                {'sku': 'SKU0003', 'field': ['Stock'], 'value': 1},
+                # Elementos sin SKU se informan uno por uno sin cortar el lote
+                {'field': 'Stock', 'value': 5}, None]
+    resultado = handler.bulk_update_field(updates)
+
+    assert resultado['success'] == 8 and resultado['failed'] == 5
+    assert [r['status'] for r in resultado['results'] if r['sku'] is None] == ['failed', 'failed']
+    estados = {(r['sku'], str(r['field'])): r['status'] for r in resultado['results']}
+    assert estados[('NO_EXISTE', 'Stock')] == 'not_found'
+    assert estados[('SKU0002', 'Marca; DROP TABLE productos')] == 'invalid_field'
+    assert estados[('SKU0003', "['Stock']")] == 'invalid_field'
+    # 8 SKUs de Stock en bloques de 3 + 1 de Marca
+    assert len([q for q in consultas if q.startswith('UPDATE')]) == 4
+    filas = dict(handler.sqlite.execute(f'SELECT SKU, Stock FROM {TABLA}').fetchall())
+    assert filas['SKU0006'] == 106 and filas['SKU0007'] == 'Disponible'
+    assert handler.sqlite.execute(f"SELECT Marca FROM {TABLA} WHERE SKU = 'SKU0001'").fetchone()[0] == 'Honda'
+
+
+def test_busqueda_por_ids_en_bloques_con_cache_lru():
+    handler = crear_handler(catalogo(25), products_chunk_size=4, products_fetch_workers=3, products_cache_size=10)
+    consultas = []
+    handler.sqlite.set_trace_callback(lambda q: consultas.append(q) if 'WHERE SKU IN' in q else None)
+
+    pedidos = ['SKU0009', 'SKU0001', 'NO_EXISTE', 'SKU0005', 'SKU0001', 'SKU0003', 'SKU0007', 'SKU0002']
+    df = handler.get_products_by_ids(pedidos)
+    # Orden pedido, sin duplicados ni faltantes; 7 SKUs distintos en bloques de 4
+    assert df['SKU'].tolist() == ['SKU0009', 'SKU0001', 'SKU0005', 'SKU0003', 'SKU0007', 'SKU0002']
+    assert len(consultas) == 2
+
+    # Las filas recientes no vuelven a la base; el perfil forma parte de la clave
+    consultas.clear()
+    assert handler.get_products_by_ids(['SKU0001', 'SKU0003'])['SKU'].tolist() == ['SKU0001', 'SKU0003']
+    assert consultas == []
+    handler.get_products_by_ids(['SKU0001'], profile='list')
+    assert len(consultas) == 1
+
+    # Una actualización descarta la fila cacheada
+    consultas.clear()
+    handler.update_product_field('SKU0003', 'Stock', 99)
+    assert handler.get_products_by_ids(['SKU0003'])['Stock'].tolist() == [99]
+    assert len(consultas) == 1
+    assert len(handler._rows_cache) <= 10
+
+
+if __name__ == '__main__':
+    test_paginacion_keyset_recorre_todo_el_catalogo()
+    test_get_all_products_no_trunca()
+    test_paginacion_filtrada_por_sku()
+    test_estadisticas_en_una_consulta_y_cacheadas()
+    test_perfiles_de_columnas()
+    test_actualizacion_masiva_por_bloques_con_resultado_por_sku()
+    test_busqueda_por_ids_en_bloques_con_cache_lru()
+    print("[OK] Todos los tests de consultas pasaron")
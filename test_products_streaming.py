@@ -0,0 +1,123 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Test de la serialización por lotes de /api/products/products (JSON, NDJSON y compresión)
+y de las exportaciones por bloques (Excel, CSV y Parquet)
+"""
+import gzip
+import json
+import sys
+import tempfile
+from pathlib import Path
+sys.path.append(str(Path(__file__).parent))
+
+import numpy as np
+import pandas as pd
+
+from products import exporters, streaming
+
+
+def crear_productos(n=7):
+    return pd.DataFrame({
+        'SKU': [f'SKU{i:03d}' for i in range(n)],
+        'Descripción': [f'Generador {i} kVA' for i in range(n)],
+        'Precio_USD_con_IVA': [1000.5 + i if i % 3 else np.nan for i in range(n)],
+        'Stock_Estado': pd.Categorical([['Disponible', None, 'Con stock', 'Sin stock', 'Consultar'][i % 5] for i in range(n)]),
+        'selected': [i % 2 == 0 for i in range(n)],
+    })
+
+
+def test_json_por_lotes_equivale_a_to_dict():
+    df = crear_productos()
+    cabecera = {'success': True, 'total_count': len(df), 'next_cursor': None}
+    texto = ''.join(streaming.iter_json(df, cabecera, batch_size=3))
+    respuesta = json.loads(texto)
+
+    assert respuesta['success'] is True
+    assert respuesta['total_count'] == 7
+    esperado = df.astype(object).where(df.notna(), None).to_dict('records')
+    assert respuesta['products'] == esperado
+
+
+def test_json_sin_filas():
+    texto = ''.join(streaming.iter_json(crear_productos().iloc[0:0], {'success': True}))
+    assert json.loads(texto) == {'success': True, 'products': []}
+
+
+def test_ndjson_y_proyeccion_de_columnas():
+    df = streaming.project_columns(crear_productos(), ['Descripción', 'no_existe'])
+    assert list(df.columns) == ['SKU', 'Descripción']
+
+    lineas = ''.join(streaming.iter_ndjson(df, {'total_count': len(df)}, batch_size=2)).splitlines()
+    assert json.loads(lineas[0]) == {'total_count': 7}
+    filas = [json.loads(linea) for linea in lineas[1:]]
+    assert [f['SKU'] for f in filas] == df['SKU'].tolist()
+    assert filas[0] == {'SKU': 'SKU000', 'Descripción': 'Generador 0 kVA'}
+
+
+def test_compresion_gzip_por_lotes():
+    df = crear_productos(50)
+    partes = list(streaming.encode_stream(streaming.iter_json(df, {'success': True}, batch_size=10), 'gzip'))
+    # Cada lote se envía comprimido apenas se genera
+    assert len(partes) > 2
+    respuesta = json.loads(gzip.decompress(b''.join(partes)).decode('utf-8'))
+    assert len(respuesta['products']) == 50
+
+
+def test_to_records_convierte_faltantes_al_serializar():
+    df = pd.DataFrame({
+        'SKU': ['A1', 'B2'],
+        'Marca': pd.Categorical(['Gamma', None]),
+        'Precio_USD_con_IVA': pd.array([1500.5, None], dtype='Float64'),
+        'Stock_Numerico': pd.array([None, 3], dtype='Int64'),
+    })
+    registros = streaming.to_records(df)
+    assert registros == [
+        {'SKU': 'A1', 'Marca': 'Gamma', 'Precio_USD_con_IVA': 1500.5, 'Stock_Numerico': None},
+        {'SKU': 'B2', 'Marca': None, 'Precio_USD_con_IVA': None, 'Stock_Numerico': 3},
+    ]
+    json.dumps(registros)
+
+
+def test_exportacion_por_bloques_en_excel_csv_y_parquet(tmp_path):
+    from openpyxl import load_workbook
+    df = crear_productos(7)
+    # Más de 26 columnas: los anchos se asignan también después de la Z
+    for i in range(25):
+        df[f'Extra_{i}'] = f'valor {i}' * (i % 3 + 1)
+
+    excel = exporters.export_dataframe(df, tmp_path / 'productos.xlsx', format='excel', chunk_size=3)
+    hoja = load_workbook(excel)['Productos']
+    assert [c.value for c in hoja[1]] == list(df.columns)
+    assert hoja.max_row == 8
+    assert hoja['C2'].value is None and hoja['C3'].value == 1001.5
+    # xlsxwriter guarda el ancho con el margen de la fuente (< 1 carácter)
+    assert abs(hoja.column_dimensions['AD'].width - exporters.column_widths(df)['Extra_24']) < 1
+
+    csv = exporters.export_dataframe(df, tmp_path / 'productos.csv', format='csv', chunk_size=3)
+    leido = pd.read_csv(csv, encoding='utf-8-sig')
+    assert leido['SKU'].tolist() == df['SKU'].tolist()
+    assert leido['Descripción'].tolist() == df['Descripción'].tolist()
+
+    parquet = exporters.export_dataframe(df, tmp_path / 'productos.parquet', format='parquet', chunk_size=3)
+    leido = pd.read_parquet(parquet)
+    pd.testing.assert_frame_equal(leido, df)
+
+
+def test_anchos_de_columna_sobre_una_muestra():
+    df = pd.DataFrame({'SKU': [f'SKU{i}' for i in range(5000)], 'Texto': ['x' * 80] * 5000})
+    anchos = exporters.column_widths(df, sample_size=100)
+    # Largo máximo + 2, con tope en MAX_COLUMN_WIDTH
+    assert anchos == {'SKU': len('SKU4999') + 2, 'Texto': exporters.MAX_COLUMN_WIDTH}
+
+
+if __name__ == '__main__':
+    test_json_por_lotes_equivale_a_to_dict()
+    test_json_sin_filas()
+    test_ndjson_y_proyeccion_de_columnas()
+    test_compresion_gzip_por_lotes()
+    test_to_records_convierte_faltantes_al_serializar()
+    test_anchos_de_columna_sobre_una_muestra()
+    with tempfile.TemporaryDirectory() as carpeta:
+        test_exportacion_por_bloques_en_excel_csv_y_parquet(Path(carpeta))
+    print("[OK] Todos los tests de streaming pasaron")
@@ -0,0 +1,41 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Test del índice de búsqueda de trigramas (SearchIndex)
+"""
+import sys
+from pathlib import Path
+sys.path.append(str(Path(__file__).parent))
+
+from catalogo_sqlite import catalogo, FILAS_BORDE
+from products.search_index import SearchIndex
+
+
+def test_indice_de_busqueda_incremental_y_sin_acentos():
+    import pandas as pd
+
+    filas = pd.DataFrame(catalogo(10) + FILAS_BORDE)
+    indice = SearchIndex()
+    assert indice.update(filas)['added'] == 12
+
+    # "descripcion" sin acento, prefijo corto y subcadena en medio de palabra
+    assert filas['SKU'].iloc[indice.search('MOTOBOMBA')].tolist() == ['ZZ001']
+    assert len(indice.search('ge')) == 11
+    assert filas['SKU'].iloc[indice.search('verter')].tolist() == ['ZZ002']
+    # Consultas de 1-2 caracteres: también en medio de una palabra, con límite en orden del catálogo
+    assert filas['SKU'].iloc[indice.search('d1')].tolist() == ['SKU0001']
+    assert filas['SKU'].iloc[indice.search('BA')].tolist() == ['ZZ001']
+    assert indice.search('e', limit=3).tolist() == [0, 1, 2]
+
+    filas.loc[filas['SKU'] == 'ZZ001', 'Descripción'] = 'Hidrolavadora eléctrica'
+    filas = filas[filas['SKU'] != 'SKU0009'].reset_index(drop=True)
+    cambios = indice.update(filas)
+    assert cambios == {'added': 0, 'updated': 1, 'removed': 1}
+    assert len(indice.search('motobomba')) == 0
+    assert filas['SKU'].iloc[indice.search('electrica')].tolist() == ['ZZ001']
+    assert 'SKU0009' not in filas['SKU'].iloc[indice.search('sku')].tolist()
+
+
+if __name__ == '__main__':
+    test_indice_de_busqueda_incremental_y_sin_acentos()
+    print("[OK] Todos los tests del índice de búsqueda pasaron")